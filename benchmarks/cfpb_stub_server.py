@@ -0,0 +1,197 @@
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+"""
+Local stand-in for the consumerfinance.gov complaint search api.
+Serves synthetic complaints in the same [{"_source": {...}}, ...] envelope,
+with configurable volume, latency and injected failures, so ingestion can be
+measured without touching the real api.
+"""
+
+DATE_FORMAT = "%Y-%m-%d"
+PRODUCTS = ["Credit reporting", "Debt collection", "Mortgage", "Credit card", "Checking or savings account"]
+ISSUES = ["Incorrect information on your report", "Attempts to collect debt not owed",
+          "Trouble during payment process", "Problem with a purchase shown on your statement"]
+COMPANIES = ["EQUIFAX, INC.", "Experian Information Solutions Inc.", "TRANSUNION INTERMEDIATE HOLDINGS, INC.",
+             "BANK OF AMERICA, NATIONAL ASSOCIATION", "WELLS FARGO & COMPANY"]
+STATES = ["CA", "TX", "FL", "NY", "GA", "IL", "PA", "OH"]
+SUBMITTED_VIA = ["Web", "Phone", "Referral", "Postal mail"]
+COMPANY_RESPONSES = ["Closed with explanation", "Closed with non-monetary relief", "In progress"]
+WORDS = ["account", "credit", "report", "payment", "bank", "charged", "late", "fee", "dispute", "called",
+         "letter", "loan", "balance", "interest", "fraud", "identity", "information", "removed", "told", "never"]
+
+
+def generate_complaints(day: datetime, n_records: int):
+    """
+    Deterministic synthetic complaints received on day
+    """
+    rng = random.Random(day.toordinal())
+    day_id = (day - datetime(2011, 1, 1)).days
+    for index in range(n_records):
+        has_narrative = rng.random() < 0.4
+        yield {
+            "_index": "complaint-public-v2",
+            "_source": {
+                "product": rng.choice(PRODUCTS),
+                "complaint_what_happened": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120)))
+                if has_narrative else "",
+                "date_sent_to_company": (day + timedelta(days=rng.randint(0, 3))).strftime("%Y-%m-%dT12:00:00-05:00"),
+                "issue": rng.choice(ISSUES),
+                "sub_product": None,
+                "zip_code": f"{rng.randint(10000, 99999)}",
+                "tags": None,
+                "complaint_id": str(day_id * 100000 + index),
+                "timely": rng.choice(["Yes", "Yes", "Yes", "No"]),
+                "consumer_consent_provided": rng.choice(["Consent provided", "Consent not provided", "N/A"]),
+                "company_response": rng.choice(COMPANY_RESPONSES),
+                "submitted_via": rng.choice(SUBMITTED_VIA),
+                "company": rng.choice(COMPANIES),
+                "date_received": day.strftime("%Y-%m-%dT12:00:00-05:00"),
+                "state": rng.choice(STATES),
+                "consumer_disputed": rng.choice(["N/A", "No", "Yes"]),
+                "company_public_response": None,
+                "sub_issue": None,
+                "has_narrative": has_narrative,
+            }
+        }
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients dropping a keep-alive connection or giving up on a slow response are expected
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class CFPBStubServer:
+    """
+    records_per_day: complaints served for every day in the requested window
+    latency_seconds: delay before the response starts
+    failure_rate: share of the requests answered with a 500 error payload
+    page_limit: maximum number of records in one response, like the real api
+    """
+
+    def __init__(self, records_per_day: int = 1000, latency_seconds: float = 0.0, failure_rate: float = 0.0,
+                 page_limit: int = 10000, host: str = "127.0.0.1", port: int = 0, seed: int = 0):
+        self.records_per_day = records_per_day
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.page_limit = page_limit
+        self.random = random.Random(seed)
+        self.n_requests = 0
+        self.n_failures = 0
+        self._lock = threading.Lock()
+        self.httpd = StubHTTPServer((host, port), self.get_handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def datasource_url(self) -> str:
+        """
+        Same template as DATA_INGESTION_DATA_SOURCE_URL, pointing at this server
+        """
+        return f"{self.base_url}/data-research/consumer-complaints/search/api/v1/" \
+               f"?date_received_max=<todate>&date_received_min=<fromdate>&field=all&format=json"
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            self.n_requests += 1
+            fail = self.random.random() < self.failure_rate
+            self.n_failures += fail
+            return fail
+
+    def get_handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                time.sleep(server.latency_seconds)
+                if server.should_fail():
+                    body = json.dumps({"error": "synthetic failure"}).encode()
+                    self.send_response(500)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                from_date = datetime.strptime(query["date_received_min"][0], DATE_FORMAT)
+                to_date = datetime.strptime(query["date_received_max"][0], DATE_FORMAT)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.write_chunk(b"[")
+                n_records = 0
+                day = from_date
+                buffer = list()
+                while day < to_date and n_records < server.page_limit:
+                    n_day_records = min(server.records_per_day, server.page_limit - n_records)
+                    for record in generate_complaints(day, n_day_records):
+                        buffer.append(("," if n_records else "") + json.dumps(record))
+                        n_records += 1
+                        if len(buffer) == 500:
+                            self.write_chunk("".join(buffer).encode())
+                            buffer = list()
+                    day += timedelta(days=1)
+                self.write_chunk(("".join(buffer) + "]").encode())
+                self.write_chunk(b"")
+
+            def write_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="cfpb-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the CFPB complaint api")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--records-per-day", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--page-limit", type=int, default=10000)
+    args = parser.parse_args()
+    server = CFPBStubServer(records_per_day=args.records_per_day, latency_seconds=args.latency_ms / 1000,
+                            failure_rate=args.failure_rate, page_limit=args.page_limit, port=args.port)
+    print(f"Serving on {server.datasource_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
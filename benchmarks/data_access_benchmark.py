@@ -0,0 +1,167 @@
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime, timedelta
+from benchmarks.cfpb_stub_server import generate_complaints
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact
+"""
+Throughput of the bulk MongoDB export/import and the S3 upload/download of a synthetic feature store.
+Runs against mongomock and moto unless a mongo url or an s3 endpoint (minio) is given.
+
+python -m benchmarks.data_access_benchmark --days 30 --records-per-day 2000 --mongo-workers 1 4
+python -m benchmarks.data_access_benchmark --mongo-url mongodb://localhost:27017 --s3-endpoint-url http://localhost:9000
+"""
+
+
+def write_feature_store(feature_store_file_path: str, from_date: str, days: int, records_per_day: int):
+    """
+    Feature store layout of the ingestion (parquet partitioned by year/month) written with pyarrow
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    start_date = datetime.strptime(from_date, "%Y-%m-%d")
+    batches = []
+    for day_index in range(days):
+        day = start_date + timedelta(days=day_index)
+        records = [dict(complaint["_source"], year=day.year, month=day.month)
+                   for complaint in generate_complaints(day, records_per_day)]
+        batches.append(pa.RecordBatch.from_pylist(records))
+    table = pa.Table.from_batches(batches)
+    ds.write_dataset(table, feature_store_file_path, format="parquet",
+                     partitioning=ds.partitioning(table.select(["year", "month"]).schema, flavor="hive"),
+                     existing_data_behavior="delete_matching")
+    return table.num_rows
+
+
+@contextlib.contextmanager
+def s3_stand_in(endpoint_url: str):
+    """
+    moto's in process s3 unless endpoint_url points to a real server
+    """
+    if endpoint_url is not None:
+        yield
+        return
+    try:
+        from moto import mock_aws
+    except ImportError:
+        from moto import mock_s3 as mock_aws
+    for name, value in [("AWS_ACCESS_KEY_ID", "benchmark"), ("AWS_SECRET_ACCESS_KEY", "benchmark"),
+                        ("AWS_DEFAULT_REGION", "us-east-1")]:
+        os.environ.setdefault(name, value)
+    with mock_aws():
+        yield
+
+
+def get_mongo_client(mongo_url: str):
+    if mongo_url is None:
+        import mongomock
+        return mongomock.MongoClient()
+    from finance_complaint.data_access.mongo_feature_store import get_mongo_client
+    return get_mongo_client(mongo_url)
+
+
+def to_result(name: str, report, **params) -> dict:
+    return {"benchmark": name, **params, "n_records": report.n_records, "n_bytes": report.n_bytes,
+            "n_skipped": report.n_skipped, "seconds": report.seconds,
+            "records_per_second": report.records_per_second, "mb_per_second": report.mb_per_second}
+
+
+def export_without_fingerprints(mongo_feature_store, data_ingestion_artifact: DataIngestionArtifact):
+    mongo_feature_store.partitions_collection.drop()
+    return mongo_feature_store.export_feature_store(data_ingestion_artifact)
+
+
+def run_mongo_benchmark(data_ingestion_artifact: DataIngestionArtifact, work_dir: str, mongo_url: str,
+                        batch_size: int, n_workers: int) -> list:
+    from finance_complaint.data_access.mongo_feature_store import MongoFeatureStore
+    client = get_mongo_client(mongo_url)
+    collection_name = f"benchmark_{batch_size}_{n_workers}"
+    for name in [collection_name, f"{collection_name}_partitions"]:
+        client["finance_benchmark"].drop_collection(name)
+    mongo_feature_store = MongoFeatureStore(client=client, database_name="finance_benchmark",
+                                            collection_name=collection_name, batch_size=batch_size,
+                                            n_workers=n_workers)
+    try:
+        params = {"batch_size": batch_size, "n_workers": n_workers}
+        return [
+            to_result("mongo_export", mongo_feature_store.export_feature_store(data_ingestion_artifact), **params),
+            # no partition changed, measures the fingerprint check which skips them
+            to_result("mongo_export_again", mongo_feature_store.export_feature_store(data_ingestion_artifact),
+                      **params),
+            # without the fingerprints every complaint is upserted again onto an equal document
+            to_result("mongo_export_upsert", export_without_fingerprints(mongo_feature_store, data_ingestion_artifact),
+                      **params),
+            to_result("mongo_import", mongo_feature_store.import_feature_store(
+                os.path.join(work_dir, f"imported_{collection_name}")), **params),
+        ]
+    finally:
+        for name in [collection_name, f"{collection_name}_partitions"]:
+            client["finance_benchmark"].drop_collection(name)
+
+
+def run_s3_benchmark(data_ingestion_artifact: DataIngestionArtifact, work_dir: str, endpoint_url: str,
+                     n_workers: int, multipart_chunksize_mb: int) -> list:
+    from finance_complaint.data_access.s3_artifact_sync import S3ArtifactSync, get_s3_client
+    bucket_name = "finance-benchmark"
+    with s3_stand_in(endpoint_url):
+        client = get_s3_client(endpoint_url)
+        with contextlib.suppress(client.exceptions.BucketAlreadyOwnedByYou):
+            client.create_bucket(Bucket=bucket_name)
+        s3_artifact_sync = S3ArtifactSync(bucket_name=bucket_name, prefix=f"benchmark_{n_workers}",
+                                          client=client, n_workers=n_workers,
+                                          multipart_threshold_mb=multipart_chunksize_mb,
+                                          multipart_chunksize_mb=multipart_chunksize_mb)
+        params = {"n_workers": n_workers, "multipart_chunksize_mb": multipart_chunksize_mb}
+        feature_store_file_path = data_ingestion_artifact.feature_store_file_path
+        return [
+            to_result("s3_upload", s3_artifact_sync.upload(feature_store_file_path, "feature_store"), **params),
+            # nothing changed, measures the listing and skip path
+            to_result("s3_upload_again", s3_artifact_sync.upload(feature_store_file_path, "feature_store"),
+                      **params),
+            to_result("s3_download", s3_artifact_sync.download(
+                "feature_store", os.path.join(work_dir, f"downloaded_{n_workers}")), **params),
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bulk MongoDB and S3 transfers of the feature store")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--records-per-day", type=int, default=2000)
+    parser.add_argument("--from-date", default="2022-05-01")
+    parser.add_argument("--mongo-url", help="benchmark a real mongod instead of mongomock")
+    parser.add_argument("--mongo-batch-size", type=int, default=5000)
+    parser.add_argument("--mongo-workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--s3-endpoint-url", help="benchmark a minio style server instead of moto")
+    parser.add_argument("--s3-workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--s3-multipart-chunksize-mb", type=int, default=8)
+    parser.add_argument("--output", help="append the results as json lines to this file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="finance_data_access_")
+    try:
+        feature_store_file_path = os.path.join(work_dir, "feature_store")
+        n_records = write_feature_store(feature_store_file_path, args.from_date, args.days, args.records_per_day)
+        print(f"Feature store with {n_records} records in {feature_store_file_path}")
+        data_ingestion_artifact = DataIngestionArtifact(feature_store_file_path=feature_store_file_path,
+                                                        metadata_file_path=None, download_dir=None)
+        results = []
+        for n_workers in args.mongo_workers:
+            results += run_mongo_benchmark(data_ingestion_artifact, work_dir, args.mongo_url,
+                                           args.mongo_batch_size, n_workers)
+        for n_workers in args.s3_workers:
+            results += run_s3_benchmark(data_ingestion_artifact, work_dir, args.s3_endpoint_url, n_workers,
+                                        args.s3_multipart_chunksize_mb)
+        for result in results:
+            print(json.dumps(result))
+            if args.output:
+                with open(args.output, "a") as file_obj:
+                    file_obj.write(json.dumps(result) + "\n")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from benchmarks.cfpb_stub_server import CFPBStubServer
+from finance_complaint.config.pipeline.training import FinanceConfig
+from finance_complaint.component.training.data_ingestion import DataIngestion
+from finance_complaint.config.spark_manager import get_spark_session
+from finance_complaint.utils import get_dir_size
+from finance_complaint.metrics import get_peak_rss_bytes
+"""
+End to end benchmark of DataIngestion.initiate_data_ingestion against the local api stand-in.
+Reports records/s, bytes/s, peak RSS of the python driver and spark job count/time for every ingestion stage.
+
+python -m benchmarks.ingestion_benchmark --days 60 --records-per-day 2000 --workers 4
+"""
+
+STAGES = ["download_files", "convert_files_to_parquet", "update_meta_data"]
+
+
+def get_driver_peak_rss_mb() -> float:
+    # peak RSS of this python process, the spark jvm is a separate process and not included
+    return get_peak_rss_bytes() / (1024 * 1024)
+
+
+def instrument_stages(data_ingestion: DataIngestion, stage_metrics: dict):
+    """
+    Wraps the stage methods of data_ingestion so every call is timed and tagged
+    with a spark job group, initiate_data_ingestion itself is left untouched
+    """
+    spark_context = get_spark_session().sparkContext
+    status_tracker = spark_context.statusTracker()
+
+    def timed(stage_name, method):
+        def wrapper(*args, **kwargs):
+            spark_context.setJobGroup(stage_name, stage_name)
+            start_time = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stage_metrics[stage_name] = {
+                    "seconds": time.perf_counter() - start_time,
+                    "spark_jobs": len(status_tracker.getJobIdsForGroup(stage_name)),
+                    "driver_peak_rss_mb": get_driver_peak_rss_mb(),
+                }
+        return wrapper
+
+    for stage_name in STAGES:
+        setattr(data_ingestion, stage_name, timed(stage_name, getattr(data_ingestion, stage_name)))
+
+
+def run_benchmark(days: int, records_per_day: int, latency_ms: float, failure_rate: float,
+                  workers: int, from_date: str, keep_artifacts: bool = False) -> dict:
+    artifact_dir = tempfile.mkdtemp(prefix="finance_benchmark_")
+    to_date = (datetime.strptime(from_date, "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
+    try:
+        with CFPBStubServer(records_per_day=records_per_day, latency_seconds=latency_ms / 1000,
+                            failure_rate=failure_rate) as server:
+            finance_config = FinanceConfig()
+            # the artifacts and the metrics of the run go to the temp dir
+            finance_config.pipeline_config = finance_config.get_pipeline_config(artifact_dir=artifact_dir)
+            data_ingestion_config = finance_config.get_data_ingestion_config(from_date=from_date, to_date=to_date)
+            data_ingestion_config = data_ingestion_config._replace(datasource_url=server.datasource_url,
+                                                                   n_workers=workers,
+                                                                   max_requests_per_second=0)
+            data_ingestion = DataIngestion(data_ingestion_config=data_ingestion_config, n_retry=5)
+
+            stage_metrics = dict()
+            instrument_stages(data_ingestion, stage_metrics)
+            start_time = time.perf_counter()
+            data_ingestion.initiate_data_ingestion()
+            total_seconds = time.perf_counter() - start_time
+
+            n_records = sum(data_ingestion.daily_record_counts.values())
+            downloaded_bytes = get_dir_size(data_ingestion_config.download_dir)
+            download_seconds = stage_metrics.get("download_files", {}).get("seconds", 0)
+            convert_seconds = stage_metrics.get("convert_files_to_parquet", {}).get("seconds", 0)
+            return {
+                "days": days,
+                "records_per_day": records_per_day,
+                "latency_ms": latency_ms,
+                "failure_rate": failure_rate,
+                "workers": workers,
+                "n_requests": server.n_requests,
+                "n_injected_failures": server.n_failures,
+                "n_records": n_records,
+                "downloaded_bytes": downloaded_bytes,
+                "feature_store_bytes": get_dir_size(data_ingestion_config.feature_store_dir),
+                "total_seconds": total_seconds,
+                "records_per_second": n_records / total_seconds if total_seconds else 0,
+                "download_records_per_second": n_records / download_seconds if download_seconds else 0,
+                "download_bytes_per_second": downloaded_bytes / download_seconds if download_seconds else 0,
+                "convert_bytes_per_second": downloaded_bytes / convert_seconds if convert_seconds else 0,
+                "driver_peak_rss_mb": get_driver_peak_rss_mb(),
+                "stages": stage_metrics,
+            }
+    finally:
+        if not keep_artifacts:
+            shutil.rmtree(artifact_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data ingestion against the local api stand-in")
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--records-per-day", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--from-date", default="2022-05-01")
+    parser.add_argument("--keep-artifacts", action="store_true")
+    parser.add_argument("--output", help="append the results as json lines to this file")
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        result = run_benchmark(days=args.days, records_per_day=args.records_per_day, latency_ms=args.latency_ms,
+                               failure_rate=args.failure_rate, workers=workers, from_date=args.from_date,
+                               keep_artifacts=args.keep_artifacts)
+        print(json.dumps(result, indent=2))
+        if args.output:
+            with open(args.output, "a") as file_obj:
+                file_obj.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
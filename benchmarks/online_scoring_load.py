@@ -0,0 +1,101 @@
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from benchmarks.cfpb_stub_server import generate_complaints
+"""
+Closed loop load generator for the online prediction server.
+Every client keeps one connection open and sends its next request as soon as the previous answer arrives.
+
+python -m finance_complaint.pipeline.online_prediction &
+python -m benchmarks.online_scoring_load --concurrency 1 16 64 --requests 5000
+"""
+
+
+def get_sample_records(n_records: int) -> list:
+    records = list()
+    day = datetime(2022, 5, 1)
+    while len(records) < n_records:
+        records.extend(record["_source"] for record in generate_complaints(day, 500))
+        day += timedelta(days=1)
+    return records[:n_records]
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple:
+    status_line = await reader.readline()
+    headers = dict()
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, value = line.decode("latin-1").split(":", 1)
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return int(status_line.split()[1]), body
+
+
+async def run_client(host: str, port: int, bodies: list, latencies: list, errors: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            request = (f"POST /predict HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+            start_time = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - start_time)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def run_load(host: str, port: int, concurrency: int, n_requests: int, records: list) -> dict:
+    bodies = [json.dumps(records[index % len(records)]).encode() for index in range(n_requests)]
+    latencies, errors = list(), list()
+    start_time = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, bodies[client::concurrency], latencies, errors)
+                           for client in range(concurrency)))
+    total_seconds = time.perf_counter() - start_time
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "errors": len(errors),
+        "seconds": total_seconds,
+        "requests_per_second": n_requests / total_seconds,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the online prediction server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--output", help="append the results as json lines to this file")
+    args = parser.parse_args()
+
+    records = get_sample_records(2000)
+    for concurrency in args.concurrency:
+        result = asyncio.run(run_load(args.host, args.port, concurrency, args.requests, records))
+        print(json.dumps(result, indent=2))
+        if args.output:
+            with open(args.output, "a") as file_obj:
+                file_obj.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
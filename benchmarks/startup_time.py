@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+"""
+Cold start of main.py and every pipeline entry point, measured with python -X importtime in a fresh
+interpreter per module. An entry point fails the check when its imports take longer than its budget
+or when it imports one of the heavy packages which have to stay lazy (pandas, pyspark, boto3, pymongo).
+Exits with 1 when any check fails, so it can guard the budget in CI.
+
+python -m benchmarks.startup_time
+python -m benchmarks.startup_time --repeat 5 --budget-ms finance_complaint.pipeline.online_prediction=600
+"""
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> cold start budget in milliseconds
+ENTRY_POINTS = {
+    "main": 250,
+    "finance_complaint.pipeline.training": 250,
+    "finance_complaint.pipeline.prediction": 250,
+    "finance_complaint.pipeline.data_export": 250,
+    # loads numpy for the scorer
+    "finance_complaint.pipeline.online_prediction": 500,
+    # loads requests for the downloads
+    "finance_complaint.component.training.data_ingestion": 500,
+}
+
+LAZY_PACKAGES = ["pandas", "pyspark", "py4j", "boto3", "botocore", "pymongo", "pyarrow"]
+
+
+def measure_import(module: str) -> dict:
+    """
+    Total import time of module and the packages it pulled in, from a fresh interpreter
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=REPO_DIR,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # nested imports are indented by two more spaces per level
+        imports.append({"name": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                        "top_level": not name[1:].startswith(" ")})
+    total_us = sum(entry["cumulative_us"] for entry in imports if entry["top_level"])
+    names = {entry["name"] for entry in imports}
+    return {
+        "module": module,
+        "total_ms": total_us / 1000,
+        "n_modules": len(imports),
+        "lazy_packages_imported": [package for package in LAZY_PACKAGES if package in names],
+        "slowest": [(entry["name"], entry["self_us"] / 1000)
+                    for entry in sorted(imports, key=lambda entry: -entry["self_us"])[:5]],
+    }
+
+
+def check_entry_point(module: str, budget_ms: float, repeat: int) -> dict:
+    # the best of repeat runs, the first one also pays for cold .pyc and disk caches
+    results = [measure_import(module) for _ in range(repeat)]
+    result = min(results, key=lambda result: result["total_ms"])
+    result["budget_ms"] = budget_ms
+    result["passed"] = result["total_ms"] <= budget_ms and not result["lazy_packages_imported"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time budget of the entry points")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", nargs="*", default=[], metavar="MODULE=MS",
+                        help="override the budget of an entry point")
+    parser.add_argument("--modules", nargs="*", help="only check these entry points")
+    parser.add_argument("--output", help="append the results as json lines to this file")
+    args = parser.parse_args()
+
+    budgets = dict(ENTRY_POINTS)
+    for override in args.budget_ms:
+        module, budget_ms = override.split("=")
+        budgets[module] = float(budget_ms)
+
+    failed = []
+    for module in args.modules or budgets:
+        try:
+            result = check_entry_point(module, budgets[module], args.repeat)
+        except RuntimeError as e:
+            print(f"FAILED {module:55} {str(e).strip().splitlines()[-1]}")
+            failed.append(module)
+            continue
+        status = "ok" if result["passed"] else "FAILED"
+        print(f"{status:6} {module:55} {result['total_ms']:8.1f} ms (budget {result['budget_ms']:.0f} ms, "
+              f"{result['n_modules']} modules)")
+        if result["lazy_packages_imported"]:
+            print(f"       imports {result['lazy_packages_imported']} at startup")
+        if not result["passed"]:
+            print(f"       slowest imports: {result['slowest']}")
+            failed.append(module)
+        if args.output:
+            with open(args.output, "a") as file_obj:
+                file_obj.write(json.dumps(result) + "\n")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import shutil
+import numpy as np
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.constant.prediction_pipeline_config import MODEL_SAVED_DIR, ONLINE_MODEL_SAVED_DIR, \
+    ONLINE_MODEL_SPEC_FILE_NAME
+from finance_complaint.utils import get_latest_model_path
+"""
+Exports a fitted pyspark.ml PipelineModel to a spec file plus numpy arrays, which
+OnlineScorer evaluates without a JVM or SparkSession.
+
+Supported stages: StringIndexerModel, OneHotEncoderModel, Tokenizer, RegexTokenizer,
+StopWordsRemover, HashingTF, IDFModel, VectorAssembler and a binary LogisticRegressionModel.
+Nested PipelineModels are flattened.
+"""
+
+
+class ModelExporter:
+
+    def __init__(self, model_path: str, export_dir: str):
+        self.model_path = model_path
+        self.export_dir = export_dir
+        self.arrays = dict()
+
+    def add_array(self, name: str, values) -> str:
+        file_name = f"{name}.npy"
+        self.arrays[file_name] = np.asarray(values, dtype=np.float64)
+        return file_name
+
+    @staticmethod
+    def get_columns(stage, single_param: str, multi_param: str) -> list:
+        if stage.isSet(stage.getParam(multi_param)):
+            return list(stage.getOrDefault(multi_param))
+        return [stage.getOrDefault(single_param)]
+
+    def flatten_stages(self, model) -> list:
+        from pyspark.ml import PipelineModel
+
+        stages = list()
+        for stage in model.stages:
+            if isinstance(stage, PipelineModel):
+                stages.extend(self.flatten_stages(stage))
+            else:
+                stages.append(stage)
+        return stages
+
+    def export_stage(self, index: int, stage) -> dict:
+        stage_type = type(stage).__name__
+        name = f"stage_{index}_{stage_type}"
+        if stage_type == "StringIndexerModel":
+            labels_array = stage.labelsArray if hasattr(stage, "labelsArray") else [stage.labels]
+            return {"type": stage_type,
+                    "input_cols": self.get_columns(stage, "inputCol", "inputCols"),
+                    "output_cols": self.get_columns(stage, "outputCol", "outputCols"),
+                    "labels": [list(labels) for labels in labels_array],
+                    "handle_invalid": stage.getHandleInvalid()}
+        if stage_type == "OneHotEncoderModel":
+            return {"type": stage_type,
+                    "input_cols": self.get_columns(stage, "inputCol", "inputCols"),
+                    "output_cols": self.get_columns(stage, "outputCol", "outputCols"),
+                    "category_sizes": list(stage.categorySizes),
+                    "drop_last": stage.getDropLast(),
+                    "handle_invalid": stage.getHandleInvalid()}
+        if stage_type == "Tokenizer":
+            return {"type": stage_type, "input_col": stage.getInputCol(), "output_col": stage.getOutputCol()}
+        if stage_type == "RegexTokenizer":
+            return {"type": stage_type, "input_col": stage.getInputCol(), "output_col": stage.getOutputCol(),
+                    "pattern": stage.getPattern(), "gaps": stage.getGaps(),
+                    "min_token_length": stage.getMinTokenLength(), "to_lowercase": stage.getToLowercase()}
+        if stage_type == "StopWordsRemover":
+            return {"type": stage_type, "input_col": stage.getInputCol(), "output_col": stage.getOutputCol(),
+                    "stop_words": list(stage.getStopWords()), "case_sensitive": stage.getCaseSensitive()}
+        if stage_type == "HashingTF":
+            return {"type": stage_type, "input_col": stage.getInputCol(), "output_col": stage.getOutputCol(),
+                    "num_features": stage.getNumFeatures(), "binary": stage.getBinary()}
+        if stage_type == "IDFModel":
+            return {"type": stage_type, "input_col": stage.getInputCol(), "output_col": stage.getOutputCol(),
+                    "idf": self.add_array(f"{name}_idf", stage.idf.toArray())}
+        if stage_type == "VectorAssembler":
+            return {"type": stage_type, "input_cols": list(stage.getInputCols()), "output_col": stage.getOutputCol()}
+        if stage_type == "LogisticRegressionModel":
+            if stage.numClasses != 2:
+                raise Exception(f"Only binary logistic regression can be exported, got {stage.numClasses} classes")
+            return {"type": stage_type, "features_col": stage.getFeaturesCol(),
+                    "coefficients": self.add_array(f"{name}_coefficients", stage.coefficients.toArray()),
+                    "intercept": float(stage.intercept), "threshold": float(stage.getThreshold())}
+        raise Exception(f"Stage {stage_type} is not supported by the online scorer")
+
+    def export(self) -> str:
+        """
+        Writes <export_dir>/model.json and the stage arrays, returns export_dir
+        """
+        try:
+            from pyspark.ml import PipelineModel
+
+            logger.info(f"Exporting {self.model_path} for online scoring to {self.export_dir}")
+            model = PipelineModel.load(self.model_path)
+            stages = [self.export_stage(index, stage) for index, stage in enumerate(self.flatten_stages(model))]
+            if not stages or stages[-1]["type"] != "LogisticRegressionModel":
+                raise Exception("The last stage of the model must be the classifier")
+
+            # written to a temp dir and renamed, so a half written export is never loaded
+            temp_export_dir = f"{self.export_dir}.tmp"
+            shutil.rmtree(temp_export_dir, ignore_errors=True)
+            os.makedirs(temp_export_dir)
+            for file_name, values in self.arrays.items():
+                np.save(os.path.join(temp_export_dir, file_name), values)
+            with open(os.path.join(temp_export_dir, ONLINE_MODEL_SPEC_FILE_NAME), "w") as file_obj:
+                json.dump({"model_path": self.model_path, "stages": stages}, file_obj, indent=2)
+            shutil.rmtree(self.export_dir, ignore_errors=True)
+            os.rename(temp_export_dir, self.export_dir)
+            return self.export_dir
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+def export_latest_model(model_dir: str = MODEL_SAVED_DIR, online_model_dir: str = ONLINE_MODEL_SAVED_DIR) -> str:
+    """
+    Exports the newest pushed model unless its online version already exists, returns the export dir
+    """
+    try:
+        model_path = get_latest_model_path(model_dir)
+        if model_path is None:
+            raise Exception(f"No model found in {model_dir}")
+        export_dir = os.path.join(online_model_dir, os.path.basename(model_path))
+        if os.path.exists(os.path.join(export_dir, ONLINE_MODEL_SPEC_FILE_NAME)):
+            return export_dir
+        return ModelExporter(model_path=model_path, export_dir=export_dir).export()
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+if __name__ == "__main__":
+    print(export_latest_model())
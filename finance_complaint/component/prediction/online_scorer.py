@@ -0,0 +1,198 @@
+import os
+import re
+import sys
+import json
+from functools import lru_cache
+from typing import List
+import numpy as np
+from finance_complaint.exception import FinanceException
+from finance_complaint.constant.prediction_pipeline_config import ONLINE_MODEL_SPEC_FILE_NAME, \
+    PREDICTION_COLUMN_NAME, PREDICTION_PROBABILITY_COLUMN_NAME
+"""
+Pure python/numpy evaluation of a model exported by ModelExporter.
+Rows go through the feature stages one by one (tokenizing is per row anyway), the
+classifier scores the whole batch at once. Sparse vectors are (size, indices, values).
+Missing string inputs are treated as "" like the training data.
+"""
+
+HASHING_TF_SEED = 42
+
+
+def murmur3_32(data: bytes, seed: int = HASHING_TF_SEED) -> int:
+    """
+    MurmurHash3 x86 32 bit as signed int, the hash spark's HashingTF applies to the utf-8 bytes of a term
+    """
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    length = len(data)
+    h1 = seed & 0xffffffff
+    n_blocks = length // 4
+    for block in range(n_blocks):
+        k1 = int.from_bytes(data[block * 4:block * 4 + 4], "little")
+        k1 = (k1 * c1) & 0xffffffff
+        k1 = ((k1 << 15) | (k1 >> 17)) & 0xffffffff
+        k1 = (k1 * c2) & 0xffffffff
+        h1 ^= k1
+        h1 = ((h1 << 13) | (h1 >> 19)) & 0xffffffff
+        h1 = (h1 * 5 + 0xe6546b64) & 0xffffffff
+    k1 = 0
+    for shift, byte in enumerate(data[n_blocks * 4:]):
+        k1 ^= byte << (8 * shift)
+    if k1:
+        k1 = (k1 * c1) & 0xffffffff
+        k1 = ((k1 << 15) | (k1 >> 17)) & 0xffffffff
+        k1 = (k1 * c2) & 0xffffffff
+        h1 ^= k1
+    h1 ^= length
+    h1 ^= h1 >> 16
+    h1 = (h1 * 0x85ebca6b) & 0xffffffff
+    h1 ^= h1 >> 13
+    h1 = (h1 * 0xc2b2ae35) & 0xffffffff
+    h1 ^= h1 >> 16
+    return h1 - (1 << 32) if h1 & 0x80000000 else h1
+
+
+def java_split(pattern: re.Pattern, text: str) -> List[str]:
+    # String.split of the jvm: trailing empty strings are dropped, no match returns the text itself
+    parts = pattern.split(text)
+    if len(parts) == 1:
+        return parts
+    while parts and parts[-1] == "":
+        parts.pop()
+    return parts
+
+
+def sparse_vector(size: int, indices, values):
+    return size, np.asarray(indices, dtype=np.int64), np.asarray(values, dtype=np.float64)
+
+
+class OnlineScorer:
+
+    def __init__(self, export_dir: str):
+        try:
+            self.export_dir = export_dir
+            with open(os.path.join(export_dir, ONLINE_MODEL_SPEC_FILE_NAME)) as file_obj:
+                spec = json.load(file_obj)
+            self.model_path = spec["model_path"]
+            stages = [self.load_stage(stage) for stage in spec["stages"]]
+            self.feature_stages, self.classifier = stages[:-1], stages[-1]
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def load_stage(self, stage: dict) -> dict:
+        stage = dict(stage)
+        for key in ("idf", "coefficients"):
+            if key in stage:
+                stage[key] = np.load(os.path.join(self.export_dir, stage[key]))
+        stage_type = stage["type"]
+        if stage_type == "StringIndexerModel":
+            stage["label_indices"] = [{label: index for index, label in enumerate(labels)}
+                                      for labels in stage["labels"]]
+        elif stage_type == "Tokenizer":
+            # \s, \w, \d of java regexes only match ascii characters, python's match any unicode ones
+            stage["regex"] = re.compile(r"\s", re.ASCII)
+        elif stage_type == "RegexTokenizer":
+            stage["regex"] = re.compile(stage["pattern"], re.ASCII)
+        elif stage_type == "StopWordsRemover":
+            stop_words = stage["stop_words"]
+            stage["stop_word_set"] = set(stop_words if stage["case_sensitive"] else map(str.lower, stop_words))
+        elif stage_type == "HashingTF":
+            num_features = stage["num_features"]
+            # complaint vocabularies repeat a lot, so hashing every distinct term once pays off
+            stage["term_index"] = lru_cache(maxsize=1 << 16)(
+                lambda term: murmur3_32(term.encode("utf-8")) % num_features)
+        return stage
+
+    def apply_stage(self, stage: dict, row: dict):
+        stage_type = stage["type"]
+        if stage_type == "StringIndexerModel":
+            for input_col, output_col, label_indices in zip(stage["input_cols"], stage["output_cols"],
+                                                            stage["label_indices"]):
+                value = row.get(input_col)
+                index = label_indices.get("" if value is None else str(value))
+                if index is None:
+                    if stage["handle_invalid"] != "keep":
+                        raise ValueError(f"Unseen value [{value}] for {input_col}")
+                    index = len(label_indices)
+                row[output_col] = float(index)
+        elif stage_type == "OneHotEncoderModel":
+            keep_invalid = stage["handle_invalid"] == "keep"
+            for input_col, output_col, category_size in zip(stage["input_cols"], stage["output_cols"],
+                                                            stage["category_sizes"]):
+                index = int(row[input_col])
+                size = category_size + keep_invalid - stage["drop_last"]
+                if index >= category_size:
+                    if not keep_invalid:
+                        raise ValueError(f"Unseen category index [{index}] for {input_col}")
+                    index = category_size
+                row[output_col] = sparse_vector(size, [index], [1.0]) if index < size else sparse_vector(size, [], [])
+        elif stage_type == "Tokenizer":
+            row[stage["output_col"]] = java_split(stage["regex"], (row.get(stage["input_col"]) or "").lower())
+        elif stage_type == "RegexTokenizer":
+            text = row.get(stage["input_col"]) or ""
+            if stage["to_lowercase"]:
+                text = text.lower()
+            tokens = java_split(stage["regex"], text) if stage["gaps"] else stage["regex"].findall(text)
+            row[stage["output_col"]] = [token for token in tokens if len(token) >= stage["min_token_length"]]
+        elif stage_type == "StopWordsRemover":
+            stop_word_set = stage["stop_word_set"]
+            if stage["case_sensitive"]:
+                row[stage["output_col"]] = [token for token in row[stage["input_col"]] if token not in stop_word_set]
+            else:
+                row[stage["output_col"]] = [token for token in row[stage["input_col"]]
+                                            if token.lower() not in stop_word_set]
+        elif stage_type == "HashingTF":
+            term_counts = dict()
+            term_index = stage["term_index"]
+            for term in row[stage["input_col"]]:
+                index = term_index(term)
+                term_counts[index] = 1.0 if stage["binary"] else term_counts.get(index, 0.0) + 1.0
+            indices = sorted(term_counts)
+            row[stage["output_col"]] = sparse_vector(stage["num_features"], indices,
+                                                     [term_counts[index] for index in indices])
+        elif stage_type == "IDFModel":
+            size, indices, values = row[stage["input_col"]]
+            row[stage["output_col"]] = (size, indices, values * stage["idf"][indices])
+        elif stage_type == "VectorAssembler":
+            offset, all_indices, all_values = 0, list(), list()
+            for input_col in stage["input_cols"]:
+                value = row[input_col]
+                if isinstance(value, tuple):
+                    size, indices, values = value
+                    all_indices.append(indices + offset)
+                    all_values.append(values)
+                    offset += size
+                else:
+                    all_indices.append(np.array([offset], dtype=np.int64))
+                    all_values.append(np.array([float(value)]))
+                    offset += 1
+            row[stage["output_col"]] = (offset, np.concatenate(all_indices), np.concatenate(all_values))
+        else:
+            raise ValueError(f"Unsupported stage {stage_type}")
+
+    def score_batch(self, records: List[dict]) -> List[dict]:
+        """
+        Scores a batch of complaint records, returns the prediction and dispute probability of each
+        """
+        try:
+            if not records:
+                return list()
+            rows = [dict(record) for record in records]
+            for row in rows:
+                for stage in self.feature_stages:
+                    self.apply_stage(stage, row)
+
+            # one vectorized dot product for the whole batch over the concatenated sparse vectors
+            vectors = [row[self.classifier["features_col"]] for row in rows]
+            lengths = np.array([len(indices) for _, indices, _ in vectors])
+            indices = np.concatenate([indices for _, indices, _ in vectors])
+            values = np.concatenate([values for _, _, values in vectors])
+            row_ids = np.repeat(np.arange(len(rows)), lengths)
+            coefficients = self.classifier["coefficients"]
+            margins = np.bincount(row_ids, weights=coefficients[indices] * values, minlength=len(rows))
+            margins += self.classifier["intercept"]
+            probabilities = 1.0 / (1.0 + np.exp(-margins))
+            predictions = (probabilities > self.classifier["threshold"]).astype(np.float64)
+            return [{PREDICTION_COLUMN_NAME: float(prediction), PREDICTION_PROBABILITY_COLUMN_NAME: float(probability)}
+                    for prediction, probability in zip(predictions, probabilities)]
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -1,18 +1,76 @@
-from finance_complaint.config.pipeline.training import *
-from finance_complaint.logger import logging
+from finance_complaint.config.pipeline.training import FinanceConfig
+from finance_complaint.constant.training_pipeline_config.data_ingestion_config import \
+    DATA_INGESTION_CACHE_CLOSED_AFTER_DAYS, DATA_INGESTION_DEFAULT_RECORDS_PER_DAY, \
+    DATA_INGESTION_DOWNLOAD_CACHE_MAX_SIZE_MB, DATA_INGESTION_DOWNLOAD_CHUNK_SIZE, \
+    DATA_INGESTION_DOWNLOAD_REPORT_FILE_NAME, DATA_INGESTION_JSON_TO_PARQUET_RATIO, \
+    DATA_INGESTION_MAX_RECORDS_PER_REQUEST, DATA_INGESTION_MAX_RETRY_BACKOFF_SECONDS, DATA_INGESTION_MAX_WINDOW_DAYS, \
+    DATA_INGESTION_PARQUET_TARGET_FILE_SIZE_MB, DATA_INGESTION_PARTITION_COLUMNS, \
+    DATA_INGESTION_REQUEST_TIMEOUT_SECONDS, DATA_INGESTION_RETRY_BACKOFF_SECONDS, DATA_INGESTION_SCHEMA_FILE_NAME, \
+    DATA_INGESTION_STAGING_DIR, DATA_INGESTION_TARGET_RECORDS_PER_REQUEST, DATA_INGESTION_LANDING_BATCH_SIZE, \
+    DATA_INGESTION_UNDATED_DIR, DATA_INGESTION_PLANNER_RECENT_DAYS, DATA_INGESTION_ARROW_LANDING_DIR
+from finance_complaint.entity.config_entity import DataIngestionConfig
+from finance_complaint.logger import logger
 from finance_complaint.exception import FinanceException
-from finance_complaint.config.spark_manager import spark_session
+from finance_complaint.metrics import track_stage, increment
+from finance_complaint.config.spark_manager import get_spark_session
 import os,sys
-import pandas as pd
-from finance_complaint.entity.metadata_entity import DataIngestionMetaData
-from finance_complaint.entity.artifact_entity import DataIngestionArtifact
+import json
+import gzip
+import math
+import time
+import uuid
+import random
+import shutil
+import threading
+from datetime import datetime, timedelta
+from dataclasses import asdict
+from typing import Iterator, Tuple
+from collections import namedtuple, Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from finance_complaint.utils import iter_json_array, get_dir_size, link_or_copy
+from finance_complaint.utils.interval_planner import IntervalPlanner
+from finance_complaint.utils.date_window import iter_date_windows, get_granularity
+from finance_complaint.data_access.download_cache import DownloadCache, DownloadCacheEntry
+from finance_complaint.data_access.landing_file import LandingFileWriter, LANDING_FILE_EXTENSIONS, \
+    get_landing_columns, count_landing_rows
+from finance_complaint.entity.schema import FinanceDataSchema
+from finance_complaint.entity.metadata_entity import DataIngestionMetaData, DataIngestionCheckpoint, WindowCheckpointInfo
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact, DownloadReport, FailedDownload, \
+    DownloadedWindow
 #init ->config , n_retries
 #get the required interval - from and to date
 #download data
 #data to parquet file
 #retry download
 #update metadata
-DownloadUrl = namedtuple("DownloadUrl", ["url", "file_path", "n_retry"])
+DownloadUrl = namedtuple("DownloadUrl", ["url", "file_path", "n_retry", "from_date", "to_date"])
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests to the same host so that all the download workers together
+    stay under max_requests_per_second. A value <= 0 disables the limit.
+    """
+    def __init__(self, max_requests_per_second: float):
+        self.min_interval = 1.0 / max_requests_per_second if max_requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = dict()
+
+    def wait(self, url: str):
+        if not self.min_interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
 
 class DataIngestion:
     def __init__(self,data_ingestion_config:DataIngestionConfig,n_retry: int = 5):
@@ -20,129 +78,494 @@ class DataIngestion:
         logger.info(f"{'>>' * 20}Starting data ingestion.{'<<' * 20}")
         self.data_ingestion_config = data_ingestion_config
         self.n_retry = n_retry
+        self.rate_limiter = HostRateLimiter(data_ingestion_config.max_requests_per_second)
+        self.session = self.get_http_session()
+        # records received per day in this run, filled in by the download workers
+        self.daily_record_counts = Counter()
+        self._daily_record_counts_lock = threading.Lock()
+        self.checkpoint = DataIngestionCheckpoint(checkpoint_file_path=data_ingestion_config.checkpoint_file_path)
+        self.landing_columns = get_landing_columns(data_ingestion_config.projected_columns)
+        # a window landed in another format, or with fewer columns than asked for, must not be reused
+        self.cache_namespace = f"{data_ingestion_config.datasource_url}|format={data_ingestion_config.landing_format}"
+        if data_ingestion_config.projected_columns:
+            self.cache_namespace = f"{self.cache_namespace}|columns={','.join(self.landing_columns)}"
+        self.download_cache = None
+        if data_ingestion_config.download_cache_dir:
+            self.download_cache = DownloadCache(cache_dir=data_ingestion_config.download_cache_dir,
+                                                max_size_bytes=DATA_INGESTION_DOWNLOAD_CACHE_MAX_SIZE_MB * 1024 * 1024)
+
+    def get_http_session(self) -> requests.Session:
+        """
+        One pooled session shared by all the download workers, so connections
+        to the API host are kept alive between windows
+        """
+        try:
+            pool_size = max(self.data_ingestion_config.n_workers, 1)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({'User-agent': f'your bot {uuid.uuid4()}'})
+            return session
+        except Exception as e:
+            raise FinanceException(e, sys)
 
 
     """
-    To get the reqired interval based on whether is days,weeks or years
+    To get the required intervals based on whether the range spans days, weeks, months or years
     """
-    def get_required_interval(self) -> []:
+    def get_required_interval(self) -> Iterator[Tuple[str, str]]:
         try:
-            start_date = datetime.strptime(self.data_ingestion_config.from_date, "%Y-%m-%d")
-            end_date = datetime.strptime(self.data_ingestion_config.to_date, "%Y-%m-%d")
-
-            n_diff_days = (end_date - start_date).days
-
-            freq = None #This freq will used as a parameter for pd.data_range method
-            if n_diff_days > 365:
-                freq = 'Y'
-            elif n_diff_days > 30:
-                freq = 'M'
-            else:
-                freq = 'W'   
-
-            intervals_list = list()
-            intervals_list = pd.date_range(
-                start_date=start_date,end_date=end_date,freq=freq).astype('str').tolist()
-
-            logger.debug(f"Prepared Interval: {intervals_list}") 
-
-            if end_date not in intervals_list:
-                intervals_list.append(end_date)
-
-            return intervals_list         
-
+            from_date = self.data_ingestion_config.from_date
+            to_date = self.data_ingestion_config.to_date
+            granularity = get_granularity(from_date, to_date)
+            logger.debug(f"Preparing {granularity} intervals between {from_date} and {to_date}")
+            return iter_date_windows(from_date, to_date, granularity=granularity)
         except Exception as e:
-            raise FinanceException(e, sys)    
+            raise FinanceException(e, sys)
+
+    def get_download_windows(self) -> Iterator[Tuple[str, str]]:
+        """
+        The (from_date, to_date) windows to download, generated lazily.
+        Adaptive windows are sized from the record counts of the previous runs,
+        otherwise the fixed intervals of get_required_interval are used.
+        """
+        try:
+            if not self.data_ingestion_config.adaptive_intervals:
+                #get_required_interval -> gets the required intervals
+                return self.get_required_interval()
+
+            daily_record_counts = None
+            metadata = DataIngestionMetaData(metadata_file_path=self.data_ingestion_config.metadata_file_path)
+            if metadata.is_metadata_file_path_exists():
+                daily_record_counts = metadata.read_metadata_info().daily_record_counts
+
+            planner = IntervalPlanner(daily_record_counts=daily_record_counts,
+                                      target_records_per_request=DATA_INGESTION_TARGET_RECORDS_PER_REQUEST,
+                                      max_window_days=DATA_INGESTION_MAX_WINDOW_DAYS,
+                                      default_records_per_day=DATA_INGESTION_DEFAULT_RECORDS_PER_DAY,
+                                      recent_days=DATA_INGESTION_PLANNER_RECENT_DAYS)
+            return planner.iter_windows(self.data_ingestion_config.from_date, self.data_ingestion_config.to_date)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_download_url(self,from_date:str,to_date:str) -> DownloadUrl:
+        logger.debug(f"Generating data download url between {from_date} and {to_date}")
+        datasource_url_download:str = self.data_ingestion_config.datasource_url
+        url = datasource_url_download.replace("<todate>",to_date).replace("<fromdate>",from_date)
+        logger.debug(f"Url: {url}")
+        landing_format = self.data_ingestion_config.landing_format
+        file_extension = LANDING_FILE_EXTENSIONS[landing_format]
+        file_name = f"{self.data_ingestion_config.file_name}_{from_date}_{to_date}.{file_extension}"
+        # parquet and arrow files are compressed by their own codec
+        if landing_format == "json" and self.data_ingestion_config.stream_download \
+                and self.data_ingestion_config.compress_download:
+            file_name = f"{file_name}.gz"
+        file_path = os.path.join(self.data_ingestion_config.download_dir,file_name)
+        return DownloadUrl(url=url, file_path=file_path, n_retry=self.n_retry, from_date=from_date, to_date=to_date)
 
     """
-    Loop through the intervals and download data
+    Loop through the intervals and download data.
+    The windows are downloaded concurrently on a bounded thread pool of n_workers.
+    A window which hits the api page limit or times out is split in two and downloaded again,
+    down to single days. Other failures (connection errors, 5xx) are reported as they are,
+    smaller windows would only multiply the retries during an outage.
     """
-    def download_files(self):
-        try:
-            #before you download the files, we will need the intervals
-            #get_required_interval -> gets the required intervals
-            required_intervals = self.get_required_interval()
-            logger.info("Downloading files...")
-            for index in range(1,len(required_intervals)):
-                from_date,to_date = required_intervals[index-1],required_intervals[index]
-                logger.debug(f"Generating data download url between {from_date} and {to_date}")
-                datasource_url_download:str = self.data_ingestion_config.datasource_url
-                url = datasource_url_download.replace("<todate>",to_date).replace("<fromdate>",from_date)
-                logger.debug(f"Url: {url}")
-                file_name = f"{self.data_ingestion_config.file_name}_{from_date}_{to_date}.json"
-                file_path = os.path.join(self.data_ingestion_config.download_dir,file_name)
-                download_url_obj = DownloadUrl(url=url, file_path=file_path, n_retry=self.n_retry)
-                self.download_data(download_url_obj)
+    @track_stage("download_files")
+    def download_files(self) -> DownloadReport:
+        try:
+            #windows are pulled from the generator as workers free up, split halves of failed windows go first
+            windows = self.get_download_windows()
+            split_download_urls = deque()
+            n_workers = max(self.data_ingestion_config.n_workers, 1)
+            logger.info(f"Downloading files with {n_workers} worker(s)...")
+            downloaded_windows = list()
+            failed_downloads = list()
+            running = dict()
+            with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="download") as executor:
+                while True:
+                    # at most 2 windows per worker are scheduled, so a long backfill is never fully materialized
+                    while len(running) < 2 * n_workers:
+                        if split_download_urls:
+                            download_url = split_download_urls.popleft()
+                        else:
+                            window = next(windows, None)
+                            if window is None:
+                                break
+                            download_url = self.get_download_url(*window)
+                        running[executor.submit(self.download_data, download_url)] = download_url
+                    if not running:
+                        break
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        download_url = running.pop(future)
+                        result = future.result()
+                        if isinstance(result, DownloadedWindow):
+                            downloaded_windows.append(result)
+                            continue
+                        halves = list()
+                        if result.is_window_too_large:
+                            halves = IntervalPlanner.split_window(download_url.from_date, download_url.to_date)
+                        if not halves:
+                            failed_downloads.append(result)
+                            continue
+                        logger.info(f"Splitting window {download_url.from_date} - {download_url.to_date} into {halves}")
+                        split_download_urls.extend(self.get_download_url(from_date,to_date)
+                                                   for from_date,to_date in halves)
+
+            report = DownloadReport(
+                n_windows=len(downloaded_windows) + len(failed_downloads),
+                n_downloaded=len(downloaded_windows),
+                report_file_path=os.path.join(self.data_ingestion_config.failed_dir,
+                                              DATA_INGESTION_DOWNLOAD_REPORT_FILE_NAME),
+                failed_downloads=failed_downloads,
+                downloaded_windows=downloaded_windows)
+            self.write_download_report(report)
+            return report
         except Exception as e:
             raise FinanceException(e, sys)    
 
     """
-    To download data for each indivisual interval
+    To download data for each indivisual interval.
+    Returns the DownloadedWindow on success, or a FailedDownload once all the retries are used up.
+    Windows are not tracked as stages of their own, they run concurrently inside download_files
+    and their records, bytes and time are kept in the DownloadReport instead.
     """
     def download_data(self,download_data_obj:DownloadUrl):
         try:
-            logger.info(f"Starting download operation - {download_data_obj.datasource_url}")
+            start_time = time.perf_counter()
+            logger.info(f"Starting download operation - {download_data_obj.url}")
             download_dir = os.path.dirname(download_data_obj.file_path)
 
             #create the download directory
             os.makedirs(download_dir,exist_ok=True)
 
-            #download data
-            #Note - If download fails the failed response would be in data itself
-            data = requests.get(download_url.url, params={'User-agent': f'your bot {uuid.uuid4()}'})
-
-            try:
-                logger.info("Writing the downloaded files to json file")
-                with open(download_data_obj.file_path,"w") as file_obj:
-                    finance_complaint_data = list(map(lambda x: x["_source"],
-                                                      filter(lambda x: "_source" in x.keys(),
-                                                             json.loads(data.content)))
-                                                  )
+            # windows completed by an interrupted earlier attempt of this run are picked up from there
+            completed_window = self.checkpoint.get_completed_window(download_data_obj.from_date,
+                                                                    download_data_obj.to_date)
+            if completed_window is not None and not self.is_landing_format_file(completed_window.file_path):
+                completed_window = None
+            if completed_window is not None:
+                increment("checkpoint_windows_resumed")
+                self.use_checkpointed_download(completed_window, download_data_obj)
+                return DownloadedWindow(from_date=download_data_obj.from_date, to_date=download_data_obj.to_date,
+                                        source="checkpoint", n_records=completed_window.n_records,
+                                        n_bytes=completed_window.n_bytes, seconds=time.perf_counter() - start_time)
+
+            # closed windows which are already cached are not downloaded again
+            cache_entry = None
+            if self.download_cache is not None:
+                cache_entry = self.download_cache.get(self.cache_namespace,
+                                                      download_data_obj.from_date, download_data_obj.to_date)
+            if cache_entry is not None and self.is_closed_window(download_data_obj.to_date):
+                increment("download_cache_hits")
+                self.use_cached_download(cache_entry, download_data_obj)
+                return DownloadedWindow(from_date=download_data_obj.from_date, to_date=download_data_obj.to_date,
+                                        source="cache", n_records=cache_entry.n_records, n_bytes=cache_entry.size,
+                                        seconds=time.perf_counter() - start_time)
+
+            n_attempt = 0
+            while True:
+                n_attempt += 1
+                data = None
+                try:
+                    self.rate_limiter.wait(download_data_obj.url)
+                    #Note - If download fails the failed response would be in data itself
+                    request_start_time = time.perf_counter()
+                    increment("http_requests")
+                    data = self.session.get(download_data_obj.url,
+                                            headers=self.get_conditional_headers(cache_entry),
+                                            timeout=DATA_INGESTION_REQUEST_TIMEOUT_SECONDS,
+                                            stream=self.data_ingestion_config.stream_download)
+                    # time until the response headers arrive, the body is read while writing
+                    increment("http_wait_seconds", time.perf_counter() - request_start_time)
+                    if data.status_code == 304 and cache_entry is not None:
+                        increment("download_cache_revalidated")
+                        self.use_cached_download(cache_entry, download_data_obj)
+                        return DownloadedWindow(from_date=download_data_obj.from_date,
+                                                to_date=download_data_obj.to_date, source="revalidated",
+                                                n_records=cache_entry.n_records, n_bytes=cache_entry.size,
+                                                seconds=time.perf_counter() - start_time)
+                    data.raise_for_status()
+
+                    logger.info("Writing the downloaded files to json file")
+                    window_record_counts = self.write_download_data(data, download_data_obj.file_path)
+                    n_records = sum(window_record_counts.values())
+                    self.add_empty_days(window_record_counts, download_data_obj.from_date, download_data_obj.to_date)
+                    if n_records >= DATA_INGESTION_MAX_RECORDS_PER_REQUEST:
+                        # the api stops at its page limit, the rest of the window is missing
+                        os.remove(download_data_obj.file_path)
+                        return FailedDownload(url=download_data_obj.url,
+                                              file_path=download_data_obj.file_path,
+                                              n_attempts=n_attempt,
+                                              status_code=data.status_code,
+                                              error_message=f"{n_records} records, at the page limit",
+                                              is_window_too_large=True)
+                    with self._daily_record_counts_lock:
+                        self.daily_record_counts.update(window_record_counts)
+                    n_bytes = os.path.getsize(download_data_obj.file_path)
+                    increment("download_records", n_records)
+                    increment("download_bytes", n_bytes)
+                    self.checkpoint.record_window(download_data_obj.from_date, download_data_obj.to_date,
+                                                  status=DataIngestionCheckpoint.STATUS_DOWNLOADED,
+                                                  n_records=n_records,
+                                                  n_bytes=n_bytes,
+                                                  file_path=download_data_obj.file_path,
+                                                  daily_record_counts=window_record_counts)
+                    if self.download_cache is not None:
+                        self.download_cache.put(self.cache_namespace,
+                                                download_data_obj.from_date, download_data_obj.to_date,
+                                                file_path=download_data_obj.file_path, n_records=n_records,
+                                                etag=data.headers.get("ETag"),
+                                                last_modified=data.headers.get("Last-Modified"),
+                                                daily_record_counts=window_record_counts)
+                    logger.info(f"Downloaded data written to file path - {download_data_obj.file_path}")
+                    return DownloadedWindow(from_date=download_data_obj.from_date, to_date=download_data_obj.to_date,
+                                            source="api", n_records=n_records, n_bytes=n_bytes,
+                                            seconds=time.perf_counter() - start_time)
+
+                except Exception as e:
+                    # Since the download as failed, delete off the created file and retry
+                    logger.info(f"Failed to download [{e}], attempt {n_attempt}.")
+                    increment("http_failures")
+                    if os.path.exists(download_data_obj.file_path):
+                        os.remove(download_data_obj.file_path)
+
+                    if download_data_obj.n_retry == 0:
+                        logger.info(f"Unable to download file {download_data_obj.url}")
+                        self.checkpoint.record_window(download_data_obj.from_date, download_data_obj.to_date,
+                                                      status=DataIngestionCheckpoint.STATUS_FAILED)
+                        return FailedDownload(url=download_data_obj.url,
+                                              file_path=download_data_obj.file_path,
+                                              n_attempts=n_attempt,
+                                              status_code=getattr(data, "status_code", None),
+                                              error_message=str(e),
+                                              is_window_too_large=self.is_timeout_error(e))
+
+                    download_data_obj = self.retry_download_data(data, download_data_obj, n_attempt)
+                finally:
+                    # a streamed response holds its pooled connection until it is closed
+                    if data is not None:
+                        data.close()
 
-                    json.dump(finance_complaint_data, file_obj)
-                logger.info(f"Downloaded data written to file path - {download_data_obj.file_path}")
+        except Exception as e:
+            raise FinanceException(e,sys)     
 
-            except Exception as e:
-                # Since the download as failed, delete off the created file and call retry download method
-                logger.info("Failed to download, hence retry again.")
-                if os.path.exists(download_data_obj.file_path):
-                    os.remove(download_data_obj.file_path)
-                self.retry_download_data(data,download_data_obj)    
+    @staticmethod
+    def is_timeout_error(error:BaseException) -> bool:
+        """
+        True when the request or the streamed body timed out, looking through the exceptions it is wrapped in.
+        A read timeout while streaming is raised by requests as a ConnectionError around urllib3's ReadTimeoutError.
+        """
+        seen = set()
+        while error is not None and id(error) not in seen:
+            seen.add(id(error))
+            if isinstance(error, (requests.exceptions.Timeout, ReadTimeoutError, TimeoutError)):
+                return True
+            wrapped_errors = [arg for arg in error.args if isinstance(arg, BaseException)]
+            error = wrapped_errors[0] if wrapped_errors else (error.__cause__ or error.__context__)
+        return False
+
+    @staticmethod
+    def is_closed_window(to_date:str) -> bool:
+        """
+        A window far enough in the past that its complaints are not expected to change any more
+        """
+        closed_before = datetime.now() - timedelta(days=DATA_INGESTION_CACHE_CLOSED_AFTER_DAYS)
+        return datetime.strptime(to_date, "%Y-%m-%d") <= closed_before
+
+    @staticmethod
+    def get_conditional_headers(cache_entry:DownloadCacheEntry) -> dict:
+        """
+        Lets the api answer 304 Not Modified for a cached window which hasn't changed
+        """
+        headers = dict()
+        if cache_entry is not None:
+            if cache_entry.etag:
+                headers["If-None-Match"] = cache_entry.etag
+            if cache_entry.last_modified:
+                headers["If-Modified-Since"] = cache_entry.last_modified
+        return headers
+
+    def use_cached_download(self,cache_entry:DownloadCacheEntry,download_data_obj:DownloadUrl):
+        """
+        Puts the cached file of the window in the download dir in place of a new download
+        """
+        try:
+            file_path = self.download_cache.materialize(cache_entry, download_data_obj.file_path)
+            with self._daily_record_counts_lock:
+                self.daily_record_counts.update(cache_entry.daily_record_counts or dict())
+            self.checkpoint.record_window(cache_entry.from_date, cache_entry.to_date,
+                                          status=DataIngestionCheckpoint.STATUS_DOWNLOADED,
+                                          n_records=cache_entry.n_records, n_bytes=cache_entry.size,
+                                          file_path=file_path, daily_record_counts=cache_entry.daily_record_counts)
+            logger.info(f"Reused cached window {cache_entry.from_date} - {cache_entry.to_date} at {file_path}")
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def is_landing_format_file(self,file_path:str) -> bool:
+        """
+        Whether file_path was landed in the landing format of this run (json files may be gzipped)
+        """
+        file_extension = f".{LANDING_FILE_EXTENSIONS[self.data_ingestion_config.landing_format]}"
+        return file_path.endswith((file_extension, f"{file_extension}.gz"))
+
+    def use_checkpointed_download(self,completed_window:WindowCheckpointInfo,download_data_obj:DownloadUrl):
+        """
+        Brings the file of a window completed by an earlier attempt into this run's download dir
+        """
+        try:
+            file_path = os.path.join(os.path.dirname(download_data_obj.file_path),
+                                     os.path.basename(completed_window.file_path))
+            if os.path.abspath(file_path) != os.path.abspath(completed_window.file_path):
+                link_or_copy(completed_window.file_path, file_path)
+            with self._daily_record_counts_lock:
+                self.daily_record_counts.update(completed_window.daily_record_counts or dict())
+            logger.info(f"Resumed window {completed_window.from_date} - {completed_window.to_date} "
+                        f"from checkpoint {completed_window.file_path}")
+        except Exception as e:
+            raise FinanceException(e, sys)
 
+    def write_download_data(self,data,file_path:str) -> Counter:
+        """
+        Keeps only the _source part of every record and writes them to file_path.
+        Returns the number of records written per date received.
+        """
+        try:
+            if self.data_ingestion_config.landing_format != "json":
+                return self.write_download_data_as_columnar(data, file_path)
+            if self.data_ingestion_config.stream_download:
+                return self.write_download_data_as_ndjson(data, file_path)
+
+            with open(file_path,"w") as file_obj:
+                finance_complaint_data = list(map(lambda x: x["_source"],
+                                                  filter(lambda x: "_source" in x.keys(),
+                                                         json.loads(data.content)))
+                                              )
+
+                json.dump(finance_complaint_data, file_obj)
+            return Counter(self.get_record_date(record) for record in finance_complaint_data)
         except Exception as e:
-            raise FinanceException(e,sys)     
+            raise FinanceException(e, sys)
+
+    def write_download_data_as_ndjson(self,data,file_path:str) -> Counter:
+        """
+        Streams the response body through an incremental json parser and writes
+        one _source record per line (gzip compressed for .gz files).
+        Memory stays bounded by the chunk size instead of the response size, and
+        uncompressed newline delimited json can be split by spark across executors.
+        """
+        try:
+            open_file = gzip.open if file_path.endswith(".gz") else open
+            record_counts = Counter()
+            with open_file(file_path,"wt",encoding="utf-8") as file_obj:
+                chunks = data.iter_content(chunk_size=DATA_INGESTION_DOWNLOAD_CHUNK_SIZE)
+                for record in iter_json_array(chunks):
+                    if "_source" not in record:
+                        continue
+                    file_obj.write(json.dumps(record["_source"]))
+                    file_obj.write("\n")
+                    record_counts[self.get_record_date(record["_source"])] += 1
+            logger.debug(f"{sum(record_counts.values())} records written to {file_path}")
+            return record_counts
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def write_download_data_as_columnar(self,data,file_path:str) -> Counter:
+        """
+        Streams the response body through the incremental json parser and lands the _source
+        records projected to the landing columns and cast to their types, as a compressed
+        parquet or arrow file which spark reads without parsing json again
+        """
+        try:
+            record_counts = Counter()
+            with LandingFileWriter(file_path, self.landing_columns, self.data_ingestion_config.landing_format,
+                                   self.data_ingestion_config.landing_compression,
+                                   batch_size=DATA_INGESTION_LANDING_BATCH_SIZE) as writer:
+                chunks = data.iter_content(chunk_size=DATA_INGESTION_DOWNLOAD_CHUNK_SIZE)
+                for record in iter_json_array(chunks):
+                    if "_source" not in record:
+                        continue
+                    landed_record = writer.write(record["_source"])
+                    record_counts[self.get_record_date(landed_record)] += 1
+            logger.debug(f"{sum(record_counts.values())} records landed in {file_path}")
+            return record_counts
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @staticmethod
+    def add_empty_days(record_counts:Counter,from_date:str,to_date:str) -> Counter:
+        """
+        Counts the days of the window [from_date, to_date) without any record as 0,
+        so the planner knows they are empty instead of estimating them
+        """
+        day = datetime.strptime(from_date, "%Y-%m-%d")
+        end_date = datetime.strptime(to_date, "%Y-%m-%d")
+        while day < end_date:
+            record_counts.setdefault(day.strftime("%Y-%m-%d"), 0)
+            day += timedelta(days=1)
+        return record_counts
+
+    @staticmethod
+    def get_record_date(record:dict) -> str:
+        # date_received looks like 2022-05-01T12:00:00-05:00
+        return str(record.get("date_received") or "")[:10]
 
     """
-    Retry download, if the download fails
+    Prepare the retry, if the download fails.
+    Saves the failed response, waits with exponential backoff and
+    returns the DownloadUrl with one retry less.
     """
-    def retry_download_data(self,data,download_data_obj:DownloadUrl):
+    def retry_download_data(self,data,download_data_obj:DownloadUrl,n_attempt:int = 1) -> DownloadUrl:
         try:
-            if download_data_obj.n_retry == 0:
-                self.failed_download_urls.append(download_url)
-                logger.info(f"Unable to download file {download_data_obj.url}")
-                return
-
             # Writing  response to understand why download failed
-            failed_download_file_path = os.path.join(self.data_ingestion_config.failed_dir,
-            os.path.basename(download_data_obj.file_path))   
-
-            os.makedirs(failed_download_dir,exist_ok=True)
-
-            with open(failed_download_file_path,"r") as file_obj:
-                file_obj.write(data)
+            if data is not None:
+                failed_download_dir = self.data_ingestion_config.failed_dir
+                os.makedirs(failed_download_dir,exist_ok=True)
+                failed_download_file_path = os.path.join(failed_download_dir,
+                os.path.basename(download_data_obj.file_path))   
+
+                try:
+                    content = data.content
+                except RuntimeError:
+                    # a streamed body which was already (partly) consumed can't be read again
+                    content = f"status code: {data.status_code}".encode()
+                with open(failed_download_file_path,"wb") as file_obj:
+                    file_obj.write(content)
+
+            backoff = min(DATA_INGESTION_MAX_RETRY_BACKOFF_SECONDS,
+                          DATA_INGESTION_RETRY_BACKOFF_SECONDS * 2 ** (n_attempt - 1))
+            backoff += random.uniform(0, DATA_INGESTION_RETRY_BACKOFF_SECONDS)
+            logger.info(f"Retrying {download_data_obj.url} in {backoff:.1f} seconds")
+            time.sleep(backoff)
 
             # Create a new object but make sure to reduce the no of retries by 1
-            download_data_obj = DownloadUrl(download_data_obj.url,
-            download_data_obj.file_path,download_data_obj.n_retry-1)  
+            return download_data_obj._replace(n_retry=download_data_obj.n_retry-1)
 
-            # Again call the download data method 
-            self.download_data(download_data_obj=download_data_obj)
         except Exception as e:
             raise FinanceException(e, sys)  
 
+    def write_download_report(self,report:DownloadReport):
+        """
+        Writes the failed windows of this run to the failed dir as json
+        """
+        try:
+            if report.failed_downloads:
+                logger.info(f"{len(report.failed_downloads)} of {report.n_windows} windows failed to download")
+            os.makedirs(os.path.dirname(report.report_file_path),exist_ok=True)
+            with open(report.report_file_path,"w") as file_obj:
+                json.dump(asdict(report), file_obj, indent=2)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
     """
-    convert files to parquet
+    convert files to parquet.
+    All the downloaded files are read in a single spark job with the pinned
+    FinanceDataSchema (no inference scan, no per file count) and upserted into
+    the feature store, which is partitioned by year/month of date_received.
     """                     
+    @track_stage("convert_files_to_parquet")
     def convert_files_to_parquet(self) -> str:
         try:
             download_dir = self.data_ingestion_config.download_dir
@@ -152,54 +575,274 @@ class DataIngestion:
             feature_store_dir = self.data_ingestion_config.feature_store_dir
             os.makedirs(feature_store_dir,exist_ok=True)
 
-            file_path = os.path.join(download_dir,f"{output_file_name}")
+            file_path = os.path.join(feature_store_dir,f"{output_file_name}")
 
             #loop through the files in the download dir(have a validation check)
             if not os.path.exists(download_dir):
                 return file_path 
 
-            logger.info(f"The parquet file will be created at - {file_path}")
-            for file_name in os.listdir(download_dir):
-                json_file_path = os.path.join(download_dir,file_name)
-                logger.debug(f"Converting {json_file_path} into parquet format at {file_path}")
-                df = spark_session.read.json(json_file_path)
-                if df.count() > 0:
-                    df.write.mode('append').parquet(file_path) 
+            json_file_paths = [os.path.join(download_dir,file_name) for file_name in sorted(os.listdir(download_dir))
+                               if os.path.isfile(os.path.join(download_dir,file_name))]
+            json_file_paths = [json_file_path for json_file_path in json_file_paths
+                               if not self.is_empty_download_file(json_file_path)]
+            if len(json_file_paths) == 0:
+                logger.info(f"No records downloaded in {download_dir}, nothing to convert")
+                return file_path
+
+            increment("parquet_input_files", len(json_file_paths))
+            increment("parquet_input_bytes", sum(os.path.getsize(path) for path in json_file_paths))
+            schema = FinanceDataSchema()
+            logger.info(f"The parquet file will be upserted at - {file_path} from {len(json_file_paths)} files, "
+                        f"schema version {schema.version}")
+            df = self.read_landing_files(json_file_paths, schema)
+            self.upsert_feature_store(df, file_path, json_file_paths)
+            # the arrow files rewritten to parquet are only needed until the upsert has read them
+            shutil.rmtree(self.get_arrow_landing_dir(), ignore_errors=True)
+
+            with open(os.path.join(file_path,DATA_INGESTION_SCHEMA_FILE_NAME),"w") as file_obj:
+                json.dump({"version": schema.version, "schema": schema.dataframe_schema.jsonValue()}, file_obj)
 
             return file_path        
         except Exception as e:
             raise FinanceException(e, sys)        
 
+    @staticmethod
+    def is_empty_download_file(file_path:str) -> bool:
+        """
+        True when a downloaded file holds no records ("" for ndjson, "[]" for a json array,
+        no rows in the footer of a parquet or arrow file)
+        """
+        if file_path.endswith((".parquet", ".arrow")):
+            return count_landing_rows(file_path) == 0
+        open_file = gzip.open if file_path.endswith(".gz") else open
+        with open_file(file_path,"rt",encoding="utf-8") as file_obj:
+            head = file_obj.read(16).strip()
+        return head in ("", "[]")
+
+    @track_stage("upsert_feature_store")
+    def upsert_feature_store(self,df,feature_store_file_path:str,json_file_paths:list):
+        """
+        Merges the new records into the year/month partitions they fall in.
+        Records of those partitions which are not in the new data are kept, records
+        with the same complaint_id are replaced by the new version. Only the affected
+        partitions are rewritten, the rest of the feature store is not touched.
+        Records without a parsable date_received are written to the undated dir of the run instead.
+        """
+        try:
+            from pyspark.sql import functions as F
+            schema = FinanceDataSchema()
+            self.check_feature_store_schema(feature_store_file_path, schema)
+            year_column, month_column = DATA_INGESTION_PARTITION_COLUMNS
+            date_received = F.to_date(F.substring(F.col(schema.col_date_received), 1, 10))
+            new_df = (df.filter(F.col(schema.col_complaint_id).isNotNull())
+                      .dropDuplicates([schema.col_complaint_id])
+                      .withColumn(year_column, F.year(date_received))
+                      .withColumn(month_column, F.month(date_received)))
+
+            # one pass gives the affected partitions and the number of undated records
+            partition_counts = new_df.groupBy(year_column, month_column).count().collect()
+            n_undated = sum(row["count"] for row in partition_counts if row[year_column] is None)
+            if n_undated > 0:
+                undated_dir = os.path.join(self.data_ingestion_config.data_ingestion_dir, DATA_INGESTION_UNDATED_DIR)
+                (new_df.filter(F.col(year_column).isNull()).drop(*DATA_INGESTION_PARTITION_COLUMNS)
+                 .write.mode("overwrite").json(undated_dir))
+                increment("feature_store_undated_records", n_undated)
+                logger.info(f"{n_undated} records without a parsable {schema.col_date_received} written to {undated_dir}")
+                new_df = new_df.filter(F.col(year_column).isNotNull())
+
+            affected_partitions = [self.get_partition_dir(row[year_column], row[month_column])
+                                   for row in partition_counts if row[year_column] is not None]
+            if len(affected_partitions) == 0:
+                logger.info("No records with a complaint id to upsert")
+                return
+            existing_partitions = [partition for partition in affected_partitions
+                                   if os.path.exists(os.path.join(feature_store_file_path, partition))]
+            logger.info(f"Upserting partitions {affected_partitions}, {len(existing_partitions)} already exist")
+
+            merged_df = new_df
+            existing_size = 0
+            if existing_partitions:
+                existing_paths = [os.path.join(feature_store_file_path, partition) for partition in existing_partitions]
+                existing_size = sum(get_dir_size(path) for path in existing_paths)
+                existing_df = (get_spark_session().read.option("basePath", feature_store_file_path)
+                               .schema(new_df.schema).parquet(*existing_paths))
+                unchanged_df = existing_df.join(new_df.select(schema.col_complaint_id),
+                                                on=schema.col_complaint_id, how="left_anti")
+                merged_df = new_df.unionByName(unchanged_df)
+
+            # spread the rows of a partition over enough files to stay near the target file size
+            n_output_files = self.get_n_output_files(json_file_paths, existing_size=existing_size)
+            files_per_partition = max(1, math.ceil(n_output_files / len(affected_partitions)))
+            # F.pmod only exists from spark 3.4, the sql function works with the pinned 3.2
+            salt = F.expr(f"pmod(hash({schema.col_complaint_id}), {files_per_partition})")
+
+            # the partitions are read above, so they are written to a staging dir first and swapped in after
+            staging_dir = os.path.join(feature_store_file_path, DATA_INGESTION_STAGING_DIR)
+            (merged_df.repartition(len(affected_partitions) * files_per_partition, year_column, month_column, salt)
+             .write.mode('overwrite').partitionBy(*DATA_INGESTION_PARTITION_COLUMNS).parquet(staging_dir))
+            increment("feature_store_partitions_written", len(affected_partitions))
+            increment("feature_store_bytes_written", get_dir_size(staging_dir))
+            self.swap_partitions(staging_dir, feature_store_file_path, affected_partitions)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @staticmethod
+    def check_feature_store_schema(feature_store_file_path:str,schema:FinanceDataSchema):
+        """
+        Refuses to merge into a feature store written with another schema version,
+        its partitions would be read with the current schema and silently lose or mistype columns
+        """
+        try:
+            schema_file_path = os.path.join(feature_store_file_path, DATA_INGESTION_SCHEMA_FILE_NAME)
+            if not os.path.exists(schema_file_path):
+                return
+            with open(schema_file_path) as file_obj:
+                stored_version = json.load(file_obj)["version"]
+            if stored_version != schema.version:
+                raise Exception(f"Feature store {feature_store_file_path} was written with schema version "
+                                f"{stored_version}, this version is {schema.version}. "
+                                f"Migrate it or ingest into a new feature store.")
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @staticmethod
+    def get_partition_dir(year:int,month:int) -> str:
+        year_column, month_column = DATA_INGESTION_PARTITION_COLUMNS
+        return os.path.join(f"{year_column}={year}", f"{month_column}={month}")
+
+    @staticmethod
+    def swap_partitions(staging_dir:str,feature_store_file_path:str,partitions:list):
+        """
+        Moves the freshly written partitions from the staging dir into the feature store
+        """
+        try:
+            for partition in partitions:
+                staged_partition = os.path.join(staging_dir, partition)
+                target_partition = os.path.join(feature_store_file_path, partition)
+                if not os.path.exists(staged_partition):
+                    continue
+                os.makedirs(os.path.dirname(target_partition), exist_ok=True)
+                if os.path.exists(target_partition):
+                    # leading underscore keeps spark from picking it up if we crash mid swap
+                    replaced_partition = os.path.join(os.path.dirname(target_partition),
+                                                      f"_{os.path.basename(target_partition)}.replaced")
+                    os.rename(target_partition, replaced_partition)
+                    os.rename(staged_partition, target_partition)
+                    shutil.rmtree(replaced_partition)
+                else:
+                    os.rename(staged_partition, target_partition)
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def read_landing_files(self,file_paths:list,schema:FinanceDataSchema):
+        """
+        One dataframe of the downloaded files whatever format they were landed in: json is parsed
+        with the pinned schema, parquet is read as is (columns projected out at ingestion are null)
+        and arrow files are first rewritten to parquet as spark has no arrow ipc reader
+        """
+        try:
+            spark = get_spark_session()
+            json_file_paths = [path for path in file_paths if path.endswith((".json", ".json.gz"))]
+            parquet_file_paths = [path for path in file_paths if path.endswith(".parquet")]
+            arrow_file_paths = [path for path in file_paths if path.endswith(".arrow")]
+            if arrow_file_paths:
+                parquet_file_paths.append(self.convert_arrow_files(arrow_file_paths))
+
+            dataframes = []
+            if json_file_paths:
+                dataframes.append(spark.read.schema(schema.dataframe_schema).json(json_file_paths))
+            if parquet_file_paths:
+                dataframes.append(spark.read.schema(schema.dataframe_schema).parquet(*parquet_file_paths))
+            df = dataframes[0]
+            for other_df in dataframes[1:]:
+                df = df.unionByName(other_df)
+            return df
+        except Exception as e:
+            raise FinanceException(e, sys)
 
+    def convert_arrow_files(self,arrow_file_paths:list) -> str:
+        """
+        Rewrites the arrow landing files as one parquet dir in the download dir, returns its path
+        """
+        try:
+            import pyarrow.dataset as ds
+            parquet_dir = self.get_arrow_landing_dir()
+            ds.write_dataset(ds.dataset(arrow_file_paths, format="ipc"), parquet_dir, format="parquet",
+                             existing_data_behavior="delete_matching")
+            return parquet_dir
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_arrow_landing_dir(self) -> str:
+        # a dir, so it is not listed with the landing files
+        return os.path.join(self.data_ingestion_config.download_dir, DATA_INGESTION_ARROW_LANDING_DIR)
+
+    @staticmethod
+    def get_n_output_files(file_paths:list,existing_size:int = 0) -> int:
+        """
+        Number of parquet files so that each one is close to the target file size.
+        existing_size is the size of the parquet data merged in with the downloaded files.
+        """
+        target_size = DATA_INGESTION_PARQUET_TARGET_FILE_SIZE_MB * 1024 * 1024
+        estimated_size = existing_size
+        for file_path in file_paths:
+            file_size = os.path.getsize(file_path)
+            # gzip, parquet and arrow landing files are already in the same range as the compressed parquet
+            compressed = file_path.endswith((".gz", ".parquet", ".arrow"))
+            estimated_size += file_size if compressed else file_size / DATA_INGESTION_JSON_TO_PARQUET_RATIO
+        return max(1, math.ceil(estimated_size / target_size))
+
+
+    @track_stage("update_meta_data")
     def update_meta_data(self,parquet_data_file_path:str):
         try:
             logger.info("Writing meta data info to meta file")
             metadata_obj = DataIngestionMetaData(metadata_file_path=self.data_ingestion_config.metadata_file_path)
 
+            # keep the per day counts of the earlier runs, days downloaded again get the new count
+            daily_record_counts = dict()
+            if metadata_obj.is_metadata_file_path_exists():
+                daily_record_counts = metadata_obj.read_metadata_info().daily_record_counts or dict()
+            daily_record_counts.update({day: count for day, count in self.daily_record_counts.items() if day})
+
             metadata_obj.write_metadata_info(from_date=self.data_ingestion_config.from_date,
-                 to_date=self.data_ingestion_config.to_date, data_file_path=parquet_data_file_path)
+                 to_date=self.data_ingestion_config.to_date, data_file_path=parquet_data_file_path,
+                 daily_record_counts=daily_record_counts)
             logger.info("Meta data file updated.")
 
         except Exception as e:
             raise FinanceException(e, sys)            
 
 
+    @track_stage("data_ingestion")
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         try:
             logger.info(f"Started downloading json file")
+            download_report = None
             if self.data_ingestion_config.from_date != self.data_ingestion_config.to_date:
-                self.download_files()
-
-            logger.info("Combining all the downloaded files to a parquet file")
-            if  os.path.exists(self.data_ingestion_config.download_dir):
+                download_report = self.download_files()
+
+            is_complete = download_report is None or not download_report.failed_downloads
+            if not is_complete:
+                # a partial run is neither merged nor recorded in the metadata, so downstream stages never
+                # see a range with holes. The completed windows stay checkpointed and the next run only
+                # downloads the failed ones again
+                logger.info(f"{len(download_report.failed_downloads)} windows failed, feature store and meta data "
+                            f"not updated, see {download_report.report_file_path}")
+            elif os.path.exists(self.data_ingestion_config.download_dir):
+                logger.info("Combining all the downloaded files to a parquet file")
                 file_path = self.convert_files_to_parquet()
                 self.update_meta_data(parquet_data_file_path=file_path)
+                # the run is merged into the feature store, nothing left to resume
+                self.checkpoint.clear()
 
             feature_store_file_path = os.path.join(self.data_ingestion_config.feature_store_dir,
                                                    self.data_ingestion_config.file_name)    
 
             data_ingestion_artifact = DataIngestionArtifact(feature_store_file_path = feature_store_file_path,
-             metadata_file_path = self.data_ingestion_config.metadata_file_path, download_dir=self.data_ingestion_config.download_dir)
+             metadata_file_path = self.data_ingestion_config.metadata_file_path, download_dir=self.data_ingestion_config.download_dir,
+             is_complete = is_complete)
 
             logger.info(f"Data ingestion is complete.")
             logger.info(f"Data Ingestion Artifact ->{data_ingestion_artifact}")
@@ -0,0 +1,220 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import track_stage, increment
+from finance_complaint.config.spark_manager import get_spark_session
+from finance_complaint.constant.training_pipeline_config.data_ingestion_config import DATA_INGESTION_PARTITION_COLUMNS
+from finance_complaint.entity.config_entity import DataTransformationConfig
+from finance_complaint.entity.artifact_entity import DataValidationArtifact, DataTransformationArtifact
+from finance_complaint.entity.schema import FinanceDataSchema
+from finance_complaint.utils import get_partition_fingerprints, read_yaml_file, write_yaml_file
+import os,sys
+import json
+import shutil
+import hashlib
+from pyspark.ml import Pipeline, PipelineModel
+from pyspark.ml.feature import StringIndexer, OneHotEncoder, Tokenizer, StopWordsRemover, HashingTF, IDF, \
+    VectorAssembler
+from pyspark.sql import DataFrame, functions as F
+#read the labelled complaints accepted by data validation and mark the test split by a hash of complaint_id
+#reuse the fitted feature transformer, or fit it again on the train split when its params changed or too much data is new
+#transform only the partitions which are new or changed since they were transformed by this transformer
+#write the features partitioned by year/month and update the manifest
+
+
+class DataTransformation:
+
+    def __init__(self, data_transformation_config: DataTransformationConfig,
+                 data_validation_artifact: DataValidationArtifact):
+        logger.info(f"{'>>' * 20}Starting data transformation.{'<<' * 20}")
+        self.data_transformation_config = data_transformation_config
+        self.data_validation_artifact = data_validation_artifact
+        self.schema = FinanceDataSchema()
+
+    def read_manifest(self) -> dict:
+        """
+        transformer_id, params_id and fitted_partitions of the current transformer and
+        partitions: partition -> fingerprint of the accepted partition when it was transformed
+        """
+        try:
+            if not os.path.exists(self.data_transformation_config.manifest_file_path):
+                return dict()
+            return read_yaml_file(file_path=self.data_transformation_config.manifest_file_path) or dict()
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_params_id(self) -> str:
+        """
+        Hash of everything which defines the feature pipeline apart from the data it is fitted on
+        """
+        params = {"schema_version": self.schema.version,
+                  "categorical_columns": self.schema.categorical_columns,
+                  "text_column": self.schema.col_complaint_what_happened,
+                  "target_column": self.data_transformation_config.target_column,
+                  "num_text_features": self.data_transformation_config.num_text_features,
+                  "features_column": self.data_transformation_config.features_column,
+                  "test_size": self.data_transformation_config.test_size,
+                  "random_seed": self.data_transformation_config.random_seed}
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+    def get_labelled_data(self, partitions: list) -> DataFrame:
+        """
+        Complaints where the consumer said whether they disputed, with label 1.0 for a dispute.
+        Missing categorical and text values are filled with "" (the online scorer does the same).
+        split_column is True for the test split; a complaint keeps its split whichever partitions are read.
+        """
+        try:
+            accepted_file_path = self.data_validation_artifact.accepted_file_path
+            partition_paths = [os.path.join(accepted_file_path, partition) for partition in partitions]
+            # basePath keeps year/month as columns when reading single partitions
+            dataframe = get_spark_session().read.option("basePath", accepted_file_path).parquet(*partition_paths)
+            target_column = self.data_transformation_config.target_column
+            dataframe = (dataframe.filter(F.col(target_column).isin("Yes", "No"))
+                         .withColumn(self.data_transformation_config.label_column,
+                                     (F.col(target_column) == "Yes").cast("double"))
+                         .withColumn(self.data_transformation_config.split_column, self.get_test_split_condition()))
+            return self.schema.fill_missing_feature_inputs(dataframe)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_test_split_condition(self) -> "Column":
+        """
+        True for about test_size of the complaints, by a seeded hash of complaint_id
+        """
+        try:
+            n_buckets = 10000
+            random_seed = self.data_transformation_config.random_seed
+            n_test_buckets = int(round(self.data_transformation_config.test_size * n_buckets))
+            # pmod through a sql expression, F.pmod is not in pyspark 3.2
+            return F.expr(f"pmod(xxhash64(CAST({random_seed} AS BIGINT), {self.schema.col_complaint_id}), "
+                          f"{n_buckets}) < {n_test_buckets}")
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_feature_pipeline(self) -> Pipeline:
+        """
+        One hot encoded categorical columns and tf-idf of the complaint narrative, assembled into "features"
+        """
+        categorical_columns = self.schema.categorical_columns
+        index_columns = [f"{column}_index" for column in categorical_columns]
+        encoded_columns = [f"{column}_encoded" for column in categorical_columns]
+        text_column = self.schema.col_complaint_what_happened
+        stages = [
+            StringIndexer(inputCols=categorical_columns, outputCols=index_columns, handleInvalid="keep"),
+            OneHotEncoder(inputCols=index_columns, outputCols=encoded_columns, handleInvalid="keep"),
+            Tokenizer(inputCol=text_column, outputCol=f"{text_column}_tokens"),
+            StopWordsRemover(inputCol=f"{text_column}_tokens", outputCol=f"{text_column}_terms"),
+            HashingTF(inputCol=f"{text_column}_terms", outputCol=f"{text_column}_tf",
+                      numFeatures=self.data_transformation_config.num_text_features),
+            IDF(inputCol=f"{text_column}_tf", outputCol=f"{text_column}_tfidf"),
+            VectorAssembler(inputCols=encoded_columns + [f"{text_column}_tfidf"],
+                            outputCol=self.data_transformation_config.features_column),
+        ]
+        return Pipeline(stages=stages)
+
+    def is_transformer_reusable(self, manifest: dict, fingerprints: dict) -> bool:
+        """
+        The persisted transformer is reused while its params are unchanged and at most
+        refit_ratio of the partitions weren't seen when it was fitted
+        """
+        if manifest.get("params_id") != self.get_params_id():
+            return False
+        if not os.path.exists(os.path.join(self.data_transformation_config.transformer_dir, manifest["transformer_id"])):
+            return False
+        unseen_partitions = set(fingerprints) - set(manifest.get("fitted_partitions", []))
+        return len(unseen_partitions) <= self.data_transformation_config.refit_ratio * len(fingerprints)
+
+    def fit_transformer(self, fingerprints: dict) -> dict:
+        """
+        Fits the feature pipeline on the train split of all the accepted partitions, so no statistic
+        (string indices, idf) comes from the test split, and saves it under a new transformer_id.
+        Returns the manifest of the new transformer, with no partition transformed yet.
+        """
+        try:
+            params_id = self.get_params_id()
+            data_id = hashlib.sha256(json.dumps(fingerprints, sort_keys=True).encode()).hexdigest()[:16]
+            transformer_id = f"{params_id}_{data_id}"
+            logger.info(f"Fitting the feature transformer {transformer_id} on {len(fingerprints)} partitions")
+            dataframe = self.get_labelled_data(sorted(fingerprints))
+            train_df = dataframe.filter(~F.col(self.data_transformation_config.split_column))
+            transformer = self.get_feature_pipeline().fit(train_df)
+            transformer.write().overwrite().save(os.path.join(self.data_transformation_config.transformer_dir,
+                                                              transformer_id))
+            increment("transformer_fits")
+            return {"transformer_id": transformer_id, "params_id": params_id,
+                    "fitted_partitions": sorted(fingerprints), "partitions": dict()}
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def transform_partitions(self, transformer: PipelineModel, partitions: list, transformed_file_path: str):
+        """
+        Replaces the given partitions of transformed_file_path with their features.
+        The intermediate columns of the pipeline are dropped, the input columns are kept
+        so the test split can be scored by the full model.
+        """
+        try:
+            dataframe = self.get_labelled_data(partitions)
+            output_columns = dataframe.columns + [self.data_transformation_config.features_column]
+            transformed_df = transformer.transform(dataframe).select(*output_columns)
+            for partition in partitions:
+                shutil.rmtree(os.path.join(transformed_file_path, partition), ignore_errors=True)
+            (transformed_df.write.mode("append")
+             .partitionBy(*DATA_INGESTION_PARTITION_COLUMNS)
+             .parquet(transformed_file_path))
+            increment("transformed_partitions", len(partitions))
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def remove_stale_outputs(self, manifest: dict):
+        """
+        Drops the transformers and features of every transformer_id except the current one
+        """
+        try:
+            for dir_path in [self.data_transformation_config.transformer_dir,
+                             self.data_transformation_config.transformed_file_path]:
+                if not os.path.isdir(dir_path):
+                    continue
+                for transformer_id in os.listdir(dir_path):
+                    if transformer_id != manifest["transformer_id"]:
+                        shutil.rmtree(os.path.join(dir_path, transformer_id), ignore_errors=True)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @track_stage("data_transformation")
+    def initiate_data_transformation(self) -> DataTransformationArtifact:
+        try:
+            fingerprints = get_partition_fingerprints(self.data_validation_artifact.accepted_file_path,
+                                                      DATA_INGESTION_PARTITION_COLUMNS)
+            if not fingerprints:
+                raise Exception(f"No accepted data in {self.data_validation_artifact.accepted_file_path}")
+
+            manifest = self.read_manifest()
+            if not self.is_transformer_reusable(manifest, fingerprints):
+                manifest = self.fit_transformer(fingerprints)
+            transformer_file_path = os.path.join(self.data_transformation_config.transformer_dir,
+                                                 manifest["transformer_id"])
+            transformed_file_path = os.path.join(self.data_transformation_config.transformed_file_path,
+                                                 manifest["transformer_id"])
+
+            changed_partitions = sorted(partition for partition, fingerprint in fingerprints.items()
+                                        if manifest["partitions"].get(partition) != fingerprint)
+            removed_partitions = sorted(set(manifest["partitions"]) - set(fingerprints))
+            logger.info(f"{len(changed_partitions)} of {len(fingerprints)} partitions to transform")
+            if changed_partitions:
+                self.transform_partitions(PipelineModel.load(transformer_file_path), changed_partitions,
+                                          transformed_file_path)
+            for partition in removed_partitions:
+                shutil.rmtree(os.path.join(transformed_file_path, partition), ignore_errors=True)
+
+            manifest["partitions"] = {partition: fingerprints[partition] for partition in fingerprints}
+            write_yaml_file(file_path=self.data_transformation_config.manifest_file_path, data=manifest)
+            self.remove_stale_outputs(manifest)
+
+            data_transformation_artifact = DataTransformationArtifact(
+                transformed_file_path=transformed_file_path,
+                transformer_file_path=transformer_file_path,
+                transformed_partitions=changed_partitions,
+                reused_partitions=sorted(set(fingerprints) - set(changed_partitions)))
+            logger.info(f"Data Transformation Artifact ->{data_transformation_artifact}")
+            return data_transformation_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
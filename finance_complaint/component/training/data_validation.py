@@ -0,0 +1,212 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import track_stage, increment
+from finance_complaint.config.spark_manager import get_spark_session
+from finance_complaint.constant.training_pipeline_config.data_ingestion_config import DATA_INGESTION_PARTITION_COLUMNS
+from finance_complaint.entity.config_entity import DataValidationConfig
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from finance_complaint.entity.schema import FinanceDataSchema
+from finance_complaint.utils import get_partition_fingerprints, read_yaml_file, write_yaml_file
+import os,sys
+import shutil
+from pyspark import StorageLevel
+from pyspark.sql import Column, DataFrame, functions as F
+#read the feature store partitions which changed since they were last validated
+#check the columns and types against FinanceDataSchema
+#null ratios, distinct counts and category frequencies in one aggregation
+#write the valid rows to accepted/ and the invalid ones to quarantine/, partitioned by year/month
+#write the validation report and update the manifest of validated partitions
+
+INVALID_ROW_COLUMN = "_invalid_row"
+
+
+class DataValidation:
+
+    def __init__(self, data_validation_config: DataValidationConfig, data_ingestion_artifact: DataIngestionArtifact):
+        logger.info(f"{'>>' * 20}Starting data validation.{'<<' * 20}")
+        self.data_validation_config = data_validation_config
+        self.data_ingestion_artifact = data_ingestion_artifact
+        self.schema = FinanceDataSchema()
+
+    def read_manifest(self) -> dict:
+        """
+        partition -> fingerprint of the feature store partition when it was validated
+        """
+        try:
+            if not os.path.exists(self.data_validation_config.manifest_file_path):
+                return dict()
+            return read_yaml_file(file_path=self.data_validation_config.manifest_file_path) or dict()
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_changed_partitions(self) -> dict:
+        """
+        Feature store partitions which are new or changed since they were validated.
+        Returns partition -> fingerprint.
+        """
+        try:
+            fingerprints = get_partition_fingerprints(self.data_ingestion_artifact.feature_store_file_path,
+                                                      DATA_INGESTION_PARTITION_COLUMNS)
+            manifest = self.read_manifest()
+            changed_partitions = {partition: fingerprint for partition, fingerprint in fingerprints.items()
+                                  if manifest.get(partition) != fingerprint}
+            logger.info(f"{len(changed_partitions)} of {len(fingerprints)} partitions to validate")
+            return changed_partitions
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def check_schema(self, dataframe: DataFrame) -> dict:
+        """
+        Missing columns and type mismatches make the data unusable and fail the stage,
+        unexpected columns are only reported.
+        """
+        try:
+            expected_types = {field.name: field.dataType for field in self.schema.dataframe_schema.fields}
+            actual_types = {field.name: field.dataType for field in dataframe.schema.fields
+                            if field.name not in DATA_INGESTION_PARTITION_COLUMNS}
+            schema_report = {
+                "missing_columns": sorted(set(expected_types) - set(actual_types)),
+                "unexpected_columns": sorted(set(actual_types) - set(expected_types)),
+                "type_mismatches": {column: f"{actual_types[column].simpleString()} != "
+                                            f"{expected_types[column].simpleString()}"
+                                    for column in sorted(set(expected_types) & set(actual_types))
+                                    if actual_types[column] != expected_types[column]},
+            }
+            if schema_report["missing_columns"] or schema_report["type_mismatches"]:
+                raise Exception(f"Feature store doesn't match schema version {self.schema.version}: {schema_report}")
+            return schema_report
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_invalid_row_condition(self) -> Column:
+        """
+        Rows which can't be used downstream: no id, no product or no parsable date_received
+        """
+        date_received = F.to_date(F.substring(F.col(self.schema.col_date_received), 1, 10))
+        return (F.col(self.schema.col_complaint_id).isNull()
+                | F.col(self.schema.col_product).isNull()
+                | date_received.isNull())
+
+    def get_column_statistics(self, dataframe: DataFrame) -> dict:
+        """
+        Null ratio and approximate distinct count of every column, value frequencies of the
+        categorical columns and the number of invalid rows, in a single aggregation.
+        Every row is exploded into one (column, category, value) entry per column and the
+        entries are rolled up on (column, category): the (column) level gives the column
+        statistics, the (column, category) level the frequencies. Only categorical columns
+        carry a category, so high cardinality columns collapse to one group per column and
+        the partial aggregation keeps the shuffle small.
+        """
+        try:
+            categorical_columns = set(self.schema.categorical_columns)
+            columns = [column for column in self.schema.column_names if column in dataframe.columns]
+            entries = [F.struct(F.lit(column).alias("column"),
+                                (F.col(column).cast("string") if column in categorical_columns
+                                 else F.lit(None).cast("string")).alias("category"),
+                                F.col(column).cast("string").alias("value"))
+                       for column in columns]
+            entries.append(F.struct(F.lit(INVALID_ROW_COLUMN).alias("column"),
+                                    F.lit(None).cast("string").alias("category"),
+                                    F.when(self.get_invalid_row_condition(), F.lit("1")).alias("value")))
+
+            rows = (dataframe.select(F.explode(F.array(*entries)).alias("entry"))
+                    .select("entry.*")
+                    .rollup("column", "category")
+                    .agg(F.count(F.lit(1)).alias("n_rows"),
+                         F.count("value").alias("n_non_null"),
+                         F.approx_count_distinct("value").alias("n_distinct"),
+                         F.grouping("category").alias("is_column_total"))
+                    .filter(F.col("column").isNotNull())
+                    .collect())
+
+            column_statistics = dict()
+            category_counts = {column: dict() for column in categorical_columns}
+            for row in rows:
+                if row["is_column_total"]:
+                    column_statistics[row["column"]] = row
+                elif row["column"] in categorical_columns:
+                    category_counts[row["column"]][row["category"]] = row["n_rows"]
+
+            n_rows = column_statistics[INVALID_ROW_COLUMN]["n_rows"] if column_statistics else 0
+            report = {"n_rows": n_rows,
+                      "n_invalid_rows": column_statistics[INVALID_ROW_COLUMN]["n_non_null"] if column_statistics else 0,
+                      "columns": dict()}
+            for column in columns:
+                statistics = column_statistics.get(column)
+                if statistics is None:
+                    continue
+                column_report = {"null_ratio": 1 - statistics["n_non_null"] / n_rows if n_rows else 0.0,
+                                 "n_distinct": statistics["n_distinct"]}
+                if column in categorical_columns:
+                    top_categories = sorted(category_counts[column].items(), key=lambda item: -item[1])
+                    column_report["top_categories"] = {str(category): count for category, count
+                                                       in top_categories[:self.data_validation_config.top_categories]}
+                report["columns"][column] = column_report
+            report["null_heavy_columns"] = sorted(
+                column for column, column_report in report["columns"].items()
+                if column_report["null_ratio"] > self.data_validation_config.max_null_ratio)
+            return report
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def write_validated_data(self, dataframe: DataFrame, partitions: list):
+        """
+        Replaces the validated partitions in accepted/ and quarantine/.
+        The old partitions are removed first, so a partition whose rows all moved to the
+        other side doesn't keep stale rows. The manifest is only updated afterwards,
+        so an interrupted write is redone by the next run.
+        """
+        try:
+            invalid_row = self.get_invalid_row_condition()
+            outputs = [(self.data_validation_config.accepted_file_path, dataframe.filter(~invalid_row)),
+                       (self.data_validation_config.quarantine_file_path, dataframe.filter(invalid_row))]
+            for file_path, output_df in outputs:
+                for partition in partitions:
+                    shutil.rmtree(os.path.join(file_path, partition), ignore_errors=True)
+                (output_df.write.mode("append")
+                 .partitionBy(*DATA_INGESTION_PARTITION_COLUMNS)
+                 .parquet(file_path))
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @track_stage("data_validation")
+    def initiate_data_validation(self) -> DataValidationArtifact:
+        try:
+            if not self.data_ingestion_artifact.is_complete:
+                raise Exception("Data ingestion did not download every window, its run was not merged into the "
+                                "feature store. Run the ingestion again to retry the failed windows.")
+            changed_partitions = self.get_changed_partitions()
+            report = {"schema_version": self.schema.version, "validated_partitions": sorted(changed_partitions)}
+            if changed_partitions:
+                feature_store_file_path = self.data_ingestion_artifact.feature_store_file_path
+                partition_paths = [os.path.join(feature_store_file_path, partition)
+                                   for partition in sorted(changed_partitions)]
+                # basePath keeps year/month as columns when reading single partitions
+                dataframe = get_spark_session().read.option("basePath", feature_store_file_path).parquet(*partition_paths)
+                report["schema"] = self.check_schema(dataframe)
+
+                # the statistics pass fills the cache, both writes read from it
+                dataframe = dataframe.persist(StorageLevel.MEMORY_AND_DISK)
+                report.update(self.get_column_statistics(dataframe))
+                self.write_validated_data(dataframe, sorted(changed_partitions))
+                dataframe.unpersist()
+                increment("validation_rows", report["n_rows"])
+                increment("validation_invalid_rows", report["n_invalid_rows"])
+                if report["null_heavy_columns"]:
+                    logger.warning(f"Columns with a null ratio above {self.data_validation_config.max_null_ratio}: "
+                                   f"{report['null_heavy_columns']}")
+
+                manifest = self.read_manifest()
+                manifest.update(changed_partitions)
+                write_yaml_file(file_path=self.data_validation_config.manifest_file_path, data=manifest)
+            write_yaml_file(file_path=self.data_validation_config.report_file_path, data=report)
+
+            data_validation_artifact = DataValidationArtifact(
+                accepted_file_path=self.data_validation_config.accepted_file_path,
+                quarantine_file_path=self.data_validation_config.quarantine_file_path,
+                report_file_path=self.data_validation_config.report_file_path,
+                validated_partitions=sorted(changed_partitions))
+            logger.info(f"Data Validation Artifact ->{data_validation_artifact}")
+            return data_validation_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
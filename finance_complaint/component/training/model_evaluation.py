@@ -0,0 +1,59 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import track_stage
+from finance_complaint.config.spark_manager import get_spark_session
+from finance_complaint.entity.config_entity import ModelEvaluationConfig
+from finance_complaint.entity.artifact_entity import ModelTrainerArtifact, ModelEvaluationArtifact
+from finance_complaint.utils import get_latest_model_path, write_yaml_file
+import os,sys
+from pyspark.ml import PipelineModel
+from pyspark.ml.evaluation import BinaryClassificationEvaluator
+#score the trained model and the latest pushed model on the same test split
+#accept the trained model when it is better by at least the threshold (or nothing is pushed yet)
+
+
+class ModelEvaluation:
+
+    def __init__(self, model_evaluation_config: ModelEvaluationConfig, model_trainer_artifact: ModelTrainerArtifact):
+        logger.info(f"{'>>' * 20}Starting model evaluation.{'<<' * 20}")
+        self.model_evaluation_config = model_evaluation_config
+        self.model_trainer_artifact = model_trainer_artifact
+
+    def get_metric(self, model_path: str, test_df) -> float:
+        try:
+            evaluator = BinaryClassificationEvaluator(labelCol=self.model_evaluation_config.label_column,
+                                                      metricName=self.model_evaluation_config.metric_name)
+            return evaluator.evaluate(PipelineModel.load(model_path).transform(test_df))
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @track_stage("model_evaluation")
+    def initiate_model_evaluation(self) -> ModelEvaluationArtifact:
+        try:
+            trained_model_file_path = self.model_trainer_artifact.trained_model_file_path
+            best_model_file_path = get_latest_model_path(self.model_evaluation_config.model_dir)
+            trained_model_metric = self.model_trainer_artifact.test_metric
+            best_model_metric = None
+            is_model_accepted = True
+
+            if best_model_file_path is not None:
+                test_df = get_spark_session().read.parquet(self.model_trainer_artifact.test_file_path).cache()
+                best_model_metric = self.get_metric(best_model_file_path, test_df)
+                test_df.unpersist()
+                is_model_accepted = trained_model_metric - best_model_metric >= self.model_evaluation_config.threshold
+
+            model_evaluation_artifact = ModelEvaluationArtifact(
+                is_model_accepted=is_model_accepted,
+                trained_model_file_path=trained_model_file_path,
+                best_model_file_path=best_model_file_path,
+                trained_model_metric=trained_model_metric,
+                best_model_metric=best_model_metric,
+                report_file_path=self.model_evaluation_config.report_file_path)
+            write_yaml_file(file_path=self.model_evaluation_config.report_file_path,
+                            data={"metric_name": self.model_evaluation_config.metric_name,
+                                  **model_evaluation_artifact.__dict__})
+
+            logger.info(f"Model Evaluation Artifact ->{model_evaluation_artifact}")
+            return model_evaluation_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -0,0 +1,46 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import track_stage
+from finance_complaint.entity.config_entity import ModelPusherConfig
+from finance_complaint.entity.artifact_entity import ModelEvaluationArtifact, ModelPusherArtifact
+from finance_complaint.component.prediction.model_export import ModelExporter
+import os,sys
+import shutil
+#copy an accepted model into a new version dir of the saved models
+#export it for the online scorer
+
+
+class ModelPusher:
+
+    def __init__(self, model_pusher_config: ModelPusherConfig, model_evaluation_artifact: ModelEvaluationArtifact):
+        logger.info(f"{'>>' * 20}Starting model pusher.{'<<' * 20}")
+        self.model_pusher_config = model_pusher_config
+        self.model_evaluation_artifact = model_evaluation_artifact
+
+    @track_stage("model_pusher")
+    def initiate_model_pusher(self) -> ModelPusherArtifact:
+        try:
+            if not self.model_evaluation_artifact.is_model_accepted:
+                logger.info("Trained model was not accepted, nothing to push")
+                return ModelPusherArtifact(pushed_model_file_path=None, online_model_dir=None)
+
+            pushed_model_file_path = os.path.join(self.model_pusher_config.model_dir,
+                                                  self.model_pusher_config.model_version)
+            # copied next to the target and renamed, so prediction never loads half a model
+            temp_model_file_path = os.path.join(self.model_pusher_config.model_dir,
+                                                f"_{self.model_pusher_config.model_version}.tmp")
+            shutil.rmtree(temp_model_file_path, ignore_errors=True)
+            shutil.copytree(self.model_evaluation_artifact.trained_model_file_path, temp_model_file_path)
+            os.rename(temp_model_file_path, pushed_model_file_path)
+            logger.info(f"Model pushed to {pushed_model_file_path}")
+
+            online_model_dir = os.path.join(self.model_pusher_config.online_model_dir,
+                                            self.model_pusher_config.model_version)
+            ModelExporter(model_path=pushed_model_file_path, export_dir=online_model_dir).export()
+
+            model_pusher_artifact = ModelPusherArtifact(pushed_model_file_path=pushed_model_file_path,
+                                                        online_model_dir=online_model_dir)
+            logger.info(f"Model Pusher Artifact ->{model_pusher_artifact}")
+            return model_pusher_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -0,0 +1,72 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import track_stage
+from finance_complaint.config.spark_manager import get_spark_session
+from finance_complaint.entity.config_entity import ModelTrainerConfig
+from finance_complaint.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact
+import os,sys
+from pyspark.ml import PipelineModel, Transformer
+from pyspark.ml.classification import LogisticRegression
+from pyspark.ml.evaluation import BinaryClassificationEvaluator
+from pyspark.sql import DataFrame, functions as F
+#read the transformed features of the labelled complaints
+#split train/test on the split column of data transformation and keep the test split (without features) for evaluation
+#fit the classifier on the features
+#save the fitted transformer and classifier as one PipelineModel
+
+
+class ModelTrainer:
+
+    def __init__(self, model_trainer_config: ModelTrainerConfig,
+                 data_transformation_artifact: DataTransformationArtifact):
+        logger.info(f"{'>>' * 20}Starting model trainer.{'<<' * 20}")
+        self.model_trainer_config = model_trainer_config
+        self.data_transformation_artifact = data_transformation_artifact
+
+    def get_classifier(self) -> LogisticRegression:
+        return LogisticRegression(featuresCol=self.model_trainer_config.features_column,
+                                  labelCol=self.model_trainer_config.label_column,
+                                  maxIter=self.model_trainer_config.max_iter,
+                                  regParam=self.model_trainer_config.reg_param,
+                                  elasticNetParam=self.model_trainer_config.elastic_net_param)
+
+    def get_metric(self, model: Transformer, dataframe: DataFrame) -> float:
+        evaluator = BinaryClassificationEvaluator(labelCol=self.model_trainer_config.label_column,
+                                                  metricName=self.model_trainer_config.metric_name)
+        return evaluator.evaluate(model.transform(dataframe))
+
+    @track_stage("model_trainer")
+    def initiate_model_training(self) -> ModelTrainerArtifact:
+        try:
+            features_column = self.model_trainer_config.features_column
+            split_column = self.model_trainer_config.split_column
+            dataframe = get_spark_session().read.parquet(self.data_transformation_artifact.transformed_file_path)
+            # the same split the transformer was fitted on, its statistics never saw the test rows
+            train_df = dataframe.filter(~F.col(split_column))
+            test_df = dataframe.filter(F.col(split_column))
+            # the test split is written out so evaluation scores every model on the same rows,
+            # without the features as the full model computes them again
+            (test_df.drop(features_column, split_column)
+             .write.mode("overwrite").parquet(self.model_trainer_config.test_file_path))
+            train_df = train_df.cache()
+
+            logger.info("Fitting the classifier on the transformed features")
+            classifier_model = self.get_classifier().fit(train_df)
+            # the pushed model holds the fitted feature stages and the classifier, it doesn't need the label
+            transformer = PipelineModel.load(self.data_transformation_artifact.transformer_file_path)
+            model = PipelineModel(stages=[transformer, classifier_model])
+            model.write().overwrite().save(self.model_trainer_config.trained_model_file_path)
+
+            test_df = get_spark_session().read.parquet(self.model_trainer_config.test_file_path)
+            model_trainer_artifact = ModelTrainerArtifact(
+                trained_model_file_path=self.model_trainer_config.trained_model_file_path,
+                test_file_path=self.model_trainer_config.test_file_path,
+                metric_name=self.model_trainer_config.metric_name,
+                train_metric=self.get_metric(classifier_model, train_df),
+                test_metric=self.get_metric(model, test_df))
+            train_df.unpersist()
+
+            logger.info(f"Model Trainer Artifact ->{model_trainer_artifact}")
+            return model_trainer_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -0,0 +1,43 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.constant.prediction_pipeline_config import *
+from finance_complaint.constant.training_pipeline_config import PIPELINE_ARTIFACT_DIR
+from finance_complaint.constant.training_pipeline_config.data_ingestion_config import DATA_INGESTION_DIR, \
+    DATA_INGESTION_FEATURE_STORE_DIR, DATA_INGESTION_FILE_NAME
+from finance_complaint.entity.config_entity import PredictionPipelineConfig
+from finance_complaint.metrics import set_artifact_dir
+import os,sys
+
+
+class PredictionConfig:
+
+    def __init__(self, artifact_dir = PIPELINE_ARTIFACT_DIR, prediction_dir = PREDICTION_DIR, model_dir = MODEL_SAVED_DIR):
+        """
+        Initialize the required values
+        """
+        self.artifact_dir = artifact_dir
+        self.prediction_dir = prediction_dir
+        self.model_dir = model_dir
+        set_artifact_dir(artifact_dir)
+
+    def get_prediction_pipeline_config(self) -> PredictionPipelineConfig:
+        """
+        To get the prediction pipeline config object -> PredictionPipelineConfig
+        """
+        try:
+            # the persistent feature store written by data ingestion
+            feature_store_file_path = os.path.join(self.artifact_dir, DATA_INGESTION_DIR,
+                                                   DATA_INGESTION_FEATURE_STORE_DIR, DATA_INGESTION_FILE_NAME)
+
+            prediction_pipeline_config = PredictionPipelineConfig(
+                feature_store_file_path = feature_store_file_path,
+                model_dir = self.model_dir,
+                prediction_file_path = os.path.join(self.prediction_dir, PREDICTION_OUTPUT_DIR),
+                manifest_file_path = os.path.join(self.prediction_dir, PREDICTION_MANIFEST_FILE_NAME))
+
+            logger.info(f"Prediction pipeline config ,{prediction_pipeline_config}")
+
+            return prediction_pipeline_config
+
+        except Exception as e:
+            raise FinanceException(e, sys)
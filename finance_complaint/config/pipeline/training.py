@@ -2,12 +2,22 @@ from finance_complaint.exception import FinanceException
 from finance_complaint.logger import logger
 from finance_complaint.constant.training_pipeline_config.data_ingestion_config import *
 from finance_complaint.constant import TIMESTAMP
+from finance_complaint.constant.training_pipeline_config import PIPELINE_NAME, PIPELINE_ARTIFACT_DIR
 from finance_complaint.constant.training_pipeline_config.data_ingestion_config import DATA_INGESTION_MIN_START_DATE
-from finance_complaint.entity.config_entity import TrainingPipelineConfig,DataIngestionConfig
+from finance_complaint.constant.training_pipeline_config.data_validation_config import *
+from finance_complaint.constant.training_pipeline_config.data_transformation_config import *
+from finance_complaint.constant.training_pipeline_config.model_trainer_config import *
+from finance_complaint.constant.training_pipeline_config.model_evaluation_config import *
+from finance_complaint.constant.prediction_pipeline_config import MODEL_SAVED_DIR, ONLINE_MODEL_SAVED_DIR
+from finance_complaint.constant.data_access_config import MONGO_DB_URL, MONGO_DATABASE_NAME, MONGO_COLLECTION_NAME, \
+    S3_BUCKET_NAME, S3_ARTIFACT_PREFIX
+from finance_complaint.entity.config_entity import TrainingPipelineConfig,DataIngestionConfig,DataValidationConfig, \
+    DataTransformationConfig,ModelTrainerConfig,ModelEvaluationConfig,ModelPusherConfig,DataExportConfig
 import os,sys
 from time import strftime
 from datetime import datetime
 from finance_complaint.entity.metadata_entity import DataIngestionMetaData
+from finance_complaint.metrics import set_artifact_dir
 
 class FinanceConfig:
 
@@ -19,13 +29,13 @@ class FinanceConfig:
         self.pipeline_name = pipeline_name
         self.pipeline_config = self.get_pipeline_config()
 
-    def get_pipeline_config(self):
+    def get_pipeline_config(self,artifact_dir = PIPELINE_ARTIFACT_DIR):
         """
-        To get the pipeline config
+        To get the pipeline config, the metrics of the run are written under its artifact dir
         """
         try:
-            artifact_dir = PIPELINE_ARTIFACT_DIR
             training_pipeline_config = TrainingPipelineConfig(pipeline_name=self.pipeline_name, artifact_dir=artifact_dir)
+            set_artifact_dir(artifact_dir)
             return training_pipeline_config
         except Exception as e:
             raise FinanceException(e, sys)
@@ -36,12 +46,11 @@ class FinanceConfig:
         """
         try:
             if to_date is None:
-                to_date = datetime().now().strftime("%Y-%m-%d")
+                to_date = datetime.now().strftime("%Y-%m-%d")
 
-            from_date = datetime().strftime(from_date,"%Y-%m-%d")    
-            min_from_date = datetime().strftime(DATA_INGESTION_MIN_START_DATE,"%Y-%m-%d")
+            min_from_date = datetime.strptime(DATA_INGESTION_MIN_START_DATE,"%Y-%m-%d")
 
-            if from_date < min_from_date:
+            if datetime.strptime(from_date,"%Y-%m-%d") < min_from_date:
                 from_date = DATA_INGESTION_MIN_START_DATE
 
             # Data ingestion main directory
@@ -66,17 +75,149 @@ class FinanceConfig:
                 data_ingestion_dir = data_ingestion_dir, 
                 download_dir = os.path.join(data_ingestion_dir,DATA_INGESTION_DOWNLOADED_DATA_DIR), 
                 file_name = DATA_INGESTION_FILE_NAME, 
-                feature_store_dir = os.path.join(data_ingestion_dir,DATA_INGESTION_FEATURE_STORE_DIR), 
+                # one persistent feature store shared by every run, upserted by complaint_id
+                feature_store_dir = os.path.join(data_ingestion_master_dir,DATA_INGESTION_FEATURE_STORE_DIR), 
                 failed_dir = os.path.join(data_ingestion_dir,DATA_INGESTION_FAILED_DIR), 
                 metadata_file_path = metadata_file_path, 
-                datasource_url = DATA_INGESTION_DATA_SOURCE_URL)
+                datasource_url = DATA_INGESTION_DATA_SOURCE_URL,
+                n_workers = DATA_INGESTION_N_WORKERS,
+                max_requests_per_second = DATA_INGESTION_MAX_REQUESTS_PER_SECOND,
+                stream_download = DATA_INGESTION_STREAM_DOWNLOAD,
+                compress_download = DATA_INGESTION_COMPRESS_DOWNLOAD,
+                adaptive_intervals = DATA_INGESTION_ADAPTIVE_INTERVALS,
+                # cache of downloaded windows shared by all the runs, None disables it
+                download_cache_dir = os.path.join(data_ingestion_master_dir,DATA_INGESTION_DOWNLOAD_CACHE_DIR),
+                checkpoint_file_path = os.path.join(data_ingestion_master_dir,DATA_INGESTION_CHECKPOINT_FILE_NAME),
+                landing_format = DATA_INGESTION_LANDING_FORMAT,
+                landing_compression = DATA_INGESTION_LANDING_COMPRESSION,
+                projected_columns = DATA_INGESTION_PROJECTED_COLUMNS)
 
 
-            logger.log(f"Data Ingestion config ,{data_ingestion_config}")    
+            logger.info(f"Data Ingestion config ,{data_ingestion_config}")    
 
             return data_ingestion_config
                 
         except Exception as e:
-            raise FinanceException(e, sys)    
+            raise FinanceException(e, sys)
+
+    def get_data_export_config(self) -> DataExportConfig:
+        """
+        To get the data export config object -> DataExportConfig
+        """
+        try:
+            data_export_config = DataExportConfig(
+                mongo_enabled = MONGO_DB_URL is not None,
+                mongo_database_name = MONGO_DATABASE_NAME,
+                mongo_collection_name = MONGO_COLLECTION_NAME,
+                s3_bucket_name = S3_BUCKET_NAME,
+                s3_prefix = S3_ARTIFACT_PREFIX)
 
+            logger.info(f"Data export config ,{data_export_config}")
+            return data_export_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_data_validation_config(self) -> DataValidationConfig:
+        """
+        To get the data validation config object -> DataValidationConfig
+        """
+        try:
+            # accepted and quarantined rows are kept across runs, only changed partitions are validated again
+            data_validation_master_dir = os.path.join(self.pipeline_config.artifact_dir,DATA_VALIDATION_DIR)
+            data_validation_dir = os.path.join(data_validation_master_dir,self.timestamp)
+            data_validation_config = DataValidationConfig(
+                data_validation_dir = data_validation_dir,
+                accepted_file_path = os.path.join(data_validation_master_dir,DATA_VALIDATION_ACCEPTED_DIR),
+                quarantine_file_path = os.path.join(data_validation_master_dir,DATA_VALIDATION_QUARANTINE_DIR),
+                manifest_file_path = os.path.join(data_validation_master_dir,DATA_VALIDATION_MANIFEST_FILE_NAME),
+                report_file_path = os.path.join(data_validation_dir,DATA_VALIDATION_REPORT_FILE_NAME),
+                max_null_ratio = DATA_VALIDATION_MAX_NULL_RATIO,
+                top_categories = DATA_VALIDATION_TOP_CATEGORIES)
+
+            logger.info(f"Data validation config ,{data_validation_config}")
+            return data_validation_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_data_transformation_config(self) -> DataTransformationConfig:
+        """
+        To get the data transformation config object -> DataTransformationConfig
+        """
+        try:
+            # the fitted transformer and the transformed partitions are reused across runs
+            data_transformation_dir = os.path.join(self.pipeline_config.artifact_dir,DATA_TRANSFORMATION_DIR)
+            data_transformation_config = DataTransformationConfig(
+                data_transformation_dir = data_transformation_dir,
+                transformer_dir = os.path.join(data_transformation_dir,DATA_TRANSFORMATION_TRANSFORMER_DIR),
+                transformed_file_path = os.path.join(data_transformation_dir,DATA_TRANSFORMATION_FEATURES_DIR),
+                manifest_file_path = os.path.join(data_transformation_dir,DATA_TRANSFORMATION_MANIFEST_FILE_NAME),
+                target_column = DATA_TRANSFORMATION_TARGET_COLUMN,
+                label_column = DATA_TRANSFORMATION_LABEL_COLUMN,
+                features_column = DATA_TRANSFORMATION_FEATURES_COLUMN,
+                num_text_features = DATA_TRANSFORMATION_NUM_TEXT_FEATURES,
+                refit_ratio = DATA_TRANSFORMATION_REFIT_RATIO,
+                split_column = DATA_TRANSFORMATION_SPLIT_COLUMN,
+                test_size = DATA_TRANSFORMATION_TEST_SIZE,
+                random_seed = DATA_TRANSFORMATION_RANDOM_SEED)
+
+            logger.info(f"Data transformation config ,{data_transformation_config}")
+            return data_transformation_config
+        except Exception as e:
+            raise FinanceException(e, sys)
 
+    def get_model_trainer_config(self) -> ModelTrainerConfig:
+        """
+        To get the model trainer config object -> ModelTrainerConfig
+        """
+        try:
+            model_trainer_dir = os.path.join(self.pipeline_config.artifact_dir,MODEL_TRAINER_DIR,self.timestamp)
+            model_trainer_config = ModelTrainerConfig(
+                model_trainer_dir = model_trainer_dir,
+                trained_model_file_path = os.path.join(model_trainer_dir,MODEL_TRAINER_TRAINED_MODEL_DIR),
+                test_file_path = os.path.join(model_trainer_dir,MODEL_TRAINER_TEST_DATA_DIR),
+                label_column = DATA_TRANSFORMATION_LABEL_COLUMN,
+                features_column = DATA_TRANSFORMATION_FEATURES_COLUMN,
+                split_column = DATA_TRANSFORMATION_SPLIT_COLUMN,
+                max_iter = MODEL_TRAINER_MAX_ITER,
+                reg_param = MODEL_TRAINER_REG_PARAM,
+                elastic_net_param = MODEL_TRAINER_ELASTIC_NET_PARAM,
+                metric_name = MODEL_TRAINER_METRIC_NAME)
+
+            logger.info(f"Model trainer config ,{model_trainer_config}")
+            return model_trainer_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_model_evaluation_config(self) -> ModelEvaluationConfig:
+        """
+        To get the model evaluation config object -> ModelEvaluationConfig
+        """
+        try:
+            model_evaluation_dir = os.path.join(self.pipeline_config.artifact_dir,MODEL_EVALUATION_DIR,self.timestamp)
+            model_evaluation_config = ModelEvaluationConfig(
+                model_evaluation_dir = model_evaluation_dir,
+                report_file_path = os.path.join(model_evaluation_dir,MODEL_EVALUATION_REPORT_FILE_NAME),
+                model_dir = MODEL_SAVED_DIR,
+                label_column = DATA_TRANSFORMATION_LABEL_COLUMN,
+                metric_name = MODEL_TRAINER_METRIC_NAME,
+                threshold = MODEL_EVALUATION_THRESHOLD)
+
+            logger.info(f"Model evaluation config ,{model_evaluation_config}")
+            return model_evaluation_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_model_pusher_config(self) -> ModelPusherConfig:
+        """
+        To get the model pusher config object -> ModelPusherConfig
+        """
+        try:
+            model_pusher_config = ModelPusherConfig(
+                model_dir = MODEL_SAVED_DIR,
+                online_model_dir = ONLINE_MODEL_SAVED_DIR,
+                model_version = self.timestamp)
+
+            logger.info(f"Model pusher config ,{model_pusher_config}")
+            return model_pusher_config
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -0,0 +1,66 @@
+import sys
+import atexit
+import threading
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.constant.spark_config import SPARK_APP_NAME, SPARK_PROFILE, SPARK_MASTER, SPARK_PROFILES
+"""
+One SparkSession for the whole process.
+It is only created on the first get_spark_session() call, reused by every pipeline
+stage after that and stopped when the process exits.
+"""
+
+_spark_session = None
+_spark_session_lock = threading.Lock()
+
+
+def get_spark_session(profile: str = SPARK_PROFILE):
+    """
+    Returns the shared SparkSession, building it with the given profile on the first call.
+    The profile of later calls is ignored since the session already exists.
+    """
+    global _spark_session
+    try:
+        if _spark_session is not None:
+            return _spark_session
+        with _spark_session_lock:
+            if _spark_session is None:
+                from pyspark.sql import SparkSession
+
+                if profile not in SPARK_PROFILES:
+                    raise Exception(f"Unknown spark profile [{profile}], choose from {list(SPARK_PROFILES)}")
+                spark_profile = SPARK_PROFILES[profile]
+                builder = SparkSession.builder.appName(SPARK_APP_NAME)
+                master = SPARK_MASTER or spark_profile["master"]
+                if master:
+                    builder = builder.master(master)
+                for key, value in spark_profile["config"].items():
+                    builder = builder.config(key, value)
+                logger.info(f"Creating spark session with profile [{profile}], master [{master}]")
+                _spark_session = builder.getOrCreate()
+        return _spark_session
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def stop_spark_session():
+    """
+    Stops the shared SparkSession, a later get_spark_session() creates a new one
+    """
+    global _spark_session
+    with _spark_session_lock:
+        if _spark_session is not None:
+            logger.info("Stopping spark session")
+            _spark_session.stop()
+            _spark_session = None
+
+
+atexit.register(stop_spark_session)
+
+
+def __getattr__(name):
+    # keeps `from finance_complaint.config.spark_manager import spark_session` working,
+    # prefer get_spark_session() which doesn't start spark at import time
+    if name == "spark_session":
+        return get_spark_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
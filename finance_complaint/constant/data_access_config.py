@@ -0,0 +1,21 @@
+import os
+
+MONGO_DB_URL = os.getenv("MONGO_DB_URL")
+MONGO_DATABASE_NAME = os.getenv("FINANCE_MONGO_DATABASE", "finance_complaint")
+MONGO_COLLECTION_NAME = os.getenv("FINANCE_MONGO_COLLECTION", "complaints")
+# ReplaceOne upserts sent in one bulk_write call
+MONGO_BATCH_SIZE = 5000
+# concurrent bulk_write calls, every one borrows a connection from the pool
+MONGO_N_WORKERS = 4
+MONGO_MAX_POOL_SIZE = 8
+
+S3_BUCKET_NAME = os.getenv("FINANCE_S3_BUCKET")
+# set to a moto or minio server to use a local stand-in of s3
+S3_ENDPOINT_URL = os.getenv("FINANCE_S3_ENDPOINT_URL")
+S3_ARTIFACT_PREFIX = "finance_artifact"
+# files above the threshold are uploaded in parts of chunksize, max_concurrency parts at a time
+S3_MULTIPART_THRESHOLD_MB = 16
+S3_MULTIPART_CHUNKSIZE_MB = 16
+S3_MAX_CONCURRENCY = 8
+# files transferred at the same time
+S3_N_WORKERS = 8
@@ -0,0 +1,21 @@
+import os
+from finance_complaint.constant.training_pipeline_config import PIPELINE_ARTIFACT_DIR
+
+PREDICTION_PIPELINE_NAME = "finance-complaint-prediction"
+PREDICTION_DIR = os.path.join(PIPELINE_ARTIFACT_DIR, "prediction")
+PREDICTION_OUTPUT_DIR = "predictions"
+PREDICTION_MANIFEST_FILE_NAME = "scored_partitions.yaml"
+PREDICTION_COLUMN_NAME = "prediction"
+PREDICTION_PROBABILITY_COLUMN_NAME = "dispute_probability"
+# every pushed model is a PipelineModel in its own version dir under here, the highest version is used
+MODEL_SAVED_DIR = os.path.join(os.getcwd(), "saved_models")
+
+# Online scoring: numpy export of the pushed models, same version dir names as MODEL_SAVED_DIR
+ONLINE_MODEL_SAVED_DIR = os.path.join(os.getcwd(), "saved_online_models")
+ONLINE_MODEL_SPEC_FILE_NAME = "model.json"
+ONLINE_PREDICTION_HOST = os.getenv("FINANCE_ONLINE_HOST", "0.0.0.0")
+ONLINE_PREDICTION_PORT = int(os.getenv("FINANCE_ONLINE_PORT", "8080"))
+ONLINE_PREDICTION_MAX_BATCH_SIZE = 64
+ONLINE_PREDICTION_MAX_BATCH_WAIT_MS = 2.0
+# larger request bodies are refused with 413 before they are read
+ONLINE_PREDICTION_MAX_BODY_BYTES = 1024 * 1024
@@ -0,0 +1,57 @@
+import os
+
+SPARK_APP_NAME = "finance-complaint"
+# local, small or large, see SPARK_PROFILES
+SPARK_PROFILE = os.getenv("FINANCE_SPARK_PROFILE", "local")
+# overrides the master of the profile, e.g. yarn or spark://host:7077
+SPARK_MASTER = os.getenv("FINANCE_SPARK_MASTER")
+
+_COMMON_SPARK_CONFIG = {
+    "spark.sql.adaptive.enabled": "true",
+    "spark.sql.adaptive.coalescePartitions.enabled": "true",
+    "spark.sql.adaptive.skewJoin.enabled": "true",
+    "spark.sql.execution.arrow.pyspark.enabled": "true",
+    "spark.sql.execution.arrow.pyspark.fallback.enabled": "true",
+    "spark.serializer": "org.apache.spark.serializer.KryoSerializer",
+    "spark.sql.sources.partitionOverwriteMode": "dynamic",
+    "spark.ui.showConsoleProgress": "false",
+}
+
+SPARK_PROFILES = {
+    # a laptop or a single VM, the complaint data of a few months
+    "local": {
+        "master": "local[*]",
+        "config": {
+            **_COMMON_SPARK_CONFIG,
+            "spark.sql.shuffle.partitions": "8",
+            "spark.default.parallelism": "8",
+            "spark.driver.memory": "2g",
+            "spark.sql.parquet.compression.codec": "snappy",
+            "spark.sql.adaptive.advisoryPartitionSizeInBytes": "32m",
+        },
+    },
+    # a small cluster, a few years of complaints
+    "small": {
+        "master": None,
+        "config": {
+            **_COMMON_SPARK_CONFIG,
+            "spark.sql.shuffle.partitions": "32",
+            "spark.driver.memory": "4g",
+            "spark.executor.memory": "4g",
+            "spark.sql.parquet.compression.codec": "snappy",
+            "spark.sql.adaptive.advisoryPartitionSizeInBytes": "64m",
+        },
+    },
+    # full history backfills with text features
+    "large": {
+        "master": None,
+        "config": {
+            **_COMMON_SPARK_CONFIG,
+            "spark.sql.shuffle.partitions": "200",
+            "spark.driver.memory": "8g",
+            "spark.executor.memory": "8g",
+            "spark.sql.parquet.compression.codec": "zstd",
+            "spark.sql.adaptive.advisoryPartitionSizeInBytes": "128m",
+        },
+    },
+}
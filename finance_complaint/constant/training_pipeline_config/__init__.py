@@ -1,4 +1,11 @@
 import os
 
 PIPELINE_NAME = "finance-complaint"
-PIPELINE_ARTIFACT_DIR = os.path.join(os.getcwd(), "finance_artifact")
\ No newline at end of file
+PIPELINE_ARTIFACT_DIR = os.path.join(os.getcwd(), "finance_artifact")
+# Per run metrics (json lines, optionally prometheus text) written to this dir under the artifact dir of the run
+METRICS_DIR_NAME = "metrics"
+METRICS_PROMETHEUS_ENABLED = os.getenv("FINANCE_METRICS_PROMETHEUS", "0") == "1"
+
+# Fingerprint and artifact of every completed stage, used to skip unchanged stages
+PIPELINE_STATE_DIR = os.path.join(PIPELINE_ARTIFACT_DIR, "pipeline_state")
+PIPELINE_MAX_PARALLEL_STAGES = 2
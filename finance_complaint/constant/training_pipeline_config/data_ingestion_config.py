@@ -7,4 +7,59 @@ DATA_INGESTION_METADATA_FILE_NAME = "meta_info.yaml"
 DATA_INGESTION_MIN_START_DATE = "2022-05-01"
 DATA_INGESTION_DATA_SOURCE_URL = f"https://www.consumerfinance.gov/data-research/consumer-complaints/search/api/v1/" \
                       f"?date_received_max=<todate>&date_received_min=<fromdate>" \
-                      f"&field=all&format=json"
\ No newline at end of file
+                      f"&field=all&format=json"
+# Concurrent download settings
+DATA_INGESTION_N_WORKERS = 4
+DATA_INGESTION_MAX_REQUESTS_PER_SECOND = 2.0
+DATA_INGESTION_REQUEST_TIMEOUT_SECONDS = 300
+DATA_INGESTION_RETRY_BACKOFF_SECONDS = 2
+DATA_INGESTION_MAX_RETRY_BACKOFF_SECONDS = 120
+DATA_INGESTION_DOWNLOAD_REPORT_FILE_NAME = "download_report.json"
+
+# Streaming download settings
+DATA_INGESTION_STREAM_DOWNLOAD = True
+DATA_INGESTION_COMPRESS_DOWNLOAD = False
+DATA_INGESTION_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Parquet conversion settings
+DATA_INGESTION_PARQUET_TARGET_FILE_SIZE_MB = 128
+# rough size ratio between the raw json and the snappy parquet written from it
+DATA_INGESTION_JSON_TO_PARQUET_RATIO = 8
+DATA_INGESTION_SCHEMA_FILE_NAME = "_schema.json"
+
+# Feature store layout, partitioned by the year/month of date_received
+DATA_INGESTION_PARTITION_COLUMNS = ["year", "month"]
+DATA_INGESTION_STAGING_DIR = "_staging"
+# records without a parsable date_received have no partition, they are set aside in the run's ingestion dir
+DATA_INGESTION_UNDATED_DIR = "undated_complaints"
+
+# Adaptive interval planning
+DATA_INGESTION_ADAPTIVE_INTERVALS = True
+DATA_INGESTION_TARGET_RECORDS_PER_REQUEST = 5000
+# a response with this many records is treated as cut off by the api and its window is split
+DATA_INGESTION_MAX_RECORDS_PER_REQUEST = 10000
+DATA_INGESTION_MAX_WINDOW_DAYS = 366
+DATA_INGESTION_DEFAULT_RECORDS_PER_DAY = 3000
+# days never downloaded before are estimated from this many latest known days
+DATA_INGESTION_PLANNER_RECENT_DAYS = 28
+
+# Download cache shared by all the runs
+DATA_INGESTION_DOWNLOAD_CACHE_DIR = "download_cache"
+DATA_INGESTION_DOWNLOAD_CACHE_MAX_SIZE_MB = 10 * 1024
+# windows ending this many days ago or earlier are not expected to change any more
+DATA_INGESTION_CACHE_CLOSED_AFTER_DAYS = 30
+
+# Per window checkpoints of the run in progress
+DATA_INGESTION_CHECKPOINT_FILE_NAME = "ingestion_checkpoint.sqlite"
+
+# Raw landing format of every downloaded window: "json" (as sent by the api), "parquet" or "arrow" (ipc file).
+# parquet and arrow records are cast to the schema types while they are written
+DATA_INGESTION_LANDING_FORMAT = "json"
+# zstd or snappy for parquet, zstd or lz4 for arrow
+DATA_INGESTION_LANDING_COMPRESSION = "zstd"
+# records per row group / record batch of a landed file
+DATA_INGESTION_LANDING_BATCH_SIZE = 10000
+# arrow landing files are rewritten to parquet in this dir of the download dir, spark 3.2 can't read arrow ipc
+DATA_INGESTION_ARROW_LANDING_DIR = "_arrow_landing"
+# columns kept at ingestion, None keeps every column of the schema (complaint_id and date_received are always kept)
+DATA_INGESTION_PROJECTED_COLUMNS = None
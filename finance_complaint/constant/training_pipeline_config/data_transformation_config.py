@@ -0,0 +1,14 @@
+DATA_TRANSFORMATION_DIR = "data_transformation"
+DATA_TRANSFORMATION_TRANSFORMER_DIR = "transformer"
+DATA_TRANSFORMATION_FEATURES_DIR = "features"
+DATA_TRANSFORMATION_MANIFEST_FILE_NAME = "transformed_partitions.yaml"
+DATA_TRANSFORMATION_TARGET_COLUMN = "consumer_disputed"
+DATA_TRANSFORMATION_LABEL_COLUMN = "label"
+DATA_TRANSFORMATION_FEATURES_COLUMN = "features"
+DATA_TRANSFORMATION_NUM_TEXT_FEATURES = 2 ** 18
+# the transformer is refitted once this share of the partitions wasn't seen when it was fitted
+DATA_TRANSFORMATION_REFIT_RATIO = 0.25
+# complaints go to the test split by a hash of their complaint_id, the transformer is fitted on the train split only
+DATA_TRANSFORMATION_SPLIT_COLUMN = "is_test"
+DATA_TRANSFORMATION_TEST_SIZE = 0.2
+DATA_TRANSFORMATION_RANDOM_SEED = 42
@@ -0,0 +1,9 @@
+DATA_VALIDATION_DIR = "data_validation"
+DATA_VALIDATION_ACCEPTED_DIR = "accepted"
+DATA_VALIDATION_QUARANTINE_DIR = "quarantine"
+DATA_VALIDATION_MANIFEST_FILE_NAME = "validated_partitions.yaml"
+DATA_VALIDATION_REPORT_FILE_NAME = "validation_report.yaml"
+# columns with more nulls than this are reported as null heavy
+DATA_VALIDATION_MAX_NULL_RATIO = 0.5
+# number of most frequent values kept per categorical column in the report
+DATA_VALIDATION_TOP_CATEGORIES = 20
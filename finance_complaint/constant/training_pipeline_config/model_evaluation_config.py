@@ -0,0 +1,4 @@
+MODEL_EVALUATION_DIR = "model_evaluation"
+MODEL_EVALUATION_REPORT_FILE_NAME = "evaluation_report.yaml"
+# a trained model replaces the pushed one when its metric is better by at least this much
+MODEL_EVALUATION_THRESHOLD = 0.002
@@ -0,0 +1,7 @@
+MODEL_TRAINER_DIR = "model_trainer"
+MODEL_TRAINER_TRAINED_MODEL_DIR = "trained_model"
+MODEL_TRAINER_TEST_DATA_DIR = "test_data"
+MODEL_TRAINER_MAX_ITER = 50
+MODEL_TRAINER_REG_PARAM = 0.01
+MODEL_TRAINER_ELASTIC_NET_PARAM = 0.0
+MODEL_TRAINER_METRIC_NAME = "areaUnderROC"
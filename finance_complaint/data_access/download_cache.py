@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from collections import namedtuple
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.utils import link_or_copy
+
+DownloadCacheEntry = namedtuple("DownloadCacheEntry", [
+    "key",
+    "url_template",
+    "from_date",
+    "to_date",
+    "file_name",
+    "checksum",
+    "n_records",
+    "size",
+    "etag",
+    "last_modified",
+    "daily_record_counts",
+    "last_access"
+])
+
+"""
+Persistent cache of downloaded windows, shared by all the ingestion runs.
+Entries are keyed by (url template, from_date, to_date) and keep the sha256 of the file,
+its record count and the ETag/Last-Modified of the response. When the cache grows over
+max_size_bytes the least recently used entries are evicted.
+"""
+class DownloadCache:
+
+    INDEX_FILE_NAME = "index.json"
+
+    def __init__(self, cache_dir: str, max_size_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.index_file_path = os.path.join(cache_dir, self.INDEX_FILE_NAME)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries = self.read_index()
+
+    @staticmethod
+    def get_key(url_template: str, from_date: str, to_date: str) -> str:
+        return hashlib.sha256(f"{url_template}|{from_date}|{to_date}".encode()).hexdigest()
+
+    @staticmethod
+    def get_checksum(file_path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(1024 * 1024), b""):
+                sha256.update(block)
+        return sha256.hexdigest()
+
+    def read_index(self) -> dict:
+        try:
+            if not os.path.exists(self.index_file_path):
+                return dict()
+            with open(self.index_file_path) as file_obj:
+                return {key: DownloadCacheEntry(**entry) for key, entry in json.load(file_obj).items()}
+        except Exception as e:
+            # a broken index only costs a re-download, don't fail the ingestion for it
+            logger.info(f"Ignoring unreadable download cache index {self.index_file_path}: {e}")
+            return dict()
+
+    def write_index(self):
+        temp_file_path = f"{self.index_file_path}.tmp"
+        with open(temp_file_path, "w") as file_obj:
+            json.dump({key: entry._asdict() for key, entry in self.entries.items()}, file_obj)
+        os.replace(temp_file_path, self.index_file_path)
+
+    def get(self, url_template: str, from_date: str, to_date: str) -> DownloadCacheEntry:
+        """
+        Returns the cached entry of the window, or None when it isn't cached or its file is gone or corrupt
+        """
+        try:
+            key = self.get_key(url_template, from_date, to_date)
+            with self._lock:
+                entry = self.entries.get(key)
+                if entry is None:
+                    return None
+                cached_file_path = os.path.join(self.cache_dir, entry.file_name)
+                if not self.is_valid_file(entry, cached_file_path):
+                    logger.info(f"Dropping corrupt cached window {entry.from_date} - {entry.to_date}")
+                    self.remove_file(entry)
+                    del self.entries[key]
+                    self.write_index()
+                    return None
+                return entry
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def is_valid_file(self, entry: DownloadCacheEntry, cached_file_path: str) -> bool:
+        """
+        The cached file is hard linked into the download dirs, so it is checked against its
+        checksum before each reuse; the size alone doesn't catch a file changed in place
+        """
+        if not os.path.exists(cached_file_path) or os.path.getsize(cached_file_path) != entry.size:
+            return False
+        return self.get_checksum(cached_file_path) == entry.checksum
+
+    def put(self, url_template: str, from_date: str, to_date: str, file_path: str, n_records: int,
+            etag: str = None, last_modified: str = None, daily_record_counts: dict = None) -> DownloadCacheEntry:
+        """
+        Stores the downloaded file of the window, hard linked when the cache is on the same file system
+        """
+        try:
+            key = self.get_key(url_template, from_date, to_date)
+            extension = os.path.basename(file_path).split(".", 1)[-1] if "." in os.path.basename(file_path) else ""
+            file_name = f"{key}.{extension}" if extension else key
+            cached_file_path = os.path.join(self.cache_dir, file_name)
+            temp_file_path = f"{cached_file_path}.tmp"
+            link_or_copy(file_path, temp_file_path)
+            os.replace(temp_file_path, cached_file_path)
+            entry = DownloadCacheEntry(key=key, url_template=url_template, from_date=from_date, to_date=to_date,
+                                       file_name=file_name, checksum=self.get_checksum(cached_file_path),
+                                       n_records=n_records, size=os.path.getsize(cached_file_path),
+                                       etag=etag, last_modified=last_modified,
+                                       daily_record_counts=dict(daily_record_counts or dict()),
+                                       last_access=time.time())
+            with self._lock:
+                previous_entry = self.entries.get(key)
+                if previous_entry is not None and previous_entry.file_name != file_name:
+                    self.remove_file(previous_entry)
+                self.entries[key] = entry
+                self.evict()
+                self.write_index()
+            return entry
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def materialize(self, entry: DownloadCacheEntry, file_path: str) -> str:
+        """
+        Links (or copies) the cached file to file_path and marks the entry as used.
+        The extension of the cached file is kept (.json or .json.gz), the final path is returned.
+        """
+        try:
+            cached_file_path = os.path.join(self.cache_dir, entry.file_name)
+            extension = entry.file_name.split(".", 1)[-1] if "." in entry.file_name else ""
+            file_name = os.path.basename(file_path).split(".", 1)[0]
+            file_path = os.path.join(os.path.dirname(file_path), f"{file_name}.{extension}" if extension else file_name)
+            link_or_copy(cached_file_path, file_path)
+            with self._lock:
+                if entry.key in self.entries:
+                    self.entries[entry.key] = self.entries[entry.key]._replace(last_access=time.time())
+                    self.write_index()
+            return file_path
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def remove_file(self, entry: DownloadCacheEntry):
+        cached_file_path = os.path.join(self.cache_dir, entry.file_name)
+        if os.path.exists(cached_file_path):
+            os.remove(cached_file_path)
+
+    def evict(self):
+        """
+        Drops the least recently used entries until the cache fits in max_size_bytes.
+        Caller holds the lock.
+        """
+        total_size = sum(entry.size for entry in self.entries.values())
+        for entry in sorted(self.entries.values(), key=lambda entry: entry.last_access):
+            if total_size <= self.max_size_bytes:
+                break
+            logger.debug(f"Evicting cached window {entry.from_date} - {entry.to_date}")
+            self.remove_file(entry)
+            del self.entries[entry.key]
+            total_size -= entry.size
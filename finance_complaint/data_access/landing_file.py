@@ -0,0 +1,171 @@
+import os
+import sys
+from finance_complaint.exception import FinanceException
+from finance_complaint.entity.schema import FinanceDataSchema
+"""
+Columnar landing of the downloaded windows. Records are projected to the configured columns,
+cast to the schema types and written with pyarrow as a compressed parquet or arrow ipc file,
+so the conversion reads typed columns instead of parsing json again.
+
+Casts: zip codes -> string (numeric codes are zero padded to 5 digits),
+booleans -> bool ("true"/"yes"/"1" and "false"/"no"/"0"), every other column -> string.
+Dates are kept as sent by the api, as in the json landing files.
+"""
+
+LANDING_FILE_EXTENSIONS = {"json": "json", "parquet": "parquet", "arrow": "arrow"}
+LANDING_COMPRESSIONS = {"parquet": ("zstd", "snappy"), "arrow": ("zstd", "lz4")}
+
+
+def get_landing_columns(projected_columns: list = None) -> list:
+    """
+    Columns kept at ingestion in schema order, complaint_id and date_received are always
+    kept as the feature store is keyed and partitioned by them
+    """
+    try:
+        schema = FinanceDataSchema()
+        if not projected_columns:
+            return schema.column_names
+        unknown_columns = set(projected_columns) - set(schema.column_names)
+        if unknown_columns:
+            raise Exception(f"Projected columns {sorted(unknown_columns)} are not in the schema")
+        required_columns = {schema.col_complaint_id, schema.col_date_received}
+        return [column for column in schema.column_names if column in set(projected_columns) | required_columns]
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def to_string(value):
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def to_zip_code(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        value = str(int(value))
+    text = str(value).strip()
+    if text.isdigit() and len(text) < 5:
+        text = text.zfill(5)
+    return text or None
+
+
+def to_boolean(value):
+    if value is None or isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "yes", "y", "1"):
+        return True
+    if text in ("false", "no", "n", "0"):
+        return False
+    return None
+
+
+def get_casts(columns: list) -> dict:
+    """
+    column -> function casting a json value to the type it is landed with
+    """
+    schema = FinanceDataSchema()
+    casts = dict()
+    for column in columns:
+        if column == schema.col_zip_code:
+            casts[column] = to_zip_code
+        elif column == schema.col_has_narrative:
+            casts[column] = to_boolean
+        else:
+            casts[column] = to_string
+    return casts
+
+
+def get_arrow_schema(columns: list):
+    import pyarrow as pa
+    schema = FinanceDataSchema()
+    return pa.schema([(column, pa.bool_() if column == schema.col_has_narrative else pa.string())
+                      for column in columns])
+
+
+def count_landing_rows(file_path: str) -> int:
+    """
+    Number of records of a parquet or arrow landing file, read from its footer
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if file_path.endswith(".parquet"):
+            return pq.read_metadata(file_path).num_rows
+        with pa.memory_map(file_path) as source:
+            reader = pa.ipc.open_file(source)
+            return sum(reader.get_batch(index).num_rows for index in range(reader.num_record_batches))
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+class LandingFileWriter:
+    """
+    Writes the _source records of one window to file_path in batches of batch_size:
+    one row group per batch for parquet, one record batch for arrow.
+
+    with LandingFileWriter(file_path, columns, "parquet", "zstd") as writer:
+        for record in records:
+            writer.write(record)
+    """
+
+    def __init__(self, file_path: str, columns: list, landing_format: str, compression: str,
+                 batch_size: int = 10000):
+        try:
+            if landing_format not in LANDING_COMPRESSIONS:
+                raise Exception(f"Unknown columnar landing format {landing_format}")
+            if compression not in LANDING_COMPRESSIONS[landing_format]:
+                raise Exception(f"{landing_format} landing supports "
+                                f"{LANDING_COMPRESSIONS[landing_format]}, not {compression}")
+        except Exception as e:
+            raise FinanceException(e, sys)
+        self.file_path = file_path
+        self.columns = columns
+        self.landing_format = landing_format
+        self.compression = compression
+        self.batch_size = batch_size
+        self.casts = get_casts(columns)
+        self.arrow_schema = get_arrow_schema(columns)
+        self.records = []
+        self.writer = None
+
+    def __enter__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.landing_format == "parquet":
+            self.writer = pq.ParquetWriter(self.file_path, self.arrow_schema, compression=self.compression)
+        else:
+            self.writer = pa.ipc.new_file(self.file_path, self.arrow_schema,
+                                          options=pa.ipc.IpcWriteOptions(compression=self.compression))
+        return self
+
+    def write(self, record: dict) -> dict:
+        """
+        Adds the projected and cast record, returns it
+        """
+        landed_record = {column: cast(record.get(column)) for column, cast in self.casts.items()}
+        self.records.append(landed_record)
+        if len(self.records) >= self.batch_size:
+            self.flush()
+        return landed_record
+
+    def flush(self):
+        import pyarrow as pa
+        if not self.records:
+            return
+        record_batch = pa.RecordBatch.from_pylist(self.records, schema=self.arrow_schema)
+        if self.landing_format == "parquet":
+            self.writer.write_table(pa.Table.from_batches([record_batch]))
+        else:
+            self.writer.write_batch(record_batch)
+        self.records = []
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self.writer.close()
+        return False
@@ -0,0 +1,191 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import track_stage, increment
+from finance_complaint.constant.data_access_config import MONGO_DB_URL, MONGO_DATABASE_NAME, MONGO_COLLECTION_NAME, \
+    MONGO_BATCH_SIZE, MONGO_N_WORKERS, MONGO_MAX_POOL_SIZE
+from finance_complaint.constant.training_pipeline_config.data_ingestion_config import DATA_INGESTION_PARTITION_COLUMNS
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact, DataTransferReport
+from finance_complaint.entity.schema import FinanceDataSchema
+from finance_complaint.utils import get_dir_size, get_partition_fingerprints
+
+
+def get_mongo_client(mongo_db_url: str = MONGO_DB_URL, max_pool_size: int = MONGO_MAX_POOL_SIZE):
+    """
+    One client per process, its connection pool is shared by all the insert threads
+    """
+    try:
+        import pymongo
+        if mongo_db_url is None:
+            raise Exception("MONGO_DB_URL is not set")
+        return pymongo.MongoClient(mongo_db_url, maxPoolSize=max_pool_size)
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+class MongoFeatureStore:
+    """
+    Bulk export of the parquet feature store to a MongoDB collection and import back to parquet.
+    Complaints are upserted with complaint_id as _id, so a complaint updated by the ingestion replaces
+    its document. The fingerprint of every exported partition is kept in <collection>_partitions and
+    only new or changed partitions are exported again. Pass client to use mongomock or an already
+    configured client.
+    """
+
+    def __init__(self, client=None, database_name: str = MONGO_DATABASE_NAME,
+                 collection_name: str = MONGO_COLLECTION_NAME, batch_size: int = MONGO_BATCH_SIZE,
+                 n_workers: int = MONGO_N_WORKERS):
+        self.client = client if client is not None else get_mongo_client()
+        self.collection = self.client[database_name][collection_name]
+        self.partitions_collection = self.client[database_name][f"{collection_name}_partitions"]
+        self.batch_size = batch_size
+        self.n_workers = n_workers
+        self.schema = FinanceDataSchema()
+
+    def get_arrow_schema(self):
+        import pyarrow as pa
+        fields = [(column, pa.bool_() if column == self.schema.col_has_narrative else pa.string())
+                  for column in self.schema.column_names]
+        fields += [(column, pa.int32()) for column in DATA_INGESTION_PARTITION_COLUMNS]
+        return pa.schema(fields)
+
+    def write_batch(self, records: list) -> tuple:
+        """
+        Unordered bulk_write of one upserting ReplaceOne per complaint.
+        Returns (n_written, n_unchanged): new or replaced documents, and documents which were already equal.
+        """
+        from pymongo import ReplaceOne
+        operations = []
+        for record in records:
+            record["_id"] = record[self.schema.col_complaint_id]
+            operations.append(ReplaceOne({"_id": record["_id"]}, record, upsert=True))
+        result = self.collection.bulk_write(operations, ordered=False)
+        return result.upserted_count + result.modified_count, result.matched_count - result.modified_count
+
+    def get_changed_partitions(self, fingerprints: dict) -> list:
+        """
+        Partitions which were never exported or whose files changed since their export.
+        The fingerprints are ignored when the collection is empty, e.g. after it was dropped.
+        """
+        if self.collection.estimated_document_count() == 0:
+            return sorted(fingerprints)
+        exported = {document["_id"]: document["fingerprint"] for document in self.partitions_collection.find()}
+        return sorted(partition for partition, fingerprint in fingerprints.items()
+                      if exported.get(partition) != fingerprint)
+
+    @staticmethod
+    def get_partition_filter(partitions: list):
+        """
+        pyarrow filter expression matching the rows of the given partitions (e.g. year=2022/month=5)
+        """
+        import pyarrow.dataset as ds
+        partition_filter = None
+        for partition in partitions:
+            expression = None
+            for part in partition.split("/"):
+                column, value = part.split("=", 1)
+                condition = ds.field(column) == int(value)
+                expression = condition if expression is None else expression & condition
+            partition_filter = expression if partition_filter is None else partition_filter | expression
+        return partition_filter
+
+    @track_stage("mongo_export")
+    def export_feature_store(self, data_ingestion_artifact: DataIngestionArtifact) -> DataTransferReport:
+        """
+        Streams the new or changed partitions of the feature store in record batches of batch_size and
+        upserts them with up to n_workers concurrent bulk_write calls. At most 2 * n_workers batches are
+        held in memory. The records of unchanged partitions and unchanged documents count as skipped.
+        """
+        try:
+            import pyarrow.dataset as ds
+            start_time = time.perf_counter()
+            feature_store_file_path = data_ingestion_artifact.feature_store_file_path
+            fingerprints = get_partition_fingerprints(feature_store_file_path, DATA_INGESTION_PARTITION_COLUMNS)
+            changed_partitions = self.get_changed_partitions(fingerprints)
+            # _ and . prefixed files (schema, staging, replaced partitions) are ignored by default
+            dataset = ds.dataset(feature_store_file_path, format="parquet", partitioning="hive")
+            n_records, n_skipped, n_bytes = 0, dataset.count_rows(), 0
+            if changed_partitions:
+                partition_filter = self.get_partition_filter(changed_partitions)
+                n_skipped -= dataset.count_rows(filter=partition_filter)
+                n_bytes = sum(get_dir_size(os.path.join(feature_store_file_path, partition))
+                              for partition in changed_partitions)
+                with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+                    running = set()
+                    for record_batch in dataset.to_batches(batch_size=self.batch_size, filter=partition_filter):
+                        if record_batch.num_rows == 0:
+                            continue
+                        if len(running) >= 2 * self.n_workers:
+                            done, running = wait(running, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                n_written, n_unchanged = future.result()
+                                n_records, n_skipped = n_records + n_written, n_skipped + n_unchanged
+                        running.add(executor.submit(self.write_batch, record_batch.to_pylist()))
+                    for future in running:
+                        n_written, n_unchanged = future.result()
+                        n_records, n_skipped = n_records + n_written, n_skipped + n_unchanged
+                # recorded once every batch is written, a failed export is done again in full
+                for partition in changed_partitions:
+                    self.partitions_collection.replace_one({"_id": partition},
+                                                           {"_id": partition, "fingerprint": fingerprints[partition]},
+                                                           upsert=True)
+
+            report = DataTransferReport(source=feature_store_file_path,
+                                        destination=f"{self.collection.database.name}.{self.collection.name}",
+                                        n_records=n_records, n_bytes=n_bytes,
+                                        seconds=time.perf_counter() - start_time, n_skipped=n_skipped)
+            increment("mongo_records_exported", n_records)
+            logger.info(f"Exported {len(changed_partitions)} of {len(fingerprints)} partitions, {n_records} records "
+                        f"({n_skipped} unchanged) to {report.destination}: "
+                        f"{report.records_per_second:.0f} records/s, {report.mb_per_second:.2f} MB/s")
+            return report
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @track_stage("mongo_import")
+    def import_feature_store(self, file_path: str) -> DataTransferReport:
+        """
+        Writes the collection to file_path as parquet partitioned by year/month,
+        reading it with a cursor of batch_size documents.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.dataset as ds
+            arrow_schema = self.get_arrow_schema()
+            projection = {column: 1 for column in arrow_schema.names}
+            projection["_id"] = 0
+            n_records = 0
+            start_time = time.perf_counter()
+
+            def iter_record_batches():
+                nonlocal n_records
+                records = []
+                for document in self.collection.find({}, projection, batch_size=self.batch_size):
+                    records.append(document)
+                    if len(records) == self.batch_size:
+                        n_records += len(records)
+                        yield pa.RecordBatch.from_pylist(records, schema=arrow_schema)
+                        records = []
+                if records:
+                    n_records += len(records)
+                    yield pa.RecordBatch.from_pylist(records, schema=arrow_schema)
+
+            partitioning = ds.partitioning(pa.schema([arrow_schema.field(column)
+                                                      for column in DATA_INGESTION_PARTITION_COLUMNS]),
+                                           flavor="hive")
+            ds.write_dataset(iter_record_batches(), file_path, schema=arrow_schema, format="parquet",
+                             partitioning=partitioning, existing_data_behavior="delete_matching")
+
+            report = DataTransferReport(source=f"{self.collection.database.name}.{self.collection.name}",
+                                        destination=file_path, n_records=n_records,
+                                        n_bytes=get_dir_size(file_path) if os.path.exists(file_path) else 0,
+                                        seconds=time.perf_counter() - start_time)
+            increment("mongo_records_imported", n_records)
+            logger.info(f"Imported {n_records} records to {file_path}: "
+                        f"{report.records_per_second:.0f} records/s, {report.mb_per_second:.2f} MB/s")
+            return report
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import track_stage, increment
+from finance_complaint.constant.data_access_config import S3_BUCKET_NAME, S3_ENDPOINT_URL, S3_ARTIFACT_PREFIX, \
+    S3_MULTIPART_THRESHOLD_MB, S3_MULTIPART_CHUNKSIZE_MB, S3_MAX_CONCURRENCY, S3_N_WORKERS
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact, DataTransferReport
+
+MB = 1024 * 1024
+
+
+def get_s3_client(endpoint_url: str = S3_ENDPOINT_URL, max_pool_connections: int = S3_N_WORKERS * S3_MAX_CONCURRENCY):
+    """
+    The client is thread safe, its connection pool is sized for every file and part in flight
+    """
+    try:
+        import boto3
+        from botocore.config import Config
+        return boto3.client("s3", endpoint_url=endpoint_url,
+                            config=Config(max_pool_connections=max_pool_connections,
+                                          retries={"max_attempts": 5, "mode": "adaptive"}))
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def get_parquet_num_rows(file_path: str) -> int:
+    """
+    Number of rows from the parquet footer, 0 for any other file
+    """
+    if not file_path.endswith(".parquet"):
+        return 0
+    import pyarrow.parquet as pq
+    return pq.read_metadata(file_path).num_rows
+
+
+class S3ArtifactSync:
+    """
+    Syncs artifact files and dirs with s3://bucket_name/prefix.
+    Files are transferred n_workers at a time, files above the multipart threshold are split in parts
+    sent max_concurrency at a time. Files whose remote copy has the same size and is not older are skipped.
+    Pass client (or endpoint_url) to use moto or a minio server.
+    """
+
+    def __init__(self, bucket_name: str = S3_BUCKET_NAME, prefix: str = S3_ARTIFACT_PREFIX, client=None,
+                 endpoint_url: str = S3_ENDPOINT_URL, n_workers: int = S3_N_WORKERS,
+                 multipart_threshold_mb: int = S3_MULTIPART_THRESHOLD_MB,
+                 multipart_chunksize_mb: int = S3_MULTIPART_CHUNKSIZE_MB, max_concurrency: int = S3_MAX_CONCURRENCY):
+        from boto3.s3.transfer import TransferConfig
+        try:
+            if bucket_name is None:
+                raise Exception("FINANCE_S3_BUCKET is not set")
+        except Exception as e:
+            raise FinanceException(e, sys)
+        self.bucket_name = bucket_name
+        self.prefix = prefix.strip("/")
+        self.client = client if client is not None else get_s3_client(endpoint_url, n_workers * max_concurrency)
+        self.n_workers = n_workers
+        self.transfer_config = TransferConfig(multipart_threshold=multipart_threshold_mb * MB,
+                                              multipart_chunksize=multipart_chunksize_mb * MB,
+                                              max_concurrency=max_concurrency, use_threads=True)
+
+    def get_key(self, *parts: str) -> str:
+        return "/".join(part.strip("/") for part in (self.prefix,) + parts if part.strip("/"))
+
+    def list_objects(self, key_prefix: str) -> dict:
+        """
+        key -> (size, last modified timestamp) of the object key_prefix or the objects under key_prefix/
+        """
+        objects = dict()
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=key_prefix):
+            for obj in page.get("Contents", []):
+                if obj["Key"] == key_prefix or obj["Key"].startswith(f"{key_prefix}/"):
+                    objects[obj["Key"]] = (obj["Size"], obj["LastModified"].timestamp())
+        return objects
+
+    @staticmethod
+    def list_files(local_path: str) -> dict:
+        """
+        relative path -> absolute path of the files under local_path, "" -> local_path for a file.
+        Spark staging dirs (_ and . prefixed) and hidden files such as .crc checksums are left out.
+        """
+        if os.path.isfile(local_path):
+            return {"": local_path}
+        files = dict()
+        for root, dir_names, file_names in os.walk(local_path):
+            dir_names[:] = [dir_name for dir_name in dir_names if not dir_name.startswith(("_", "."))]
+            for file_name in file_names:
+                if file_name.startswith("."):
+                    continue
+                file_path = os.path.join(root, file_name)
+                files[os.path.relpath(file_path, local_path).replace(os.sep, "/")] = file_path
+        return files
+
+    def upload_file(self, file_path: str, key: str) -> tuple:
+        self.client.upload_file(file_path, self.bucket_name, key, Config=self.transfer_config)
+        return get_parquet_num_rows(file_path), os.path.getsize(file_path)
+
+    def download_file(self, key: str, file_path: str) -> tuple:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # downloaded next to the target and renamed over it, so a failed download never leaves half a file
+        temp_file_path = f"{file_path}.download"
+        self.client.download_file(self.bucket_name, key, temp_file_path, Config=self.transfer_config)
+        os.replace(temp_file_path, file_path)
+        return get_parquet_num_rows(file_path), os.path.getsize(file_path)
+
+    def transfer(self, jobs: list, source: str, destination: str, n_skipped: int) -> DataTransferReport:
+        """
+        Runs (method, *args) jobs on n_workers threads, every job returns (n_records, n_bytes)
+        """
+        start_time = time.perf_counter()
+        n_records, n_bytes = 0, 0
+        with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+            for job_records, job_bytes in executor.map(lambda job: job[0](*job[1:]), jobs):
+                n_records += job_records
+                n_bytes += job_bytes
+        report = DataTransferReport(source=source, destination=destination, n_records=n_records,
+                                    n_bytes=n_bytes, seconds=time.perf_counter() - start_time,
+                                    n_skipped=n_skipped)
+        logger.info(f"Transferred {len(jobs)} files ({n_skipped} unchanged) from {source} to {destination}: "
+                    f"{report.records_per_second:.0f} records/s, {report.mb_per_second:.2f} MB/s")
+        return report
+
+    @track_stage("s3_upload")
+    def upload(self, local_path: str, key_prefix: str) -> DataTransferReport:
+        try:
+            key_prefix = self.get_key(key_prefix)
+            remote_objects = self.list_objects(key_prefix)
+            jobs, n_skipped = [], 0
+            for relative_path, file_path in self.list_files(local_path).items():
+                key = f"{key_prefix}/{relative_path}" if relative_path else key_prefix
+                stat = os.stat(file_path)
+                remote = remote_objects.get(key)
+                # LastModified has a one second resolution, a file uploaded in the second it was written
+                # would look newer than its copy forever
+                if remote is not None and remote[0] == stat.st_size and remote[1] >= int(stat.st_mtime):
+                    n_skipped += 1
+                    continue
+                jobs.append((self.upload_file, file_path, key))
+            report = self.transfer(jobs, local_path, f"s3://{self.bucket_name}/{key_prefix}", n_skipped)
+            increment("s3_bytes_uploaded", report.n_bytes)
+            return report
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @track_stage("s3_download")
+    def download(self, key_prefix: str, local_path: str) -> DataTransferReport:
+        try:
+            key_prefix = self.get_key(key_prefix)
+            jobs, n_skipped = [], 0
+            for key, (size, _) in self.list_objects(key_prefix).items():
+                relative_path = key[len(key_prefix):].strip("/")
+                file_path = os.path.join(local_path, *relative_path.split("/")) if relative_path else local_path
+                if os.path.exists(file_path) and os.path.getsize(file_path) == size:
+                    n_skipped += 1
+                    continue
+                jobs.append((self.download_file, key, file_path))
+            report = self.transfer(jobs, f"s3://{self.bucket_name}/{key_prefix}", local_path, n_skipped)
+            increment("s3_bytes_downloaded", report.n_bytes)
+            return report
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def sync_data_ingestion_artifact(self, data_ingestion_artifact: DataIngestionArtifact) -> list:
+        """
+        Uploads the feature store and the ingestion metadata, returns one report per path
+        """
+        try:
+            reports = []
+            for local_path in [data_ingestion_artifact.feature_store_file_path,
+                               data_ingestion_artifact.metadata_file_path]:
+                if local_path is not None and os.path.exists(local_path):
+                    reports.append(self.upload(local_path, os.path.basename(local_path.rstrip(os.sep))))
+            return reports
+        except Exception as e:
+            raise FinanceException(e, sys)
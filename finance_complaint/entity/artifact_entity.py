@@ -1,10 +1,135 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List
 """
 artifact objects
 """
-#Data Ingestion artifact
+#Data Ingestion artifact, is_complete is False when some windows failed and the run was not merged
 @dataclass
 class DataIngestionArtifact:
     feature_store_file_path:str
     metadata_file_path:str
     download_dir:str
+    is_complete:bool = True
+
+
+#Data export artifact, one destination per mongodb collection or s3 prefix the feature store went to
+@dataclass
+class DataExportArtifact:
+    destinations:List[str]
+    n_records:int
+    n_bytes:int
+
+
+#Data validation artifact
+@dataclass
+class DataValidationArtifact:
+    accepted_file_path:str
+    quarantine_file_path:str
+    report_file_path:str
+    validated_partitions:List[str] = field(default_factory=list)
+
+
+#Data transformation artifact
+@dataclass
+class DataTransformationArtifact:
+    transformed_file_path:str
+    transformer_file_path:str
+    transformed_partitions:List[str] = field(default_factory=list)
+    reused_partitions:List[str] = field(default_factory=list)
+
+
+#A date window which could not be downloaded even after all the retries,
+#is_window_too_large when it hit the page limit or timed out, so a smaller window may succeed
+@dataclass
+class FailedDownload:
+    url:str
+    file_path:str
+    n_attempts:int
+    status_code:int
+    error_message:str
+    is_window_too_large:bool = False
+
+
+#A window of a download_files run, source is where its records came from: api, revalidated, cache or checkpoint
+@dataclass
+class DownloadedWindow:
+    from_date:str
+    to_date:str
+    source:str
+    n_records:int
+    n_bytes:int
+    seconds:float
+
+
+#Summary of a download_files run
+@dataclass
+class DownloadReport:
+    n_windows:int
+    n_downloaded:int
+    report_file_path:str
+    failed_downloads:List[FailedDownload] = field(default_factory=list)
+    downloaded_windows:List[DownloadedWindow] = field(default_factory=list)
+
+    @property
+    def n_records(self) -> int:
+        return sum(window.n_records for window in self.downloaded_windows)
+
+    @property
+    def n_bytes(self) -> int:
+        return sum(window.n_bytes for window in self.downloaded_windows)
+
+
+#Batch prediction artifact
+@dataclass
+class PredictionArtifact:
+    prediction_file_path:str
+    model_path:str
+    scored_partitions:List[str] = field(default_factory=list)
+    skipped_partitions:List[str] = field(default_factory=list)
+
+
+#Model trainer artifact
+@dataclass
+class ModelTrainerArtifact:
+    trained_model_file_path:str
+    test_file_path:str
+    metric_name:str
+    train_metric:float
+    test_metric:float
+
+
+#Model evaluation artifact
+@dataclass
+class ModelEvaluationArtifact:
+    is_model_accepted:bool
+    trained_model_file_path:str
+    best_model_file_path:str
+    trained_model_metric:float
+    best_model_metric:float
+    report_file_path:str
+
+
+#Model pusher artifact, pushed_model_file_path is None when the trained model was not accepted
+@dataclass
+class ModelPusherArtifact:
+    pushed_model_file_path:str
+    online_model_dir:str
+
+
+#Throughput of a bulk export/import of the feature store
+@dataclass
+class DataTransferReport:
+    source:str
+    destination:str
+    n_records:int
+    n_bytes:int
+    seconds:float
+    n_skipped:int = 0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.n_records / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.n_bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
@@ -13,5 +13,84 @@ DataIngestionConfig = namedtuple(typename="DataIngestionConfig", field_names=[
     "feature_store_dir",
     "failed_dir",
     "metadata_file_path",
-    "datasource_url"
+    "datasource_url",
+    "n_workers",
+    "max_requests_per_second",
+    "stream_download",
+    "compress_download",
+    "adaptive_intervals",
+    "download_cache_dir",
+    "checkpoint_file_path",
+    "landing_format",
+    "landing_compression",
+    "projected_columns"
+])
+
+# the feature store goes to mongodb when mongo_enabled (MONGO_DB_URL is set) and to s3 when s3_bucket_name is set
+DataExportConfig = namedtuple(typename="DataExportConfig", field_names=[
+    "mongo_enabled",
+    "mongo_database_name",
+    "mongo_collection_name",
+    "s3_bucket_name",
+    "s3_prefix"
+])
+
+PredictionPipelineConfig = namedtuple(typename="PredictionPipelineConfig", field_names=[
+    "feature_store_file_path",
+    "model_dir",
+    "prediction_file_path",
+    "manifest_file_path"
+])
+
+DataValidationConfig = namedtuple(typename="DataValidationConfig", field_names=[
+    "data_validation_dir",
+    "accepted_file_path",
+    "quarantine_file_path",
+    "manifest_file_path",
+    "report_file_path",
+    "max_null_ratio",
+    "top_categories"
+])
+
+DataTransformationConfig = namedtuple(typename="DataTransformationConfig", field_names=[
+    "data_transformation_dir",
+    "transformer_dir",
+    "transformed_file_path",
+    "manifest_file_path",
+    "target_column",
+    "label_column",
+    "features_column",
+    "num_text_features",
+    "refit_ratio",
+    "split_column",
+    "test_size",
+    "random_seed"
+])
+
+ModelTrainerConfig = namedtuple(typename="ModelTrainerConfig", field_names=[
+    "model_trainer_dir",
+    "trained_model_file_path",
+    "test_file_path",
+    "label_column",
+    "features_column",
+    "split_column",
+    "max_iter",
+    "reg_param",
+    "elastic_net_param",
+    "metric_name"
+])
+
+ModelEvaluationConfig = namedtuple(typename="ModelEvaluationConfig", field_names=[
+    "model_evaluation_dir",
+    "report_file_path",
+    "model_dir",
+    "label_column",
+    "metric_name",
+    "threshold"
+])
+
+ModelPusherConfig = namedtuple(typename="ModelPusherConfig", field_names=[
+    "model_dir",
+    "online_model_dir",
+    "model_version"
 ])
@@ -1,14 +1,24 @@
 from finance_complaint.exception import FinanceException
 from finance_complaint.logger import logger
 import os,sys
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from contextlib import contextmanager
 from collections import namedtuple
 from finance_complaint.utils import read_yaml_file,write_yaml_file
-DataIngestionMetadataInfo = namedtuple("DataIngestionMetadataInfo", ["from_date", "to_date", "data_file_path"])
+DataIngestionMetadataInfo = namedtuple("DataIngestionMetadataInfo",
+                                       ["from_date", "to_date", "data_file_path", "daily_record_counts"],
+                                       defaults=[None])
+WindowCheckpointInfo = namedtuple("WindowCheckpointInfo", ["from_date", "to_date", "status", "n_records", "n_bytes",
+                                                           "file_path", "daily_record_counts"])
 
 """
 This class is to read and write meta data to a yaml file.
 This yaml file will have the from and to date to get the data from the api.
 This file will be always up to date.
+daily_record_counts keeps the number of records received per day (0 for empty days), used to plan the download windows.
 """
 class DataIngestionMetaData:
 
@@ -18,14 +28,15 @@ class DataIngestionMetaData:
     def is_metadata_file_path_exists(self):
         return os.path.exists(self.metadata_file_path)
 
-    def write_metadata_info(self,from_date:str,to_date:str,data_file_path:str):
+    def write_metadata_info(self,from_date:str,to_date:str,data_file_path:str,daily_record_counts:dict = None):
         try:
             metadata_info = DataIngestionMetadataInfo(
                 from_date = from_date,
                 to_date = to_date,
-                data_file_path = data_file_path
+                data_file_path = data_file_path,
+                daily_record_counts = daily_record_counts
             )
-            write_yaml_file(file_path=self.metadata_file_path, data=metadata_info)
+            write_yaml_file(file_path=self.metadata_file_path, data=dict(metadata_info._asdict()))
        
         except Exception as e:
             raise FinanceException(e, sys)  
@@ -37,7 +48,96 @@ class DataIngestionMetaData:
             else:
                 metadata = read_yaml_file(file_path=self.metadata_file_path)
                 metadata_info = DataIngestionMetadataInfo(**(metadata)) 
-                logger.info(metadata)
-                return metadata   
+                logger.info(f"Metadata from {metadata_info.from_date} to {metadata_info.to_date}")
+                return metadata_info
         except Exception as e:
-            raise FinanceException(e, sys)                      
\ No newline at end of file
+            raise FinanceException(e, sys)                      
+
+
+"""
+Per window checkpoints of the ingestion run in progress, kept in sqlite.
+A window is recorded as soon as its download completes (or finally fails), so an
+interrupted run can be started again and only fetches the windows which are not done.
+The checkpoints are cleared once the run has been merged into the feature store.
+"""
+class DataIngestionCheckpoint:
+
+    STATUS_DOWNLOADED = "downloaded"
+    STATUS_FAILED = "failed"
+
+    def __init__(self, checkpoint_file_path:str):
+        try:
+            self.checkpoint_file_path = checkpoint_file_path
+            self._lock = threading.Lock()
+            os.makedirs(os.path.dirname(checkpoint_file_path), exist_ok=True)
+            with self.connect() as connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS window_checkpoint (
+                        from_date TEXT NOT NULL,
+                        to_date TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        n_records INTEGER,
+                        n_bytes INTEGER,
+                        file_path TEXT,
+                        daily_record_counts TEXT,
+                        updated_at TEXT NOT NULL,
+                        PRIMARY KEY (from_date, to_date)
+                    )""")
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def connect(self):
+        # one short lived connection per call keeps it safe to use from the download workers
+        return closing_connection(sqlite3.connect(self.checkpoint_file_path, timeout=30))
+
+    def record_window(self, from_date:str, to_date:str, status:str, n_records:int = 0, n_bytes:int = 0,
+                      file_path:str = None, daily_record_counts:dict = None):
+        try:
+            with self._lock, self.connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO window_checkpoint VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (from_date, to_date, status, n_records, n_bytes, file_path,
+                     json.dumps(daily_record_counts or dict()), datetime.now().isoformat()))
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_window(self, from_date:str, to_date:str) -> WindowCheckpointInfo:
+        try:
+            with self.connect() as connection:
+                row = connection.execute(
+                    "SELECT from_date, to_date, status, n_records, n_bytes, file_path, daily_record_counts "
+                    "FROM window_checkpoint WHERE from_date = ? AND to_date = ?", (from_date, to_date)).fetchone()
+            if row is None:
+                return None
+            return WindowCheckpointInfo(*row[:-1], daily_record_counts=json.loads(row[-1] or "{}"))
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_completed_window(self, from_date:str, to_date:str) -> WindowCheckpointInfo:
+        """
+        The checkpoint of a window downloaded by an earlier attempt whose file is still there
+        """
+        window = self.get_window(from_date, to_date)
+        if window is None or window.status != self.STATUS_DOWNLOADED:
+            return None
+        if window.file_path is None or not os.path.exists(window.file_path):
+            return None
+        return window
+
+    def clear(self):
+        try:
+            with self._lock, self.connect() as connection:
+                connection.execute("DELETE FROM window_checkpoint")
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+@contextmanager
+def closing_connection(connection:sqlite3.Connection):
+    # commits on success, rolls back on error and always closes
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
@@ -0,0 +1,80 @@
+from typing import List
+"""
+Schema of the complaint records (_source of the api response).
+Bump the version whenever a field is added, removed or changes type.
+"""
+
+
+class FinanceDataSchema:
+
+    version = "1"
+
+    def __init__(self):
+        self.col_company_response: str = 'company_response'
+        self.col_consumer_consent_provided: str = 'consumer_consent_provided'
+        self.col_submitted_via = 'submitted_via'
+        self.col_timely: str = 'timely'
+        self.col_company: str = 'company'
+        self.col_issue: str = 'issue'
+        self.col_product: str = 'product'
+        self.col_state: str = 'state'
+        self.col_zip_code: str = 'zip_code'
+        self.col_consumer_disputed: str = 'consumer_disputed'
+        self.col_date_sent_to_company: str = "date_sent_to_company"
+        self.col_date_received: str = "date_received"
+        self.col_complaint_id: str = "complaint_id"
+        self.col_sub_product: str = "sub_product"
+        self.col_complaint_what_happened: str = "complaint_what_happened"
+        self.col_company_public_response: str = "company_public_response"
+        self.col_sub_issue: str = "sub_issue"
+        self.col_tags: str = "tags"
+        self.col_has_narrative: str = "has_narrative"
+
+    @property
+    def string_columns(self) -> List[str]:
+        return [
+            self.col_product, self.col_complaint_what_happened, self.col_date_sent_to_company,
+            self.col_issue, self.col_sub_product, self.col_zip_code, self.col_tags,
+            self.col_complaint_id, self.col_timely, self.col_consumer_consent_provided,
+            self.col_company_response, self.col_submitted_via, self.col_company,
+            self.col_date_received, self.col_state, self.col_consumer_disputed,
+            self.col_company_public_response, self.col_sub_issue,
+        ]
+
+    @property
+    def dataframe_schema(self) -> "StructType":
+        """
+        Explicit schema used to read the downloaded json, so spark doesn't have
+        to scan the files to infer it and every window gets the same columns
+        """
+        from pyspark.sql.types import StructType, StructField, StringType, BooleanType
+        fields = [StructField(column, StringType(), True) for column in self.string_columns]
+        fields.append(StructField(self.col_has_narrative, BooleanType(), True))
+        return StructType(fields)
+
+    @property
+    def column_names(self) -> List[str]:
+        # same order as dataframe_schema, without importing pyspark
+        return self.string_columns + [self.col_has_narrative]
+
+    @property
+    def categorical_columns(self) -> List[str]:
+        """
+        Low cardinality columns used as one hot encoded features
+        """
+        return [self.col_product, self.col_issue, self.col_company, self.col_state, self.col_submitted_via,
+                self.col_company_response, self.col_timely, self.col_consumer_consent_provided]
+
+    @property
+    def feature_input_columns(self) -> List[str]:
+        """
+        Columns read by the feature pipeline, categorical columns and the complaint narrative
+        """
+        return self.categorical_columns + [self.col_complaint_what_happened]
+
+    def fill_missing_feature_inputs(self, dataframe: "DataFrame") -> "DataFrame":
+        """
+        Missing feature inputs become "", the tokenizer fails on null text.
+        Used before fitting and before every scoring so training and prediction see the same inputs.
+        """
+        return dataframe.fillna("", subset=self.feature_input_columns)
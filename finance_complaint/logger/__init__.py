@@ -1,28 +1,115 @@
 import logging
-from datetime import datetime
 import os
-import pandas as pd
+import copy
+import json
+import queue
+import atexit
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from finance_complaint.constant import TIMESTAMP
-import shutil
+"""
+Records are put on a queue by the calling thread and written to the log file by a listener thread,
+so download workers and spark callbacks never wait on file I/O. Nothing is created at import:
+the log dir, the rotating file handler and the listener are set up by the first record.
+FINANCE_LOG_JSON=1 writes one json object per line instead of the text format.
+"""
 LOG_DIR = "logs"
+LOG_LEVEL = os.getenv("FINANCE_LOG_LEVEL", "INFO").upper()
+LOG_JSON = os.getenv("FINANCE_LOG_JSON", "0").lower() in ("1", "true", "yes")
+# every log file is rotated at LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT older files of the run
+LOG_MAX_BYTES = int(os.getenv("FINANCE_LOG_MAX_BYTES", 50 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("FINANCE_LOG_BACKUP_COUNT", 5))
+LOG_FORMAT = '[%(asctime)s] \t%(levelname)s \t%(lineno)d \t%(filename)s \t%(funcName)s() \t%(message)s'
 
 
 def get_log_file_name():
-    return f"log_{TIMESTAMP}.log"
+    return f"log_{TIMESTAMP}.jsonl" if LOG_JSON else f"log_{TIMESTAMP}.log"
 
 
 LOG_FILE_NAME = get_log_file_name()
 
-if os.path.exists(LOG_DIR):
-    shutil.rmtree(LOG_DIR)
-os.makedirs(LOG_DIR, exist_ok=True)
-
 LOG_FILE_PATH = os.path.join(LOG_DIR, LOG_FILE_NAME)
 
-logging.basicConfig(filename=LOG_FILE_PATH,
-                    filemode="w",
-                    format='[%(asctime)s] \t%(levelname)s \t%(lineno)d \t%(filename)s \t%(funcName)s() \t%(message)s',
-                    level=logging.INFO
-                    )
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "function": record.funcName,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Starts the listener writing the queue to LOG_FILE_PATH when the first record is emitted.
+    Once the listener is stopped at exit, records are written by the calling thread instead.
+    """
+
+    def __init__(self):
+        super().__init__(queue.SimpleQueue())
+        self.listener = None
+        self.file_handler = None
+        self.is_stopped = False
+        self._lock = threading.Lock()
+        # registered at import, before the modules which log through it register their exit hooks,
+        # so it runs after them and the records they log at exit are written too
+        atexit.register(self.stop_listener)
+
+    def get_file_handler(self) -> RotatingFileHandler:
+        if self.file_handler is None:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            self.file_handler = RotatingFileHandler(LOG_FILE_PATH, maxBytes=LOG_MAX_BYTES,
+                                                    backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True)
+            self.file_handler.setFormatter(JsonFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT))
+        return self.file_handler
+
+    def start_listener(self):
+        with self._lock:
+            if self.listener is not None or self.is_stopped:
+                return
+            self.listener = QueueListener(self.queue, self.get_file_handler(), respect_handler_level=True)
+            self.listener.start()
+
+    def stop_listener(self):
+        """
+        Writes what is still queued and stops the listener thread, it is not started again
+        """
+        with self._lock:
+            self.is_stopped = True
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the json formatter needs the exception apart from the message, only the message is formatted here
+        if LOG_JSON:
+            record = copy.copy(record)
+            record.msg = record.getMessage()
+            record.args = None
+            return record
+        return super().prepare(record)
+
+    def emit(self, record: logging.LogRecord):
+        if self.listener is None:
+            self.start_listener()
+        if self.is_stopped:
+            with self._lock:
+                self.get_file_handler().handle(self.prepare(record))
+            return
+        super().emit(record)
+
 
 logger = logging.getLogger("FinanceComplaint")
+logger.setLevel(LOG_LEVEL)
+logger.addHandler(LazyQueueHandler())
+logger.propagate = False
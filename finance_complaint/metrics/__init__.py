@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import time
+import resource
+import functools
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from finance_complaint.constant import TIMESTAMP
+from finance_complaint.constant.training_pipeline_config import PIPELINE_ARTIFACT_DIR, METRICS_DIR_NAME, \
+    METRICS_PROMETHEUS_ENABLED
+"""
+Per run instrumentation of the pipeline stages.
+
+    with track_stage("convert_files_to_parquet"):
+        ...
+    @track_stage("download_files")
+    def download_files(...): ...
+    increment("download_bytes", n_bytes)
+
+Every finished stage is appended as one json line to metrics_<TIMESTAMP>.jsonl under the metrics dir
+of the artifact dir (set_artifact_dir, called by the pipeline configs) with its duration, status,
+peak RSS and the counters incremented while it ran.
+With METRICS_PROMETHEUS_ENABLED the aggregated values are also written in the prometheus text format.
+"""
+
+
+def get_peak_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on linux and in bytes on mac
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+class PipelineMetrics:
+
+    def __init__(self, run_id: str = TIMESTAMP,
+                 metrics_dir: str = os.path.join(PIPELINE_ARTIFACT_DIR, METRICS_DIR_NAME),
+                 prometheus_enabled: bool = METRICS_PROMETHEUS_ENABLED):
+        self.run_id = run_id
+        self.metrics_dir = metrics_dir
+        self.prometheus_enabled = prometheus_enabled
+        self.counters = defaultdict(float)
+        # stage name -> aggregated count, seconds and failures over the run
+        self.stage_totals = defaultdict(lambda: {"count": 0, "seconds": 0.0, "failures": 0})
+        self._lock = threading.Lock()
+
+    @property
+    def json_lines_file_path(self) -> str:
+        return os.path.join(self.metrics_dir, f"metrics_{self.run_id}.jsonl")
+
+    @property
+    def prometheus_file_path(self) -> str:
+        return os.path.join(self.metrics_dir, f"metrics_{self.run_id}.prom")
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    @contextmanager
+    def track_stage(self, stage_name: str, **labels):
+        """
+        Times the block and records the counters incremented while it ran.
+        Counters are global, so stages running at the same time share their deltas.
+        """
+        with self._lock:
+            start_counters = dict(self.counters)
+        start_time = time.perf_counter()
+        started_at = datetime.now().isoformat()
+        status = "success"
+        try:
+            yield self
+        except BaseException:
+            status = "failed"
+            raise
+        finally:
+            seconds = time.perf_counter() - start_time
+            with self._lock:
+                counters = {name: value - start_counters.get(name, 0) for name, value in self.counters.items()
+                            if value != start_counters.get(name, 0)}
+                totals = self.stage_totals[stage_name]
+                totals["count"] += 1
+                totals["seconds"] += seconds
+                totals["failures"] += status == "failed"
+            self.write_event({
+                "run_id": self.run_id,
+                "stage": stage_name,
+                "labels": labels,
+                "status": status,
+                "started_at": started_at,
+                "seconds": seconds,
+                "peak_rss_bytes": get_peak_rss_bytes(),
+                "counters": counters,
+            })
+
+    def write_event(self, event: dict):
+        with self._lock:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            with open(self.json_lines_file_path, "a") as file_obj:
+                file_obj.write(json.dumps(event, default=str) + "\n")
+            if self.prometheus_enabled:
+                self.write_prometheus_text()
+
+    def to_prometheus_text(self) -> str:
+        lines = [
+            "# TYPE finance_stage_runs_total counter",
+            "# TYPE finance_stage_seconds_total counter",
+            "# TYPE finance_stage_failures_total counter",
+        ]
+        for stage_name, totals in sorted(self.stage_totals.items()):
+            label = f'{{run_id="{self.run_id}",stage="{stage_name}"}}'
+            lines.append(f"finance_stage_runs_total{label} {totals['count']}")
+            lines.append(f"finance_stage_seconds_total{label} {totals['seconds']:.6f}")
+            lines.append(f"finance_stage_failures_total{label} {totals['failures']}")
+        lines.append("# TYPE finance_counter_total counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'finance_counter_total{{run_id="{self.run_id}",name="{name}"}} {value}')
+        lines.append("# TYPE finance_peak_rss_bytes gauge")
+        lines.append(f'finance_peak_rss_bytes{{run_id="{self.run_id}"}} {get_peak_rss_bytes()}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_text(self):
+        # written to a temp file and renamed, so a scraper never reads half a file
+        temp_file_path = f"{self.prometheus_file_path}.tmp"
+        with open(temp_file_path, "w") as file_obj:
+            file_obj.write(self.to_prometheus_text())
+        os.replace(temp_file_path, self.prometheus_file_path)
+
+
+pipeline_metrics = PipelineMetrics()
+
+
+class track_stage:
+    """
+    Context manager and decorator around PipelineMetrics.track_stage of the run wide pipeline_metrics
+    """
+
+    def __init__(self, stage_name: str, **labels):
+        self.stage_name = stage_name
+        self.labels = labels
+        self._context = None
+
+    def __enter__(self):
+        self._context = pipeline_metrics.track_stage(self.stage_name, **self.labels)
+        return self._context.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._context.__exit__(*exc_info)
+
+    def __call__(self, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with pipeline_metrics.track_stage(self.stage_name, **self.labels):
+                return function(*args, **kwargs)
+        return wrapper
+
+
+def increment(name: str, value: float = 1):
+    pipeline_metrics.increment(name, value)
+
+
+def set_artifact_dir(artifact_dir: str):
+    """
+    Writes the metrics of the run next to its artifacts, in the metrics dir under artifact_dir
+    """
+    pipeline_metrics.metrics_dir = os.path.join(artifact_dir, METRICS_DIR_NAME)
@@ -0,0 +1,100 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import track_stage
+from finance_complaint.constant.training_pipeline_config import PIPELINE_STATE_DIR
+from finance_complaint.entity.config_entity import DataExportConfig
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact, DataExportArtifact
+import os,sys
+import json
+#load the artifact of the last successful data ingestion from the pipeline state
+#bulk insert the feature store into mongodb (MONGO_DB_URL)
+#upload the feature store and the ingestion metadata to s3 (FINANCE_S3_BUCKET)
+#the training pipeline runs the same export as a stage next to data validation
+
+
+def load_data_ingestion_artifact(state_dir: str = PIPELINE_STATE_DIR) -> DataIngestionArtifact:
+    try:
+        state_file_path = os.path.join(state_dir, "data_ingestion.json")
+        if not os.path.exists(state_file_path):
+            raise Exception(f"No data ingestion has completed yet, {state_file_path} is missing")
+        with open(state_file_path) as file_obj:
+            return DataIngestionArtifact(**json.load(file_obj)["artifact"])
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+class DataExportPipeline:
+    """
+    mongo_feature_store and s3_artifact_sync are optional, the exports without one are skipped
+    """
+
+    def __init__(self, data_ingestion_artifact: DataIngestionArtifact, mongo_feature_store=None,
+                 s3_artifact_sync=None):
+        logger.info(f"{'>>' * 20}Starting data export.{'<<' * 20}")
+        self.data_ingestion_artifact = data_ingestion_artifact
+        self.mongo_feature_store = mongo_feature_store
+        self.s3_artifact_sync = s3_artifact_sync
+
+    def start(self) -> list:
+        try:
+            reports = []
+            if self.mongo_feature_store is not None:
+                reports.append(self.mongo_feature_store.export_feature_store(self.data_ingestion_artifact))
+            if self.s3_artifact_sync is not None:
+                reports.extend(self.s3_artifact_sync.sync_data_ingestion_artifact(self.data_ingestion_artifact))
+            for report in reports:
+                logger.info(f"{report.source} -> {report.destination}: {report.n_records} records, "
+                            f"{report.n_bytes} bytes in {report.seconds:.1f}s "
+                            f"({report.records_per_second:.0f} records/s, {report.mb_per_second:.2f} MB/s)")
+            return reports
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @track_stage("data_export")
+    def initiate_data_export(self) -> DataExportArtifact:
+        try:
+            reports = self.start()
+            data_export_artifact = DataExportArtifact(destinations=[report.destination for report in reports],
+                                                      n_records=sum(report.n_records for report in reports),
+                                                      n_bytes=sum(report.n_bytes for report in reports))
+            logger.info(f"Data export artifact: {data_export_artifact}")
+            return data_export_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+def get_data_export_pipeline(data_export_config: DataExportConfig,
+                             data_ingestion_artifact: DataIngestionArtifact) -> DataExportPipeline:
+    """
+    Export pipeline with the destinations enabled in the config
+    """
+    try:
+        mongo_feature_store, s3_artifact_sync = None, None
+        if data_export_config.mongo_enabled:
+            from finance_complaint.data_access.mongo_feature_store import MongoFeatureStore
+            mongo_feature_store = MongoFeatureStore(database_name=data_export_config.mongo_database_name,
+                                                    collection_name=data_export_config.mongo_collection_name)
+        if data_export_config.s3_bucket_name is not None:
+            from finance_complaint.data_access.s3_artifact_sync import S3ArtifactSync
+            s3_artifact_sync = S3ArtifactSync(bucket_name=data_export_config.s3_bucket_name,
+                                              prefix=data_export_config.s3_prefix)
+        if mongo_feature_store is None and s3_artifact_sync is None:
+            logger.info("Neither MONGO_DB_URL nor FINANCE_S3_BUCKET is set, nothing to export")
+        return DataExportPipeline(data_ingestion_artifact=data_ingestion_artifact,
+                                  mongo_feature_store=mongo_feature_store, s3_artifact_sync=s3_artifact_sync)
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def main():
+    from finance_complaint.config.pipeline.training import FinanceConfig
+    data_ingestion_artifact = load_data_ingestion_artifact()
+    get_data_export_pipeline(FinanceConfig().get_data_export_config(), data_ingestion_artifact).start()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+
+    except Exception as e:
+        logger.exception(e)
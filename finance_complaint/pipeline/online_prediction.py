@@ -0,0 +1,215 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.constant.prediction_pipeline_config import ONLINE_MODEL_SAVED_DIR, ONLINE_PREDICTION_HOST, \
+    ONLINE_PREDICTION_PORT, ONLINE_PREDICTION_MAX_BATCH_SIZE, ONLINE_PREDICTION_MAX_BATCH_WAIT_MS, \
+    ONLINE_PREDICTION_MAX_BODY_BYTES
+from finance_complaint.component.prediction.online_scorer import OnlineScorer
+from finance_complaint.component.prediction.model_export import export_latest_model
+import os,sys
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+#load the numpy export of the latest model once at startup
+#accept requests on an asyncio http server
+#micro batch the concurrent requests into one vectorized scoring call
+#
+#POST /predict  {"product": ..., "issue": ...}  or  {"instances": [{...}, {...}]}
+#GET  /health, GET /stats
+
+
+class MicroBatcher:
+    """
+    Collects the records of concurrent requests and scores them together.
+    A batch is closed when it has max_batch_size records or max_wait_ms passed after its first record;
+    while a batch is being scored the next one keeps filling up.
+    When the batch fails its records are scored one by one, so a bad record only fails its own request.
+    """
+
+    def __init__(self, scorer: OnlineScorer, max_batch_size: int = ONLINE_PREDICTION_MAX_BATCH_SIZE,
+                 max_wait_ms: float = ONLINE_PREDICTION_MAX_BATCH_WAIT_MS):
+        self.scorer = scorer
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.queue = None
+        # scoring is numpy/cpu bound, one thread keeps it off the event loop
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scorer")
+        self.n_records = 0
+        self.n_batches = 0
+
+    async def submit(self, records: list) -> list:
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in records]
+        for record, future in zip(records, futures):
+            self.queue.put_nowait((record, future))
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    def score_one_by_one(self, records: list) -> list:
+        """
+        Result of each record, or the exception it failed with
+        """
+        results = list()
+        for record in records:
+            try:
+                results.append(self.scorer.score_batch([record])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def drain(self, batch: list):
+        while len(batch) < self.max_batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+    async def run(self):
+        self.queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            self.drain(batch)
+            if len(batch) < self.max_batch_size and self.max_wait_seconds > 0:
+                await asyncio.sleep(self.max_wait_seconds)
+                self.drain(batch)
+            records = [record for record, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.scorer.score_batch, records)
+            except Exception:
+                results = await loop.run_in_executor(self.executor, self.score_one_by_one, records)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self.n_records += len(batch)
+            self.n_batches += 1
+
+
+class OnlinePredictionServer:
+
+    def __init__(self, scorer: OnlineScorer, host: str = ONLINE_PREDICTION_HOST, port: int = ONLINE_PREDICTION_PORT,
+                 max_batch_size: int = ONLINE_PREDICTION_MAX_BATCH_SIZE,
+                 max_wait_ms: float = ONLINE_PREDICTION_MAX_BATCH_WAIT_MS,
+                 max_body_bytes: int = ONLINE_PREDICTION_MAX_BODY_BYTES):
+        self.scorer = scorer
+        self.host = host
+        self.port = port
+        self.max_body_bytes = max_body_bytes
+        self.batcher = MicroBatcher(scorer, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.n_requests = 0
+
+    @staticmethod
+    def normalize_instance(instance: dict) -> dict:
+        """
+        Non string values are kept as their json text, which is what spark reads into the string columns
+        """
+        return {key: value if value is None or isinstance(value, str) else json.dumps(value)
+                for key, value in instance.items()}
+
+    async def route(self, method: str, path: str, body: bytes):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok", "model_path": self.scorer.model_path}
+        if method == "GET" and path == "/stats":
+            return 200, {"requests": self.n_requests, "records": self.batcher.n_records,
+                         "batches": self.batcher.n_batches,
+                         "mean_batch_size": self.batcher.n_records / self.batcher.n_batches
+                         if self.batcher.n_batches else 0}
+        if method == "POST" and path == "/predict":
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                return 400, {"error": f"Invalid json: {e}"}
+            self.n_requests += 1
+            is_batch = isinstance(payload, dict) and isinstance(payload.get("instances"), list)
+            instances = payload["instances"] if is_batch else [payload]
+            invalid_instances = [index for index, instance in enumerate(instances) if not isinstance(instance, dict)]
+            if invalid_instances:
+                return 400, {"error": "Expected a complaint object or {\"instances\": [...]} of complaint objects",
+                             "invalid_instances": invalid_instances}
+            try:
+                predictions = await self.batcher.submit([self.normalize_instance(instance) for instance in instances])
+            except Exception as e:
+                return 422, {"error": str(e)}
+            return 200, ({"predictions": predictions} if is_batch else predictions[0])
+        return 404, {"error": f"No route for {method} {path}"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = dict()
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                content_length = int(headers.get("content-length", 0))
+                if content_length > self.max_body_bytes:
+                    # the body is left unread, so the connection can't be reused
+                    await self.write_response(writer, 413, {"error": f"Body over {self.max_body_bytes} bytes"},
+                                              keep_alive=False)
+                    break
+                body = await reader.readexactly(content_length)
+
+                status, payload = await self.route(method, path.split("?", 1)[0], body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self.write_response(writer, status, payload, keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def write_response(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool):
+        response_body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(response_body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + response_body)
+        await writer.drain()
+
+    async def serve(self):
+        batcher_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        logger.info(f"Online prediction server listening on {self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+
+
+def load_scorer(online_model_dir: str = ONLINE_MODEL_SAVED_DIR) -> OnlineScorer:
+    """
+    Loads the numpy export of the latest pushed model, exporting it first when it doesn't exist yet
+    (the only time spark is needed)
+    """
+    try:
+        export_dir = export_latest_model(online_model_dir=online_model_dir)
+        logger.info(f"Loading online model from {export_dir}")
+        return OnlineScorer(export_dir=export_dir)
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def main():
+    scorer = load_scorer()
+    server = OnlinePredictionServer(scorer=scorer)
+    asyncio.run(server.serve())
+
+
+if __name__ == "__main__":
+    try:
+        main()
+
+    except Exception as e:
+        logger.exception(e)
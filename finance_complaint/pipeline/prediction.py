@@ -0,0 +1,131 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import track_stage, increment
+from finance_complaint.config.pipeline.prediction import PredictionConfig
+from finance_complaint.config.spark_manager import get_spark_session
+from finance_complaint.constant.prediction_pipeline_config import PREDICTION_COLUMN_NAME, \
+    PREDICTION_PROBABILITY_COLUMN_NAME
+from finance_complaint.constant.training_pipeline_config.data_ingestion_config import DATA_INGESTION_PARTITION_COLUMNS
+from finance_complaint.entity.config_entity import PredictionPipelineConfig
+from finance_complaint.entity.artifact_entity import PredictionArtifact
+from finance_complaint.entity.schema import FinanceDataSchema
+from finance_complaint.utils import get_partition_fingerprints, get_latest_model_path, read_yaml_file, write_yaml_file
+import os,sys
+#read the feature store partitions
+#keep the ones not scored yet by the latest model
+#score them with the persisted PipelineModel
+#write the predictions partitioned by year/month
+#update the manifest of scored partitions
+
+
+class PredictionPipeline:
+
+    def __init__(self, prediction_pipeline_config: PredictionPipelineConfig):
+        logger.info(f"{'>>' * 20}Starting batch prediction.{'<<' * 20}")
+        self.prediction_pipeline_config = prediction_pipeline_config
+        self.schema = FinanceDataSchema()
+
+    def read_manifest(self) -> dict:
+        """
+        partition -> fingerprint of the feature store partition and model it was scored with
+        """
+        try:
+            if not os.path.exists(self.prediction_pipeline_config.manifest_file_path):
+                return dict()
+            return read_yaml_file(file_path=self.prediction_pipeline_config.manifest_file_path) or dict()
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_unscored_partitions(self, model_path: str) -> dict:
+        """
+        Feature store partitions which are new, changed since they were scored,
+        or were scored by an older model. Returns partition -> fingerprint.
+        """
+        try:
+            fingerprints = get_partition_fingerprints(self.prediction_pipeline_config.feature_store_file_path,
+                                                      DATA_INGESTION_PARTITION_COLUMNS)
+            manifest = self.read_manifest()
+            unscored_partitions = dict()
+            for partition, fingerprint in fingerprints.items():
+                scored = manifest.get(partition)
+                if scored is None or scored["fingerprint"] != fingerprint or scored["model_path"] != model_path:
+                    unscored_partitions[partition] = fingerprint
+            logger.info(f"{len(unscored_partitions)} of {len(fingerprints)} partitions to score")
+            return unscored_partitions
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def predict(self, dataframe: "DataFrame", model_path: str) -> "DataFrame":
+        """
+        Distributed scoring with the persisted PipelineModel.
+        Keeps the input columns plus the predicted label and the probability of a dispute.
+        Missing feature inputs are filled with "" as in training, so they are "" in the output too.
+        """
+        try:
+            from pyspark.ml import PipelineModel
+            from pyspark.ml.functions import vector_to_array
+            from pyspark.sql import functions as F
+            model = PipelineModel.load(model_path)
+            dataframe = self.schema.fill_missing_feature_inputs(dataframe)
+            input_columns = dataframe.columns
+            prediction_df = model.transform(dataframe)
+            return prediction_df.select(
+                *input_columns,
+                F.col(PREDICTION_COLUMN_NAME),
+                vector_to_array(F.col("probability"))[1].alias(PREDICTION_PROBABILITY_COLUMN_NAME))
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @track_stage("batch_prediction")
+    def start_prediction(self) -> PredictionArtifact:
+        try:
+            model_path = get_latest_model_path(self.prediction_pipeline_config.model_dir)
+            if model_path is None:
+                raise Exception(f"No model found in {self.prediction_pipeline_config.model_dir}")
+
+            unscored_partitions = self.get_unscored_partitions(model_path)
+            prediction_file_path = self.prediction_pipeline_config.prediction_file_path
+            manifest = self.read_manifest()
+            skipped_partitions = sorted(set(manifest) - set(unscored_partitions))
+            if unscored_partitions:
+                feature_store_file_path = self.prediction_pipeline_config.feature_store_file_path
+                partition_paths = [os.path.join(feature_store_file_path, partition)
+                                   for partition in sorted(unscored_partitions)]
+                # basePath keeps year/month as columns when reading single partitions
+                dataframe = get_spark_session().read.option("basePath", feature_store_file_path).parquet(*partition_paths)
+                prediction_df = self.predict(dataframe, model_path)
+
+                # dynamic overwrite only replaces the partitions present in prediction_df
+                (prediction_df.write.mode("overwrite")
+                 .option("partitionOverwriteMode", "dynamic")
+                 .partitionBy(*DATA_INGESTION_PARTITION_COLUMNS)
+                 .parquet(prediction_file_path))
+                increment("prediction_partitions_scored", len(unscored_partitions))
+
+                for partition, fingerprint in unscored_partitions.items():
+                    manifest[partition] = {"fingerprint": fingerprint, "model_path": model_path}
+                write_yaml_file(file_path=self.prediction_pipeline_config.manifest_file_path, data=manifest)
+
+            prediction_artifact = PredictionArtifact(prediction_file_path=prediction_file_path,
+                                                     model_path=model_path,
+                                                     scored_partitions=sorted(unscored_partitions),
+                                                     skipped_partitions=skipped_partitions)
+            logger.info(f"Prediction Artifact ->{prediction_artifact}")
+            return prediction_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+def main():
+    prediction_config = PredictionConfig()
+    prediction_pipeline_config = prediction_config.get_prediction_pipeline_config()
+    prediction_pipeline = PredictionPipeline(prediction_pipeline_config=prediction_pipeline_config)
+    prediction_pipeline.start_prediction()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+
+    except Exception as e:
+        logger.exception(e)
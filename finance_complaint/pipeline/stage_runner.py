@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import hashlib
+from dataclasses import asdict
+from datetime import datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.metrics import increment
+from finance_complaint.utils import get_path_fingerprint
+
+"""
+name: unique stage name
+artifact_type: dataclass the stage returns
+upstream: names of the stages whose artifacts the stage takes, passed to run as keyword arguments
+get_config: builds the config of the stage for this run
+fingerprint_inputs: config -> dict of the values that change the stage output (no per run paths)
+run: (config, **upstream_artifacts) -> artifact
+artifact_fields: fields of the artifact downstream stages depend on, paths are fingerprinted by content
+"""
+Stage = namedtuple("Stage", ["name", "artifact_type", "upstream", "get_config", "fingerprint_inputs", "run",
+                             "artifact_fields"])
+
+
+class StageRunner:
+    """
+    Runs a DAG of stages, independent stages concurrently on up to max_parallel_stages threads.
+    Every stage gets a fingerprint of its inputs: its fingerprint_inputs and the content of the upstream
+    artifacts. A stage whose fingerprint matches its last successful run is skipped and the stored
+    artifact is reused. An artifact with is_complete False is never stored and stops the run.
+    """
+
+    def __init__(self, stages: list, state_dir: str, max_parallel_stages: int = 2):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_dir = state_dir
+        self.max_parallel_stages = max_parallel_stages
+        try:
+            for stage in stages:
+                missing = [name for name in stage.upstream if name not in self.stages]
+                if missing:
+                    raise Exception(f"Stage {stage.name} depends on unknown stages {missing}")
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_state_file_path(self, stage: Stage) -> str:
+        return os.path.join(self.state_dir, f"{stage.name}.json")
+
+    def get_artifact_fingerprint(self, stage: Stage, artifact) -> dict:
+        fingerprint = dict()
+        for field_name in stage.artifact_fields:
+            value = getattr(artifact, field_name)
+            if isinstance(value, str) and os.path.exists(value):
+                value = get_path_fingerprint(value)
+            fingerprint[field_name] = value
+        return fingerprint
+
+    def get_fingerprint(self, stage: Stage, config, upstream_artifacts: dict) -> str:
+        inputs = {
+            "stage": stage.name,
+            "artifact_type": stage.artifact_type.__name__,
+            "config": stage.fingerprint_inputs(config),
+            "upstream": {name: self.get_artifact_fingerprint(self.stages[name], artifact)
+                         for name, artifact in sorted(upstream_artifacts.items())},
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+    def load_artifact(self, stage: Stage, fingerprint: str):
+        """
+        The stored artifact of the stage if it was produced from the same fingerprint and its paths still exist
+        """
+        state_file_path = self.get_state_file_path(stage)
+        if not os.path.exists(state_file_path):
+            return None
+        with open(state_file_path) as file_obj:
+            state = json.load(file_obj)
+        if state.get("fingerprint") != fingerprint or state.get("artifact_type") != stage.artifact_type.__name__:
+            return None
+        artifact = stage.artifact_type(**state["artifact"])
+        for field_name in stage.artifact_fields:
+            value = getattr(artifact, field_name)
+            if isinstance(value, str) and os.path.isabs(value) and not os.path.exists(value):
+                return None
+        return artifact
+
+    def save_artifact(self, stage: Stage, fingerprint: str, artifact):
+        os.makedirs(self.state_dir, exist_ok=True)
+        state_file_path = self.get_state_file_path(stage)
+        temp_file_path = f"{state_file_path}.tmp"
+        with open(temp_file_path, "w") as file_obj:
+            json.dump({"fingerprint": fingerprint, "artifact_type": stage.artifact_type.__name__,
+                       "artifact": asdict(artifact), "completed_at": datetime.now().isoformat()},
+                      file_obj, indent=2, default=str)
+        os.replace(temp_file_path, state_file_path)
+
+    def run_stage(self, stage: Stage, upstream_artifacts: dict):
+        try:
+            config = stage.get_config()
+            fingerprint = self.get_fingerprint(stage, config, upstream_artifacts)
+            artifact = self.load_artifact(stage, fingerprint)
+            if artifact is not None:
+                logger.info(f"Stage {stage.name} unchanged, reusing {artifact}")
+                increment("pipeline_stages_reused")
+                return artifact
+
+            # each stage's initiate_* method is timed by its own track_stage
+            artifact = stage.run(config, **upstream_artifacts)
+            if not isinstance(artifact, stage.artifact_type):
+                raise Exception(f"Stage {stage.name} returned {type(artifact).__name__}, "
+                                f"expected {stage.artifact_type.__name__}")
+            if not getattr(artifact, "is_complete", True):
+                # the next run has to do the stage again, and its downstream stages can't use a partial output
+                raise Exception(f"Stage {stage.name} is incomplete: {artifact}")
+            self.save_artifact(stage, fingerprint, artifact)
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def run(self) -> dict:
+        """
+        Runs every stage once its upstream stages are done, returns stage name -> artifact
+        """
+        try:
+            artifacts = dict()
+            pending = dict(self.stages)
+            running = dict()
+            with ThreadPoolExecutor(max_workers=self.max_parallel_stages, thread_name_prefix="stage") as executor:
+                while pending or running:
+                    for name, stage in list(pending.items()):
+                        if all(upstream in artifacts for upstream in stage.upstream):
+                            upstream_artifacts = {upstream: artifacts[upstream] for upstream in stage.upstream}
+                            running[executor.submit(self.run_stage, stage, upstream_artifacts)] = name
+                            del pending[name]
+                    if not running:
+                        raise Exception(f"Stages {list(pending)} can never run, the stage graph has a cycle")
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        artifacts[running.pop(future)] = future.result()
+            return artifacts
+        except Exception as e:
+            raise FinanceException(e, sys)
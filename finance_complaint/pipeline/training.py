@@ -0,0 +1,138 @@
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.config.pipeline.training import FinanceConfig
+from finance_complaint.constant.training_pipeline_config import PIPELINE_STATE_DIR, PIPELINE_MAX_PARALLEL_STAGES
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, \
+    DataTransformationArtifact, ModelTrainerArtifact, ModelEvaluationArtifact, ModelPusherArtifact, \
+    DataExportArtifact
+from finance_complaint.pipeline.stage_runner import Stage, StageRunner
+import os,sys
+#data_ingestion -> data_validation -> data_transformation -> model_trainer -> model_evaluation -> model_pusher
+#               \-> data_export (when MONGO_DB_URL or FINANCE_S3_BUCKET is set), concurrently with the rest
+#every stage is skipped when its config and upstream data are unchanged since its last run
+
+
+class TrainingPipeline:
+
+    def __init__(self, finance_config: FinanceConfig = None, state_dir: str = PIPELINE_STATE_DIR,
+                 max_parallel_stages: int = PIPELINE_MAX_PARALLEL_STAGES):
+        self.finance_config = finance_config or FinanceConfig()
+        self.state_dir = state_dir
+        self.max_parallel_stages = max_parallel_stages
+
+    @staticmethod
+    def start_data_ingestion(config) -> DataIngestionArtifact:
+        from finance_complaint.component.training.data_ingestion import DataIngestion
+        return DataIngestion(data_ingestion_config=config).initiate_data_ingestion()
+
+    @staticmethod
+    def start_data_export(config, data_ingestion: DataIngestionArtifact) -> DataExportArtifact:
+        from finance_complaint.pipeline.data_export import get_data_export_pipeline
+        return get_data_export_pipeline(data_export_config=config,
+                                        data_ingestion_artifact=data_ingestion).initiate_data_export()
+
+    @staticmethod
+    def start_data_validation(config, data_ingestion: DataIngestionArtifact) -> DataValidationArtifact:
+        from finance_complaint.component.training.data_validation import DataValidation
+        return DataValidation(data_validation_config=config,
+                              data_ingestion_artifact=data_ingestion).initiate_data_validation()
+
+    @staticmethod
+    def start_data_transformation(config, data_validation: DataValidationArtifact) -> DataTransformationArtifact:
+        from finance_complaint.component.training.data_transformation import DataTransformation
+        return DataTransformation(data_transformation_config=config,
+                                  data_validation_artifact=data_validation).initiate_data_transformation()
+
+    @staticmethod
+    def start_model_trainer(config, data_transformation: DataTransformationArtifact) -> ModelTrainerArtifact:
+        from finance_complaint.component.training.model_trainer import ModelTrainer
+        return ModelTrainer(model_trainer_config=config,
+                            data_transformation_artifact=data_transformation).initiate_model_training()
+
+    @staticmethod
+    def start_model_evaluation(config, model_trainer: ModelTrainerArtifact) -> ModelEvaluationArtifact:
+        from finance_complaint.component.training.model_evaluation import ModelEvaluation
+        return ModelEvaluation(model_evaluation_config=config,
+                               model_trainer_artifact=model_trainer).initiate_model_evaluation()
+
+    @staticmethod
+    def start_model_pusher(config, model_evaluation: ModelEvaluationArtifact) -> ModelPusherArtifact:
+        from finance_complaint.component.training.model_pusher import ModelPusher
+        return ModelPusher(model_pusher_config=config,
+                           model_evaluation_artifact=model_evaluation).initiate_model_pusher()
+
+    def get_stages(self) -> list:
+        from finance_complaint.utils import get_latest_model_path
+
+        finance_config = self.finance_config
+        stages = [
+            Stage(name="data_ingestion", artifact_type=DataIngestionArtifact, upstream=[],
+                  get_config=finance_config.get_data_ingestion_config,
+                  fingerprint_inputs=lambda config: {"from_date": config.from_date, "to_date": config.to_date,
+                                                     "datasource_url": config.datasource_url},
+                  run=self.start_data_ingestion,
+                  artifact_fields=["feature_store_file_path"]),
+            Stage(name="data_validation", artifact_type=DataValidationArtifact, upstream=["data_ingestion"],
+                  get_config=finance_config.get_data_validation_config,
+                  fingerprint_inputs=lambda config: {"max_null_ratio": config.max_null_ratio,
+                                                     "top_categories": config.top_categories},
+                  run=self.start_data_validation,
+                  artifact_fields=["accepted_file_path"]),
+            Stage(name="data_transformation", artifact_type=DataTransformationArtifact, upstream=["data_validation"],
+                  get_config=finance_config.get_data_transformation_config,
+                  fingerprint_inputs=lambda config: {key: value for key, value in config._asdict().items()
+                                                     if not key.endswith(("_dir", "_file_path"))},
+                  run=self.start_data_transformation,
+                  artifact_fields=["transformed_file_path", "transformer_file_path"]),
+            Stage(name="model_trainer", artifact_type=ModelTrainerArtifact, upstream=["data_transformation"],
+                  get_config=finance_config.get_model_trainer_config,
+                  fingerprint_inputs=lambda config: {key: value for key, value in config._asdict().items()
+                                                     if key not in ("model_trainer_dir", "trained_model_file_path",
+                                                                    "test_file_path")},
+                  run=self.start_model_trainer,
+                  artifact_fields=["trained_model_file_path", "test_file_path", "test_metric"]),
+            Stage(name="model_evaluation", artifact_type=ModelEvaluationArtifact, upstream=["model_trainer"],
+                  get_config=finance_config.get_model_evaluation_config,
+                  # a newly pushed model changes what the trained model is compared with
+                  fingerprint_inputs=lambda config: {"metric_name": config.metric_name, "threshold": config.threshold,
+                                                     "best_model": get_latest_model_path(config.model_dir)},
+                  run=self.start_model_evaluation,
+                  artifact_fields=["is_model_accepted", "trained_model_file_path"]),
+            Stage(name="model_pusher", artifact_type=ModelPusherArtifact, upstream=["model_evaluation"],
+                  get_config=finance_config.get_model_pusher_config,
+                  fingerprint_inputs=lambda config: {"model_dir": config.model_dir},
+                  run=self.start_model_pusher,
+                  artifact_fields=["pushed_model_file_path"]),
+        ]
+        data_export_config = finance_config.get_data_export_config()
+        if data_export_config.mongo_enabled or data_export_config.s3_bucket_name is not None:
+            stages.append(Stage(name="data_export", artifact_type=DataExportArtifact, upstream=["data_ingestion"],
+                                get_config=finance_config.get_data_export_config,
+                                fingerprint_inputs=lambda config: config._asdict(),
+                                run=self.start_data_export,
+                                artifact_fields=[]))
+        return stages
+
+    def start(self) -> dict:
+        try:
+            logger.info(f"{'>>' * 20}Starting training pipeline.{'<<' * 20}")
+            stage_runner = StageRunner(stages=self.get_stages(), state_dir=self.state_dir,
+                                       max_parallel_stages=self.max_parallel_stages)
+            artifacts = stage_runner.run()
+            logger.info(f"Training pipeline is complete. {artifacts}")
+            return artifacts
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+def main():
+    training_pipeline = TrainingPipeline()
+    training_pipeline.start()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+
+    except Exception as e:
+        logger.exception(e)
@@ -1,6 +1,10 @@
-import os
+import os,sys
+import json
+import codecs
+import hashlib
 import yaml
 import shutil
+from typing import Iterable, Iterator
 from finance_complaint.exception import FinanceException
 
 
@@ -9,9 +13,16 @@ def write_yaml_file(file_path:str, data:dict):
     Create and write data to yaml file
     """
     try:
-        os.makedirs(name=file_path,exist_ok=True)
-        with open(file_path,"w") as yaml_file:
+        dir_path = os.path.dirname(file_path)
+        if dir_path:
+            os.makedirs(name=dir_path,exist_ok=True)
+        # written next to the target and renamed over it, so a crash never leaves half a file
+        temp_file_path = f"{file_path}.tmp"
+        with open(temp_file_path,"w") as yaml_file:
             yaml.dump(data,yaml_file)
+            yaml_file.flush()
+            os.fsync(yaml_file.fileno())
+        os.replace(temp_file_path, file_path)
     except Exception as e:
         raise FinanceException(e,sys)  
 
@@ -24,4 +35,153 @@ def read_yaml_file(file_path:str) -> dict:
         with open(file_path,'rb') as yaml_file:
             return yaml.safe_load(yaml_file)
     except Exception as e:
-        raise FinanceException(error_message = e, error_detail = sys)  
\ No newline at end of file
+        raise FinanceException(error_message = e, error_detail = sys)
+
+
+def link_or_copy(source_file_path:str, target_file_path:str):
+    """
+    Hard links source to target (no extra disk), falls back to a copy across file systems
+    """
+    try:
+        os.makedirs(os.path.dirname(target_file_path), exist_ok=True)
+        if os.path.exists(target_file_path):
+            os.remove(target_file_path)
+        try:
+            os.link(source_file_path, target_file_path)
+        except OSError:
+            shutil.copyfile(source_file_path, target_file_path)
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def get_dir_size(dir_path:str) -> int:
+    """
+    Total size in bytes of all the files under dir_path
+    """
+    try:
+        total_size = 0
+        for root, _, file_names in os.walk(dir_path):
+            for file_name in file_names:
+                total_size += os.path.getsize(os.path.join(root, file_name))
+        return total_size
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def get_path_fingerprint(path:str) -> str:
+    """
+    Fingerprint of a file or of all the data files under a dir (relative names, sizes and
+    modification times). Spark's _ and . prefixed bookkeeping files are left out.
+    """
+    try:
+        sha256 = hashlib.sha256()
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            sha256.update(f"{os.path.basename(path)}|{stat.st_size}|{stat.st_mtime_ns};".encode())
+        elif os.path.isdir(path):
+            for root, dir_names, file_names in os.walk(path):
+                dir_names[:] = sorted(name for name in dir_names if not name.startswith(("_", ".")))
+                for file_name in sorted(file_names):
+                    if file_name.startswith(("_", ".")):
+                        continue
+                    stat = os.stat(os.path.join(root, file_name))
+                    relative_path = os.path.relpath(os.path.join(root, file_name), path)
+                    sha256.update(f"{relative_path}|{stat.st_size}|{stat.st_mtime_ns};".encode())
+        else:
+            sha256.update(b"missing")
+        return sha256.hexdigest()
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def get_partition_fingerprints(dir_path:str, partition_columns:list) -> dict:
+    """
+    Maps every partition dir under dir_path (e.g. year=2022/month=5) to a fingerprint
+    of its data files (names, sizes and modification times). A partition which is
+    rewritten gets a new fingerprint, an untouched one keeps it.
+    """
+    try:
+        fingerprints = dict()
+        if not os.path.exists(dir_path):
+            return fingerprints
+        depth = len(partition_columns)
+        for root, dir_names, file_names in os.walk(dir_path):
+            # spark ignores _ and . prefixed dirs (staging, replaced partitions), so do we
+            dir_names[:] = sorted(name for name in dir_names if not name.startswith(("_", ".")))
+            partition = os.path.relpath(root, dir_path)
+            parts = partition.split(os.sep)
+            if len(parts) != depth or not all(part.startswith(f"{column}=")
+                                              for part, column in zip(parts, partition_columns)):
+                continue
+            data_file_names = sorted(name for name in file_names if not name.startswith(("_", ".")))
+            if not data_file_names:
+                continue
+            sha256 = hashlib.sha256()
+            for file_name in data_file_names:
+                stat = os.stat(os.path.join(root, file_name))
+                sha256.update(f"{file_name}|{stat.st_size}|{stat.st_mtime_ns};".encode())
+            fingerprints[partition] = sha256.hexdigest()
+        return fingerprints
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def get_latest_model_path(model_dir:str) -> str:
+    """
+    Path of the newest model version under model_dir (version dirs sort by name, e.g. a timestamp),
+    None when no model has been pushed yet
+    """
+    try:
+        if not os.path.exists(model_dir):
+            return None
+        versions = sorted(name for name in os.listdir(model_dir)
+                          if os.path.isdir(os.path.join(model_dir, name)) and not name.startswith(("_", ".")))
+        if not versions:
+            return None
+        return os.path.join(model_dir, versions[-1])
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def iter_json_array(chunks: Iterable[bytes], encoding:str = "utf-8") -> Iterator:
+    """
+    Incrementally parses a top level json array from an iterable of byte chunks
+    and yields its elements one at a time. Only the element being parsed is kept
+    in memory, not the whole document.
+    """
+    try:
+        decoder = json.JSONDecoder()
+        text_decoder = codecs.getincrementaldecoder(encoding)()
+        buffer = ""
+        position = 0
+        array_started = False
+        for chunk in chunks:
+            buffer += text_decoder.decode(chunk)
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n,":
+                    position += 1
+                if position >= len(buffer):
+                    break
+                if not array_started:
+                    if buffer[position] != "[":
+                        raise ValueError(f"Expected a json array, got: {buffer[position:position + 200]}")
+                    array_started = True
+                    position += 1
+                    continue
+                if buffer[position] == "]":
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # element is not complete yet, wait for the next chunk
+                    break
+                if not isinstance(item, (dict, list)) and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                    # a scalar which is not followed by a separator may continue in the next chunk
+                    break
+                yield item
+                position = end
+            buffer = buffer[position:]
+            position = 0
+        raise ValueError("Json array is truncated")
+    except Exception as e:
+        raise FinanceException(e, sys)
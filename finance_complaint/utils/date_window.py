@@ -0,0 +1,68 @@
+import sys
+from datetime import datetime, timedelta
+from typing import Iterator, Tuple
+from finance_complaint.exception import FinanceException
+"""
+Lazy generation of download windows, without pandas.
+Windows are half open [from_date, to_date), contiguous and non overlapping: the to_date of a window
+is the from_date of the next one, the first starts at from_date and the last ends at to_date.
+"""
+
+DATE_FORMAT = "%Y-%m-%d"
+GRANULARITIES = ("day", "week", "month", "year")
+
+
+def add_months(date: datetime, n_months: int) -> datetime:
+    """
+    First day of the month n_months after the month of date
+    """
+    month_index = date.year * 12 + date.month - 1 + n_months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def get_next_boundary(date: datetime, granularity: str, step: int) -> datetime:
+    """
+    Start of the window after the one starting at date. Month and year windows end on calendar
+    boundaries, so a from_date in the middle of a month only shortens the first window.
+    """
+    if granularity == "day":
+        return date + timedelta(days=step)
+    if granularity == "week":
+        return date + timedelta(weeks=step)
+    if granularity == "month":
+        return add_months(date, step)
+    if granularity == "year":
+        return datetime(date.year + step, 1, 1)
+    raise ValueError(f"Unknown granularity {granularity}, expected one of {GRANULARITIES}")
+
+
+def get_granularity(from_date: str, to_date: str) -> str:
+    """
+    Yearly windows for more than a year, monthly for more than a month, weekly otherwise
+    """
+    n_days = (datetime.strptime(to_date, DATE_FORMAT) - datetime.strptime(from_date, DATE_FORMAT)).days
+    if n_days > 365:
+        return "year"
+    if n_days > 30:
+        return "month"
+    return "week"
+
+
+def iter_date_windows(from_date: str, to_date: str, granularity: str = None,
+                      step: int = 1) -> Iterator[Tuple[str, str]]:
+    """
+    Yields the (from_date, to_date) windows of step days/weeks/months/years covering [from_date, to_date).
+    granularity defaults to get_granularity(from_date, to_date).
+    """
+    try:
+        if step < 1:
+            raise ValueError(f"step must be at least 1, got {step}")
+        granularity = granularity or get_granularity(from_date, to_date)
+        window_start = datetime.strptime(from_date, DATE_FORMAT)
+        end_date = datetime.strptime(to_date, DATE_FORMAT)
+        while window_start < end_date:
+            window_end = min(get_next_boundary(window_start, granularity, step), end_date)
+            yield window_start.strftime(DATE_FORMAT), window_end.strftime(DATE_FORMAT)
+            window_start = window_end
+    except Exception as e:
+        raise FinanceException(e, sys)
@@ -0,0 +1,83 @@
+import sys
+import math
+from datetime import datetime, timedelta
+from typing import Iterator, List, Tuple
+from finance_complaint.exception import FinanceException
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+class IntervalPlanner:
+    """
+    Plans the download windows so that every request returns about the same number of records.
+    The expected number of records per day comes from the counts of the previous runs
+    (kept in the ingestion metadata, days without records counted as 0). A new run starts where
+    the last one ended, so most of its days were never seen: they use the average of the
+    recent_days latest known days. Windows are half open: [from_date, to_date).
+    """
+
+    def __init__(self, daily_record_counts: dict = None, target_records_per_request: int = 5000,
+                 max_window_days: int = 366, default_records_per_day: int = 3000, recent_days: int = 28):
+        self.daily_record_counts = daily_record_counts or dict()
+        self.target_records_per_request = target_records_per_request
+        self.max_window_days = max_window_days
+        # YYYY-MM-DD keys sort by date
+        known_counts = [self.daily_record_counts[day] for day in sorted(self.daily_record_counts)[-recent_days:]]
+        self.default_records_per_day = (sum(known_counts) / len(known_counts)) if known_counts \
+            else default_records_per_day
+
+    def estimate_records(self, day: datetime) -> float:
+        return self.daily_record_counts.get(day.strftime(DATE_FORMAT), self.default_records_per_day)
+
+    def plan(self, from_date: str, to_date: str) -> List[Tuple[str, str]]:
+        """
+        Returns the (from_date, to_date) windows covering [from_date, to_date)
+        """
+        return list(self.iter_windows(from_date, to_date))
+
+    def iter_windows(self, from_date: str, to_date: str) -> Iterator[Tuple[str, str]]:
+        """
+        Yields the (from_date, to_date) windows covering [from_date, to_date), one pass over the
+        days sums the estimates and a second one yields the windows, no per day list is kept
+        """
+        try:
+            start_date = datetime.strptime(from_date, DATE_FORMAT)
+            end_date = datetime.strptime(to_date, DATE_FORMAT)
+            n_days = (end_date - start_date).days
+            if n_days <= 0:
+                return
+
+            total_records = sum(self.estimate_records(start_date + timedelta(days=index)) for index in range(n_days))
+            # spread the records evenly over the least number of windows that keeps every window under target
+            n_windows = max(1, math.ceil(total_records / self.target_records_per_request))
+            window_target = total_records / n_windows
+
+            window_start, window_records = 0, 0.0
+            for index in range(n_days):
+                estimate = self.estimate_records(start_date + timedelta(days=index))
+                window_days = index - window_start
+                if window_days > 0 and (window_records + estimate / 2 > window_target
+                                        or window_days >= self.max_window_days):
+                    yield self.to_window(start_date, window_start, index)
+                    window_start, window_records = index, 0.0
+                window_records += estimate
+            yield self.to_window(start_date, window_start, n_days)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @staticmethod
+    def to_window(start_date: datetime, first_day: int, end_day: int) -> Tuple[str, str]:
+        return ((start_date + timedelta(days=first_day)).strftime(DATE_FORMAT),
+                (start_date + timedelta(days=end_day)).strftime(DATE_FORMAT))
+
+    @staticmethod
+    def split_window(from_date: str, to_date: str) -> List[Tuple[str, str]]:
+        """
+        Splits a window into two halves, returns an empty list for a single day window
+        """
+        start_date = datetime.strptime(from_date, DATE_FORMAT)
+        n_days = (datetime.strptime(to_date, DATE_FORMAT) - start_date).days
+        if n_days <= 1:
+            return list()
+        middle_date = (start_date + timedelta(days=n_days // 2)).strftime(DATE_FORMAT)
+        return [(from_date, middle_date), (middle_date, to_date)]
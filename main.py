@@ -0,0 +1,5 @@
+from finance_complaint.pipeline.training import main
+
+
+if __name__ == "__main__":
+    main()
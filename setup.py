@@ -32,6 +32,6 @@ setup(
     version=VERSION,
     author=AUTHOR,
     description=DESRCIPTION,
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*", "tests", "tests.*"]),
     install_requires=get_requirements_list()
 )
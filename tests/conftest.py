@@ -0,0 +1,119 @@
+import os
+import shutil
+import pytest
+from finance_complaint.metrics import pipeline_metrics
+
+
+@pytest.fixture(scope="session", autouse=True)
+def work_dir(tmp_path_factory):
+    """
+    Logs, metrics and default artifact dirs are relative to the cwd, keep them out of the repo
+    """
+    work_dir = tmp_path_factory.mktemp("work")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    metrics_dir = pipeline_metrics.metrics_dir
+    pipeline_metrics.metrics_dir = str(work_dir / "metrics")
+    yield work_dir
+    pipeline_metrics.metrics_dir = metrics_dir
+    os.chdir(cwd)
+
+
+@pytest.fixture
+def finance_config(tmp_path):
+    from finance_complaint.config.pipeline.training import FinanceConfig
+    finance_config = FinanceConfig()
+    finance_config.pipeline_config = finance_config.get_pipeline_config(artifact_dir=str(tmp_path / "finance_artifact"))
+    return finance_config
+
+
+@pytest.fixture
+def cfpb_server():
+    """
+    Factory of local api stand-ins, stopped at the end of the test
+    """
+    from benchmarks.cfpb_stub_server import CFPBStubServer
+    servers = []
+
+    def start(**kwargs):
+        server = CFPBStubServer(**kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def is_java_available() -> bool:
+    java_home = os.getenv("JAVA_HOME")
+    if java_home:
+        return os.path.exists(os.path.join(java_home, "bin", "java"))
+    return shutil.which("java") is not None
+
+
+@pytest.fixture(scope="session")
+def spark():
+    """
+    The shared session of the pipeline with the pinned pyspark, tests needing it are skipped without a jvm
+    """
+    pytest.importorskip("pyspark")
+    if not is_java_available():
+        pytest.skip("pyspark needs java, set JAVA_HOME")
+    from finance_complaint.config.spark_manager import get_spark_session, stop_spark_session
+    yield get_spark_session()
+    # stopped here rather than at exit, while the logs still go to the work dir
+    stop_spark_session()
+
+
+@pytest.fixture
+def complaints_dataframe(spark, tmp_path):
+    """
+    Factory of dataframes of complaints read with the pipeline schema,
+    the categorical columns which aren't given get a fixed value
+    """
+    import json
+    from finance_complaint.entity.schema import FinanceDataSchema
+    schema = FinanceDataSchema()
+    defaults = {column: "x" for column in schema.categorical_columns}
+    file_paths = []
+
+    def read(records: list):
+        file_path = tmp_path / f"complaints_{len(file_paths)}.json"
+        file_paths.append(file_path)
+        with open(file_path, "w") as file_obj:
+            for record in records:
+                file_obj.write(json.dumps({**defaults, **record}) + "\n")
+        return spark.read.schema(schema.dataframe_schema).json(str(file_path))
+
+    return read
+
+
+@pytest.fixture
+def fitted_model(finance_config, complaints_dataframe):
+    """
+    The feature pipeline of DataTransformation and a logistic regression fitted on a few complaints,
+    disputed ones are about fees
+    """
+    from pyspark.ml import Pipeline
+    from pyspark.ml.classification import LogisticRegression
+    from pyspark.sql import functions as F
+    from finance_complaint.component.training.data_transformation import DataTransformation
+    data_transformation_config = finance_config.get_data_transformation_config()
+    data_transformation = DataTransformation(data_transformation_config=data_transformation_config,
+                                             data_validation_artifact=None)
+    records = []
+    for index in range(40):
+        is_disputed = index % 2 == 0
+        records.append({"complaint_id": str(index),
+                        "product": ["Mortgage", "Credit card", "Student loan"][index % 3],
+                        "state": ["CA", "NY"][index % 4 // 2],
+                        "complaint_what_happened": f"I was charged a late fee twice, case {index}" if is_disputed
+                        else f"My account was closed without notice, case {index}",
+                        "consumer_disputed": "Yes" if is_disputed else "No"})
+    dataframe = complaints_dataframe(records).withColumn(data_transformation_config.label_column,
+                                                         (F.col("consumer_disputed") == "Yes").cast("double"))
+    classifier = LogisticRegression(featuresCol=data_transformation_config.features_column,
+                                    labelCol=data_transformation_config.label_column, maxIter=10)
+    pipeline = Pipeline(stages=data_transformation.get_feature_pipeline().getStages() + [classifier])
+    return pipeline.fit(data_transformation.schema.fill_missing_feature_inputs(dataframe))
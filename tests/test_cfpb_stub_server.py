@@ -0,0 +1,47 @@
+import json
+import socket
+import urllib.request
+from urllib.error import HTTPError
+import pytest
+
+
+def get_window(server, from_date: str, to_date: str):
+    url = server.datasource_url.replace("<fromdate>", from_date).replace("<todate>", to_date)
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def test_serves_records_per_day_in_the_api_envelope(cfpb_server):
+    server = cfpb_server(records_per_day=4)
+    records = get_window(server, "2022-05-01", "2022-05-04")
+    assert len(records) == 3 * 4
+    assert {record["_source"]["date_received"][:10] for record in records} == {"2022-05-01", "2022-05-02",
+                                                                               "2022-05-03"}
+    # the same window is served the same way every time
+    assert get_window(server, "2022-05-01", "2022-05-04") == records
+
+
+def test_page_limit_caps_a_response(cfpb_server):
+    server = cfpb_server(records_per_day=10, page_limit=15)
+    assert len(get_window(server, "2022-05-01", "2022-05-08")) == 15
+
+
+def test_injected_failures_are_500s(cfpb_server):
+    server = cfpb_server(failure_rate=1.0)
+    with pytest.raises(HTTPError) as error:
+        get_window(server, "2022-05-01", "2022-05-02")
+    assert error.value.code == 500
+    assert server.n_failures == server.n_requests == 1
+
+
+def test_dropped_connections_are_not_reported(cfpb_server, capfd):
+    server = cfpb_server(records_per_day=5000)
+    host, port = server.httpd.server_address[:2]
+    path = server.datasource_url.split(f"{port}", 1)[1].replace("<fromdate>", "2022-05-01") \
+        .replace("<todate>", "2022-05-03")
+    with socket.create_connection((host, port)) as connection:
+        connection.sendall(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+        connection.recv(1024)
+    # the handler sees the reset while it is still writing, a request afterwards shows the server is fine
+    assert len(get_window(server, "2022-05-01", "2022-05-02")) == 5000
+    assert "Traceback" not in capfd.readouterr().err
@@ -0,0 +1,262 @@
+import os
+import gzip
+import json
+import time
+import pytest
+
+pytest.importorskip("requests")
+
+from finance_complaint.component.training import data_ingestion as data_ingestion_module
+from finance_complaint.component.training.data_ingestion import DataIngestion, HostRateLimiter
+from finance_complaint.metrics import pipeline_metrics
+from finance_complaint.constant.training_pipeline_config.data_ingestion_config import \
+    DATA_INGESTION_JSON_TO_PARQUET_RATIO, DATA_INGESTION_PARQUET_TARGET_FILE_SIZE_MB
+
+
+def get_data_ingestion(finance_config, server, from_date="2022-05-01", to_date="2022-05-15", n_retry=0,
+                       **config_overrides) -> DataIngestion:
+    data_ingestion_config = finance_config.get_data_ingestion_config(from_date=from_date, to_date=to_date)
+    data_ingestion_config = data_ingestion_config._replace(datasource_url=server.datasource_url,
+                                                           max_requests_per_second=0, **config_overrides)
+    return DataIngestion(data_ingestion_config=data_ingestion_config, n_retry=n_retry)
+
+
+def count_downloaded_records(download_dir: str) -> int:
+    n_records = 0
+    for file_name in os.listdir(download_dir):
+        with open(os.path.join(download_dir, file_name)) as file_obj:
+            n_records += sum(1 for _ in file_obj)
+    return n_records
+
+
+def test_rate_limiter_spaces_requests_to_the_same_host():
+    rate_limiter = HostRateLimiter(max_requests_per_second=20)
+    start_time = time.monotonic()
+    for _ in range(5):
+        rate_limiter.wait("http://api.example.com/a")
+    # the first request goes out immediately, the next four are 50 ms apart
+    assert time.monotonic() - start_time >= 0.19
+
+
+def test_rate_limiter_does_not_slow_down_other_hosts():
+    rate_limiter = HostRateLimiter(max_requests_per_second=1)
+    start_time = time.monotonic()
+    for host in ["a.example.com", "b.example.com", "c.example.com"]:
+        rate_limiter.wait(f"http://{host}/")
+    assert time.monotonic() - start_time < 0.5
+
+
+def test_download_files_downloads_every_window(finance_config, cfpb_server):
+    server = cfpb_server(records_per_day=5)
+    data_ingestion = get_data_ingestion(finance_config, server, n_workers=4)
+
+    report = data_ingestion.download_files()
+
+    assert report.n_windows == report.n_downloaded > 0
+    assert report.failed_downloads == []
+    assert count_downloaded_records(data_ingestion.data_ingestion_config.download_dir) == 14 * 5
+    assert sum(data_ingestion.daily_record_counts.values()) == 14 * 5
+    assert os.path.exists(report.report_file_path)
+
+
+def test_days_without_records_are_counted(finance_config, cfpb_server):
+    server = cfpb_server(records_per_day=0)
+    data_ingestion = get_data_ingestion(finance_config, server)
+
+    data_ingestion.download_files()
+
+    assert len(data_ingestion.daily_record_counts) == 14
+    assert set(data_ingestion.daily_record_counts.values()) == {0}
+
+
+def test_failed_windows_are_reported(finance_config, cfpb_server):
+    server = cfpb_server(records_per_day=5, failure_rate=1.0)
+    data_ingestion = get_data_ingestion(finance_config, server, n_workers=2)
+
+    report = data_ingestion.download_files()
+
+    assert report.n_downloaded == 0
+    assert report.failed_downloads
+    assert all(failed_download.status_code == 500 for failed_download in report.failed_downloads)
+
+
+@pytest.mark.parametrize("failure_rate", [0.0, 1.0])
+def test_every_response_is_closed(finance_config, cfpb_server, failure_rate):
+    server = cfpb_server(records_per_day=5, failure_rate=failure_rate)
+    data_ingestion = get_data_ingestion(finance_config, server, n_workers=2)
+    responses, closed_responses = list(), list()
+    session_get = data_ingestion.session.get
+
+    def get(*args, **kwargs):
+        response = session_get(*args, **kwargs)
+        response_close = response.close
+
+        def close():
+            closed_responses.append(response)
+            response_close()
+
+        response.close = close
+        responses.append(response)
+        return response
+
+    data_ingestion.session.get = get
+    data_ingestion.download_files()
+
+    assert responses
+    assert all(response in closed_responses for response in responses)
+
+
+def test_windows_at_the_page_limit_are_split(finance_config, cfpb_server, monkeypatch):
+    monkeypatch.setattr(data_ingestion_module, "DATA_INGESTION_MAX_RECORDS_PER_REQUEST", 20)
+    server = cfpb_server(records_per_day=5, page_limit=20)
+    data_ingestion = get_data_ingestion(finance_config, server, adaptive_intervals=False)
+
+    report = data_ingestion.download_files()
+
+    assert report.failed_downloads == []
+    # the two weekly windows hit the limit, their halves don't
+    assert report.n_downloaded > 2
+    assert sum(data_ingestion.daily_record_counts.values()) == 14 * 5
+
+
+def test_server_errors_are_not_split(finance_config, cfpb_server):
+    server = cfpb_server(records_per_day=5, failure_rate=1.0)
+    data_ingestion = get_data_ingestion(finance_config, server, adaptive_intervals=False)
+
+    report = data_ingestion.download_files()
+
+    # every window is requested once and reported as it is
+    assert server.n_requests == len(report.failed_downloads) == report.n_windows
+    assert not any(failed_download.is_window_too_large for failed_download in report.failed_downloads)
+
+
+def test_timed_out_windows_are_split_down_to_days(finance_config, cfpb_server, monkeypatch):
+    monkeypatch.setattr(data_ingestion_module, "DATA_INGESTION_REQUEST_TIMEOUT_SECONDS", 0.1)
+    server = cfpb_server(records_per_day=5, latency_seconds=0.3)
+    data_ingestion = get_data_ingestion(finance_config, server, from_date="2022-05-01", to_date="2022-05-05",
+                                        adaptive_intervals=False, n_workers=4)
+
+    report = data_ingestion.download_files()
+
+    assert len(report.failed_downloads) == 4
+    assert all(failed_download.is_window_too_large for failed_download in report.failed_downloads)
+
+
+def test_partial_run_is_not_merged(finance_config, cfpb_server):
+    server = cfpb_server(records_per_day=5, failure_rate=1.0)
+    data_ingestion = get_data_ingestion(finance_config, server, n_workers=2)
+
+    data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
+
+    assert not data_ingestion_artifact.is_complete
+    assert not os.path.exists(data_ingestion_artifact.feature_store_file_path)
+    assert not os.path.exists(data_ingestion_artifact.metadata_file_path)
+
+
+class StreamedResponse:
+    """
+    The part of a streamed requests.Response the writers use
+    """
+
+    def __init__(self, records: list, chunk_size: int = 10):
+        self.body = json.dumps(records).encode("utf-8")
+        self.chunk_size = chunk_size
+
+    def iter_content(self, chunk_size: int = None):
+        for index in range(0, len(self.body), self.chunk_size):
+            yield self.body[index:index + self.chunk_size]
+
+
+API_RECORDS = [
+    {"_index": "complaint-public-v2", "_source": {"complaint_id": "1", "date_received": "2022-05-01T12:00:00-05:00"}},
+    {"_index": "complaint-public-v2", "_source": {"complaint_id": "2", "date_received": "2022-05-01T12:00:00-05:00"}},
+    {"_index": "complaint-public-v2"},
+    {"_index": "complaint-public-v2", "_source": {"complaint_id": "3", "date_received": "2022-05-02T12:00:00-05:00"}},
+]
+
+
+@pytest.mark.parametrize("file_name", ["window.json", "window.json.gz"])
+def test_ndjson_writer_keeps_one_source_per_line(finance_config, cfpb_server, tmp_path, file_name):
+    data_ingestion = get_data_ingestion(finance_config, cfpb_server())
+    file_path = str(tmp_path / file_name)
+
+    record_counts = data_ingestion.write_download_data_as_ndjson(StreamedResponse(API_RECORDS), file_path)
+
+    open_file = gzip.open if file_name.endswith(".gz") else open
+    with open_file(file_path, "rt", encoding="utf-8") as file_obj:
+        lines = file_obj.read().splitlines()
+    assert [json.loads(line) for line in lines] == [record["_source"] for record in API_RECORDS if "_source" in record]
+    assert record_counts == {"2022-05-01": 2, "2022-05-02": 1}
+    assert not DataIngestion.is_empty_download_file(file_path)
+
+
+def test_empty_response_is_an_empty_download(finance_config, cfpb_server, tmp_path):
+    data_ingestion = get_data_ingestion(finance_config, cfpb_server())
+    file_path = str(tmp_path / "window.json")
+
+    assert data_ingestion.write_download_data_as_ndjson(StreamedResponse([]), file_path) == {}
+    assert DataIngestion.is_empty_download_file(file_path)
+
+
+def test_json_array_without_records_is_an_empty_download(tmp_path):
+    file_path = tmp_path / "window.json"
+    file_path.write_text("[]")
+    assert DataIngestion.is_empty_download_file(str(file_path))
+
+
+def test_output_files_are_sized_from_the_downloads(tmp_path):
+    target_size = DATA_INGESTION_PARQUET_TARGET_FILE_SIZE_MB * 1024 * 1024
+    json_file_path = tmp_path / "window.json"
+    gz_file_path = tmp_path / "window.json.gz"
+    with open(json_file_path, "wb") as file_obj:
+        file_obj.truncate(2 * target_size * DATA_INGESTION_JSON_TO_PARQUET_RATIO)
+    with open(gz_file_path, "wb") as file_obj:
+        file_obj.truncate(target_size)
+
+    # uncompressed json shrinks by the json to parquet ratio, gzip is already about the parquet size
+    assert DataIngestion.get_n_output_files([str(json_file_path)]) == 2
+    assert DataIngestion.get_n_output_files([str(gz_file_path)]) == 1
+    assert DataIngestion.get_n_output_files([str(json_file_path), str(gz_file_path)], existing_size=target_size) == 4
+
+
+def test_windows_are_reported_once_in_the_download_files_stage(finance_config, cfpb_server):
+    server = cfpb_server(records_per_day=5)
+    data_ingestion = get_data_ingestion(finance_config, server, n_workers=4)
+
+    report = data_ingestion.download_files()
+
+    assert {window.source for window in report.downloaded_windows} == {"api"}
+    assert report.n_records == 14 * 5
+    assert report.n_bytes == sum(os.path.getsize(os.path.join(data_ingestion.data_ingestion_config.download_dir, name))
+                                 for name in os.listdir(data_ingestion.data_ingestion_config.download_dir))
+    with open(pipeline_metrics.json_lines_file_path) as file_obj:
+        stages = [json.loads(line)["stage"] for line in file_obj]
+    # the metrics are written under the artifact dir of the run, one line for all the windows
+    assert pipeline_metrics.json_lines_file_path.startswith(finance_config.pipeline_config.artifact_dir)
+    assert stages == ["download_files"]
+
+
+def test_an_interrupted_run_resumes_from_its_checkpoint(finance_config, cfpb_server):
+    server = cfpb_server(records_per_day=5)
+    get_data_ingestion(finance_config, server).download_files()
+    n_requests = server.n_requests
+
+    report = get_data_ingestion(finance_config, server).download_files()
+
+    assert {window.source for window in report.downloaded_windows} == {"checkpoint"}
+    assert report.n_records == 14 * 5
+    assert server.n_requests == n_requests
+
+
+def test_cached_windows_are_only_reused_in_the_same_landing_format(finance_config, cfpb_server, tmp_path):
+    pytest.importorskip("pyarrow")
+    server = cfpb_server(records_per_day=5)
+    download_cache_dir = str(tmp_path / "download_cache")
+    get_data_ingestion(finance_config, server, download_cache_dir=download_cache_dir).download_files()
+
+    parquet_report = get_data_ingestion(finance_config, server, download_cache_dir=download_cache_dir,
+                                        landing_format="parquet").download_files()
+    json_report = get_data_ingestion(finance_config, server, download_cache_dir=download_cache_dir).download_files()
+
+    assert {window.source for window in parquet_report.downloaded_windows} == {"api"}
+    assert {window.source for window in json_report.downloaded_windows} == {"cache"}
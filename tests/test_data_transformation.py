@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("pyspark")
+
+from finance_complaint.component.training.data_transformation import DataTransformation
+from finance_complaint.entity.artifact_entity import DataValidationArtifact
+from finance_complaint.utils import get_partition_fingerprints
+
+
+@pytest.fixture
+def data_transformation(finance_config, complaints_dataframe, tmp_path):
+    from pyspark.sql import functions as F
+    records = [{"complaint_id": str(index), "product": f"product {index}",
+                "complaint_what_happened": f"narrative {index}",
+                "consumer_disputed": "Yes" if index % 3 == 0 else "No"} for index in range(500)]
+    accepted_file_path = str(tmp_path / "accepted")
+    (complaints_dataframe(records)
+     .withColumn("year", F.lit(2022))
+     .withColumn("month", (F.col("complaint_id").cast("int") % 2 + 5))
+     .write.partitionBy("year", "month").parquet(accepted_file_path))
+    data_validation_artifact = DataValidationArtifact(accepted_file_path=accepted_file_path,
+                                                      quarantine_file_path=str(tmp_path / "quarantine"),
+                                                      report_file_path=str(tmp_path / "report.yaml"))
+    return DataTransformation(data_transformation_config=finance_config.get_data_transformation_config(),
+                              data_validation_artifact=data_validation_artifact)
+
+
+def get_test_ids(data_transformation: DataTransformation, partitions: list) -> set:
+    split_column = data_transformation.data_transformation_config.split_column
+    rows = data_transformation.get_labelled_data(partitions).filter(split_column).select("complaint_id").collect()
+    return {row["complaint_id"] for row in rows}
+
+
+def test_complaints_keep_their_split_whichever_partitions_are_read(data_transformation):
+    partitions = ["year=2022/month=5", "year=2022/month=6"]
+
+    test_ids = get_test_ids(data_transformation, partitions)
+
+    assert 0.1 < len(test_ids) / 500 < 0.3
+    assert test_ids == get_test_ids(data_transformation, partitions[:1]) | get_test_ids(data_transformation,
+                                                                                          partitions[1:])
+
+
+def test_transformer_is_fitted_on_the_train_split_only(data_transformation, monkeypatch):
+    from pyspark.ml import Pipeline
+    fitted_dataframes = []
+    fit = Pipeline.fit
+    monkeypatch.setattr(Pipeline, "fit", lambda pipeline, dataset, params=None:
+                        fitted_dataframes.append(dataset) or fit(pipeline, dataset, params))
+    fingerprints = get_partition_fingerprints(data_transformation.data_validation_artifact.accepted_file_path,
+                                              ["year", "month"])
+
+    data_transformation.fit_transformer(fingerprints)
+
+    fitted_dataframe, = fitted_dataframes
+    fitted_ids = {row["complaint_id"] for row in fitted_dataframe.select("complaint_id").collect()}
+    test_ids = get_test_ids(data_transformation, sorted(fingerprints))
+    assert test_ids and not fitted_ids & test_ids
+    assert len(fitted_ids) + len(test_ids) == 500
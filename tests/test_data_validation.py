@@ -0,0 +1,92 @@
+import os
+import pytest
+
+pytest.importorskip("pyspark")
+
+from finance_complaint.component.training.data_validation import DataValidation
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact
+from finance_complaint.exception import FinanceException
+from finance_complaint.utils import read_yaml_file
+
+
+def write_feature_store(complaints_dataframe, feature_store_file_path: str, records: list, month: int):
+    from pyspark.sql import functions as F
+    (complaints_dataframe(records)
+     .withColumn("year", F.lit(2022))
+     .withColumn("month", F.lit(month))
+     .write.mode("append").partitionBy("year", "month").parquet(feature_store_file_path))
+
+
+@pytest.fixture
+def data_ingestion_artifact(complaints_dataframe, tmp_path):
+    feature_store_file_path = str(tmp_path / "feature_store")
+    records = [{"complaint_id": str(index), "product": "Mortgage", "date_received": "2022-05-01T12:00:00-05:00"}
+               for index in range(10)]
+    records += [{"complaint_id": None, "product": "Mortgage", "date_received": "2022-05-01T12:00:00-05:00"},
+                {"complaint_id": "10", "product": None, "date_received": "2022-05-01T12:00:00-05:00"},
+                {"complaint_id": "11", "product": "Mortgage", "date_received": "not a date"}]
+    write_feature_store(complaints_dataframe, feature_store_file_path, records, month=5)
+    return DataIngestionArtifact(feature_store_file_path=feature_store_file_path,
+                                 metadata_file_path=str(tmp_path / "metadata.yaml"),
+                                 download_dir=str(tmp_path / "downloads"))
+
+
+def get_data_validation(finance_config, data_ingestion_artifact) -> DataValidation:
+    return DataValidation(data_validation_config=finance_config.get_data_validation_config(),
+                          data_ingestion_artifact=data_ingestion_artifact)
+
+
+def test_invalid_rows_are_quarantined(spark, finance_config, data_ingestion_artifact):
+    data_validation_artifact = get_data_validation(finance_config, data_ingestion_artifact).initiate_data_validation()
+
+    accepted_df = spark.read.parquet(data_validation_artifact.accepted_file_path)
+    quarantine_df = spark.read.parquet(data_validation_artifact.quarantine_file_path)
+    assert accepted_df.count() == 10
+    assert sorted(str(row["complaint_id"]) for row in quarantine_df.collect()) == ["10", "11", "None"]
+    report = read_yaml_file(data_validation_artifact.report_file_path)
+    assert report["n_rows"] == 13
+    assert report["n_invalid_rows"] == 3
+    assert report["validated_partitions"] == ["year=2022/month=5"]
+
+
+def test_only_changed_partitions_are_validated_again(finance_config, complaints_dataframe,
+                                                     data_ingestion_artifact):
+    get_data_validation(finance_config, data_ingestion_artifact).initiate_data_validation()
+    assert get_data_validation(finance_config, data_ingestion_artifact).initiate_data_validation() \
+               .validated_partitions == []
+
+    write_feature_store(complaints_dataframe, data_ingestion_artifact.feature_store_file_path,
+                        [{"complaint_id": "12", "product": "Mortgage", "date_received": "2022-06-01"}], month=6)
+    data_validation_artifact = get_data_validation(finance_config, data_ingestion_artifact).initiate_data_validation()
+
+    assert data_validation_artifact.validated_partitions == ["year=2022/month=6"]
+    # the partitions validated before are kept
+    assert os.path.isdir(os.path.join(data_validation_artifact.accepted_file_path, "year=2022/month=5"))
+
+
+def test_missing_columns_fail_the_schema_check(spark, finance_config, data_ingestion_artifact):
+    data_validation = get_data_validation(finance_config, data_ingestion_artifact)
+    dataframe = spark.read.parquet(data_ingestion_artifact.feature_store_file_path).drop("product")
+
+    with pytest.raises(FinanceException, match="product"):
+        data_validation.check_schema(dataframe)
+
+
+def test_null_heavy_columns_are_reported(spark, finance_config, data_ingestion_artifact):
+    data_validation = get_data_validation(finance_config, data_ingestion_artifact)
+    dataframe = spark.read.parquet(data_ingestion_artifact.feature_store_file_path)
+
+    report = data_validation.get_column_statistics(dataframe)
+
+    # the narrative is never given, the product is only missing once
+    assert report["columns"]["complaint_what_happened"]["null_ratio"] == 1.0
+    assert "complaint_what_happened" in report["null_heavy_columns"]
+    assert "product" not in report["null_heavy_columns"]
+    assert report["columns"]["product"]["top_categories"] == {"Mortgage": 12, "None": 1}
+
+
+def test_incomplete_ingestion_is_not_validated(finance_config, data_ingestion_artifact):
+    data_ingestion_artifact.is_complete = False
+
+    with pytest.raises(FinanceException, match="ingestion"):
+        get_data_validation(finance_config, data_ingestion_artifact).initiate_data_validation()
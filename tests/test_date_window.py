@@ -0,0 +1,58 @@
+import pytest
+from finance_complaint.exception import FinanceException
+from finance_complaint.utils.date_window import iter_date_windows, get_granularity
+from finance_complaint.utils.interval_planner import IntervalPlanner
+
+
+@pytest.mark.parametrize("from_date,to_date,granularity", [
+    ("2022-05-01", "2022-05-15", "week"),
+    ("2022-01-01", "2022-12-31", "month"),
+    ("2015-03-10", "2022-06-20", "year"),
+])
+def test_granularity_follows_the_range(from_date, to_date, granularity):
+    assert get_granularity(from_date, to_date) == granularity
+
+
+def test_month_windows_end_on_calendar_boundaries():
+    assert list(iter_date_windows("2022-01-15", "2022-04-10", granularity="month")) == [
+        ("2022-01-15", "2022-02-01"), ("2022-02-01", "2022-03-01"),
+        ("2022-03-01", "2022-04-01"), ("2022-04-01", "2022-04-10")]
+
+
+def test_year_windows_cross_the_leap_day():
+    assert list(iter_date_windows("2019-06-01", "2021-03-01", granularity="year")) == [
+        ("2019-06-01", "2020-01-01"), ("2020-01-01", "2021-01-01"), ("2021-01-01", "2021-03-01")]
+
+
+def test_december_rolls_over_to_the_next_year():
+    assert list(iter_date_windows("2021-11-20", "2022-02-01", granularity="month", step=2)) == [
+        ("2021-11-20", "2022-01-01"), ("2022-01-01", "2022-02-01")]
+
+
+@pytest.mark.parametrize("granularity", ["day", "week", "month", "year"])
+def test_windows_are_contiguous(granularity):
+    windows = list(iter_date_windows("2020-02-27", "2022-03-02", granularity=granularity))
+    assert windows[0][0] == "2020-02-27"
+    assert windows[-1][1] == "2022-03-02"
+    assert all(window_end == next_start for (_, window_end), (next_start, _) in zip(windows, windows[1:]))
+
+
+def test_empty_and_reversed_ranges_have_no_windows():
+    assert list(iter_date_windows("2022-01-01", "2022-01-01")) == []
+    assert list(iter_date_windows("2022-02-01", "2022-01-01")) == []
+
+
+@pytest.mark.parametrize("kwargs", [{"granularity": "hour"}, {"step": 0}])
+def test_invalid_arguments_raise(kwargs):
+    with pytest.raises(FinanceException):
+        list(iter_date_windows("2022-01-01", "2022-02-01", **kwargs))
+
+
+def test_windows_are_generated_lazily():
+    windows = iter_date_windows("1900-01-01", "9999-01-01", granularity="day")
+    assert next(windows) == ("1900-01-01", "1900-01-02")
+
+
+def test_planner_windows_are_the_same_iterated_or_planned():
+    planner = IntervalPlanner(daily_record_counts={"2022-01-10": 5000}, target_records_per_request=1000)
+    assert list(planner.iter_windows("2022-01-01", "2022-03-01")) == planner.plan("2022-01-01", "2022-03-01")
@@ -0,0 +1,78 @@
+import os
+import time
+from finance_complaint.data_access.download_cache import DownloadCache
+
+URL_TEMPLATE = "http://cfpb.example.com/api"
+
+
+def write_download(tmp_path, name: str, size: int) -> str:
+    file_path = tmp_path / "downloads" / name
+    file_path.parent.mkdir(exist_ok=True)
+    file_path.write_bytes(b"x" * size)
+    return str(file_path)
+
+
+def test_windows_are_stored_and_found_again(tmp_path):
+    download_cache = DownloadCache(cache_dir=str(tmp_path / "cache"), max_size_bytes=1000)
+    file_path = write_download(tmp_path, "window.json.gz", 100)
+    download_cache.put(URL_TEMPLATE, "2022-05-01", "2022-05-08", file_path=file_path, n_records=5,
+                       etag='"v1"', daily_record_counts={"2022-05-01": 5})
+
+    # a new instance reads the index written by the first one
+    entry = DownloadCache(cache_dir=str(tmp_path / "cache"), max_size_bytes=1000).get(URL_TEMPLATE, "2022-05-01",
+                                                                                      "2022-05-08")
+    assert (entry.n_records, entry.size, entry.etag) == (5, 100, '"v1"')
+    assert download_cache.get(URL_TEMPLATE, "2022-05-08", "2022-05-15") is None
+
+
+def test_put_hard_links_the_download(tmp_path):
+    download_cache = DownloadCache(cache_dir=str(tmp_path / "cache"), max_size_bytes=1000)
+    file_path = write_download(tmp_path, "window.json", 100)
+    entry = download_cache.put(URL_TEMPLATE, "2022-05-01", "2022-05-08", file_path=file_path, n_records=5)
+
+    cached_file_path = os.path.join(download_cache.cache_dir, entry.file_name)
+    assert os.stat(cached_file_path).st_ino == os.stat(file_path).st_ino
+
+
+def test_materialize_keeps_the_extension_of_the_cached_file(tmp_path):
+    download_cache = DownloadCache(cache_dir=str(tmp_path / "cache"), max_size_bytes=1000)
+    entry = download_cache.put(URL_TEMPLATE, "2022-05-01", "2022-05-08",
+                               file_path=write_download(tmp_path, "window.json.gz", 100), n_records=5)
+
+    file_path = download_cache.materialize(entry, str(tmp_path / "run" / "2022-05-01_2022-05-08.json"))
+
+    assert file_path == str(tmp_path / "run" / "2022-05-01_2022-05-08.json.gz")
+    assert os.path.getsize(file_path) == 100
+
+
+def test_corrupt_entries_are_dropped(tmp_path):
+    download_cache = DownloadCache(cache_dir=str(tmp_path / "cache"), max_size_bytes=1000)
+    file_path = write_download(tmp_path, "window.json", 100)
+    download_cache.put(URL_TEMPLATE, "2022-05-01", "2022-05-08", file_path=file_path, n_records=5)
+
+    # same size, different content: only the checksum tells
+    with open(file_path, "r+b") as file_obj:
+        file_obj.write(b"y")
+
+    assert download_cache.get(URL_TEMPLATE, "2022-05-01", "2022-05-08") is None
+    assert download_cache.entries == {}
+    assert os.listdir(download_cache.cache_dir) == [DownloadCache.INDEX_FILE_NAME]
+
+
+def test_least_recently_used_windows_are_evicted(tmp_path):
+    download_cache = DownloadCache(cache_dir=str(tmp_path / "cache"), max_size_bytes=250)
+    windows = [("2022-05-01", "2022-05-08"), ("2022-05-08", "2022-05-15"), ("2022-05-15", "2022-05-22")]
+    entries = []
+    for index, (from_date, to_date) in enumerate(windows[:2]):
+        entries.append(download_cache.put(URL_TEMPLATE, from_date, to_date,
+                                          file_path=write_download(tmp_path, f"{index}.json", 100), n_records=1))
+        time.sleep(0.01)
+    # reusing the first window makes the second one the least recently used
+    download_cache.materialize(entries[0], str(tmp_path / "run" / "0.json"))
+    time.sleep(0.01)
+    download_cache.put(URL_TEMPLATE, *windows[2], file_path=write_download(tmp_path, "2.json", 100), n_records=1)
+
+    assert download_cache.get(URL_TEMPLATE, *windows[0]) is not None
+    assert download_cache.get(URL_TEMPLATE, *windows[1]) is None
+    assert download_cache.get(URL_TEMPLATE, *windows[2]) is not None
+    assert not os.path.exists(os.path.join(download_cache.cache_dir, entries[1].file_name))
@@ -0,0 +1,158 @@
+import os
+import gzip
+import json
+import pytest
+
+pytest.importorskip("requests")
+
+from finance_complaint.component.training.data_ingestion import DataIngestion
+from finance_complaint.entity.schema import FinanceDataSchema
+from finance_complaint.exception import FinanceException
+from finance_complaint.data_access.landing_file import LandingFileWriter, get_landing_columns
+from finance_complaint.constant.training_pipeline_config.data_ingestion_config import DATA_INGESTION_SCHEMA_FILE_NAME
+
+
+def write_ndjson(file_path, records: list) -> str:
+    with open(file_path, "w") as file_obj:
+        for record in records:
+            file_obj.write(json.dumps(record) + "\n")
+    return str(file_path)
+
+
+def complaint(complaint_id: str, date_received: str, product: str = "Mortgage") -> dict:
+    return {"complaint_id": complaint_id, "date_received": f"{date_received}T12:00:00-05:00", "product": product,
+            "has_narrative": False}
+
+
+def read_feature_store(spark, feature_store_file_path: str) -> dict:
+    rows = spark.read.parquet(feature_store_file_path).select("complaint_id", "product", "year", "month").collect()
+    return {row["complaint_id"]: (row["product"], row["year"], row["month"]) for row in rows}
+
+
+@pytest.fixture
+def data_ingestion(finance_config, cfpb_server):
+    data_ingestion_config = finance_config.get_data_ingestion_config(from_date="2022-05-01", to_date="2022-07-01")
+    data_ingestion_config = data_ingestion_config._replace(datasource_url=cfpb_server().datasource_url)
+    return DataIngestion(data_ingestion_config=data_ingestion_config)
+
+
+def test_downloads_are_converted_in_one_pass_with_the_pinned_schema(spark, data_ingestion):
+    download_dir = data_ingestion.data_ingestion_config.download_dir
+    os.makedirs(download_dir)
+    write_ndjson(os.path.join(download_dir, "a.json"), [complaint("1", "2022-05-02"), complaint("2", "2022-05-03")])
+    write_ndjson(os.path.join(download_dir, "empty.json"), [])
+    with gzip.open(os.path.join(download_dir, "b.json.gz"), "wt") as file_obj:
+        file_obj.write(json.dumps(complaint("3", "2022-06-01", product="Credit card")) + "\n")
+
+    feature_store_file_path = data_ingestion.convert_files_to_parquet()
+
+    dataframe = spark.read.parquet(feature_store_file_path)
+    assert dataframe.drop("year", "month").schema == FinanceDataSchema().dataframe_schema
+    assert read_feature_store(spark, feature_store_file_path) == {
+        "1": ("Mortgage", 2022, 5),
+        "2": ("Mortgage", 2022, 5),
+        "3": ("Credit card", 2022, 6),
+    }
+    with open(os.path.join(feature_store_file_path, DATA_INGESTION_SCHEMA_FILE_NAME)) as file_obj:
+        assert json.load(file_obj)["version"] == FinanceDataSchema().version
+
+
+def test_upsert_replaces_changed_complaints_and_keeps_the_rest(spark, data_ingestion, tmp_path):
+    schema = FinanceDataSchema()
+    feature_store_file_path = str(tmp_path / "feature_store")
+    first_file_path = write_ndjson(tmp_path / "first.json", [complaint("1", "2022-05-02"), complaint("2", "2022-05-03"),
+                                                             complaint("3", "2022-06-01")])
+    data_ingestion.upsert_feature_store(spark.read.schema(schema.dataframe_schema).json(first_file_path),
+                                        feature_store_file_path, [first_file_path])
+    june_partition = os.path.join(feature_store_file_path, "year=2022", "month=6")
+    june_files = sorted(os.listdir(june_partition))
+
+    second_file_path = write_ndjson(tmp_path / "second.json", [complaint("2", "2022-05-03", product="Credit card"),
+                                                               complaint("4", "2022-05-20"),
+                                                               complaint("4", "2022-05-20")])
+    data_ingestion.upsert_feature_store(spark.read.schema(schema.dataframe_schema).json(second_file_path),
+                                        feature_store_file_path, [second_file_path])
+
+    assert read_feature_store(spark, feature_store_file_path) == {
+        "1": ("Mortgage", 2022, 5),
+        "2": ("Credit card", 2022, 5),
+        "3": ("Mortgage", 2022, 6),
+        "4": ("Mortgage", 2022, 5),
+    }
+    # only the partition with new records is rewritten
+    assert sorted(os.listdir(june_partition)) == june_files
+    assert not os.path.exists(os.path.join(feature_store_file_path, "_staging"))
+
+
+def test_undated_complaints_are_set_aside(spark, data_ingestion, tmp_path):
+    schema = FinanceDataSchema()
+    feature_store_file_path = str(tmp_path / "feature_store")
+    undated_complaint = complaint("2", "2022-05-03")
+    undated_complaint["date_received"] = None
+    file_path = write_ndjson(tmp_path / "complaints.json", [complaint("1", "2022-05-02"), undated_complaint,
+                                                            complaint("3", "not a date")])
+
+    data_ingestion.upsert_feature_store(spark.read.schema(schema.dataframe_schema).json(file_path),
+                                        feature_store_file_path, [file_path])
+
+    assert read_feature_store(spark, feature_store_file_path) == {"1": ("Mortgage", 2022, 5)}
+    undated_dir = os.path.join(data_ingestion.data_ingestion_config.data_ingestion_dir, "undated_complaints")
+    undated_ids = {row["complaint_id"] for row in spark.read.schema(schema.dataframe_schema).json(undated_dir).collect()}
+    assert undated_ids == {"2", "3"}
+
+
+def test_feature_stores_of_another_schema_version_are_not_merged(spark, data_ingestion, tmp_path):
+    schema = FinanceDataSchema()
+    feature_store_file_path = tmp_path / "feature_store"
+    feature_store_file_path.mkdir()
+    (feature_store_file_path / DATA_INGESTION_SCHEMA_FILE_NAME).write_text(json.dumps({"version": "0"}))
+    file_path = write_ndjson(tmp_path / "complaints.json", [complaint("1", "2022-05-02")])
+
+    with pytest.raises(FinanceException, match="schema version 0"):
+        data_ingestion.upsert_feature_store(spark.read.schema(schema.dataframe_schema).json(file_path),
+                                            str(feature_store_file_path), [file_path])
+    assert not os.path.exists(feature_store_file_path / "year=2022")
+
+
+def test_ingestion_builds_the_feature_store_from_the_api(spark, finance_config, cfpb_server):
+    server = cfpb_server(records_per_day=3)
+    data_ingestion_config = finance_config.get_data_ingestion_config(from_date="2022-05-29", to_date="2022-06-04")
+    data_ingestion_config = data_ingestion_config._replace(datasource_url=server.datasource_url,
+                                                           max_requests_per_second=0)
+
+    data_ingestion_artifact = DataIngestion(data_ingestion_config=data_ingestion_config).initiate_data_ingestion()
+
+    assert data_ingestion_artifact.is_complete
+    feature_store = read_feature_store(spark, data_ingestion_artifact.feature_store_file_path)
+    assert len(feature_store) == 6 * 3
+    assert {(year, month) for _, year, month in feature_store.values()} == {(2022, 5), (2022, 6)}
+    assert os.path.exists(data_ingestion_artifact.metadata_file_path)
+
+
+def test_landing_files_of_every_format_are_converted_in_one_pass(spark, data_ingestion):
+    pytest.importorskip("pyarrow")
+    download_dir = data_ingestion.data_ingestion_config.download_dir
+    os.makedirs(download_dir)
+    write_ndjson(os.path.join(download_dir, "a.json"), [complaint("1", "2022-05-02")])
+    write_ndjson(os.path.join(download_dir, "empty.json"), [])
+    with gzip.open(os.path.join(download_dir, "b.json.gz"), "wt") as file_obj:
+        file_obj.write(json.dumps(complaint("2", "2022-05-03")) + "\n")
+    for complaint_id, landing_format in [("3", "parquet"), ("4", "arrow")]:
+        with LandingFileWriter(os.path.join(download_dir, f"c.{landing_format}"), get_landing_columns(["product"]),
+                               landing_format, "zstd") as writer:
+            writer.write(complaint(complaint_id, "2022-06-01"))
+
+    feature_store_file_path = data_ingestion.convert_files_to_parquet()
+
+    assert read_feature_store(spark, feature_store_file_path) == {
+        "1": ("Mortgage", 2022, 5),
+        "2": ("Mortgage", 2022, 5),
+        "3": ("Mortgage", 2022, 6),
+        "4": ("Mortgage", 2022, 6),
+    }
+    # every format keeps the dates as sent and the arrow files rewritten to parquet are removed
+    date_received = spark.read.parquet(feature_store_file_path).select("date_received").collect()
+    assert all(row["date_received"].endswith("T12:00:00-05:00") for row in date_received)
+    assert sorted(os.listdir(download_dir)) == ["a.json", "b.json.gz", "c.arrow", "c.parquet", "empty.json"]
+    with open(os.path.join(feature_store_file_path, DATA_INGESTION_SCHEMA_FILE_NAME)) as file_obj:
+        assert json.load(file_obj)["version"] == FinanceDataSchema().version
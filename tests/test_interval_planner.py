@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from finance_complaint.utils.interval_planner import IntervalPlanner
+
+
+def get_days(from_date: str, n_days: int) -> list:
+    start_date = datetime.strptime(from_date, "%Y-%m-%d")
+    return [(start_date + timedelta(days=index)).strftime("%Y-%m-%d") for index in range(n_days)]
+
+
+def assert_contiguous(windows: list, from_date: str, to_date: str):
+    assert windows[0][0] == from_date
+    assert windows[-1][1] == to_date
+    for (_, window_end), (next_start, _) in zip(windows, windows[1:]):
+        assert window_end == next_start
+
+
+def test_windows_follow_the_known_record_counts():
+    # a quiet month then a busy one
+    daily_record_counts = {day: 100 for day in get_days("2022-01-01", 31)}
+    daily_record_counts.update({day: 1000 for day in get_days("2022-02-01", 28)})
+    planner = IntervalPlanner(daily_record_counts=daily_record_counts, target_records_per_request=3000)
+
+    windows = planner.plan("2022-01-01", "2022-03-01")
+
+    assert_contiguous(windows, "2022-01-01", "2022-03-01")
+    for from_date, to_date in windows:
+        days = get_days(from_date, (datetime.strptime(to_date, "%Y-%m-%d") - datetime.strptime(from_date, "%Y-%m-%d")).days)
+        assert sum(daily_record_counts[day] for day in days) <= 3000 * 1.5
+    busy_windows = [window for window in windows if window[0] >= "2022-02-01"]
+    assert len(busy_windows) > len(windows) - len(busy_windows)
+
+
+def test_unknown_days_use_the_average_of_the_known_days():
+    planner = IntervalPlanner(daily_record_counts={"2022-01-01": 10, "2022-01-02": 30})
+    assert planner.estimate_records(datetime(2023, 1, 1)) == 20
+
+
+def test_unknown_days_use_the_recent_days_including_empty_ones():
+    daily_record_counts = {day: 1000 for day in get_days("2022-01-01", 30)}
+    daily_record_counts.update({day: 0 for day in get_days("2022-01-31", 5)})
+    daily_record_counts.update({day: 100 for day in get_days("2022-02-05", 5)})
+    planner = IntervalPlanner(daily_record_counts=daily_record_counts, recent_days=10)
+    assert planner.estimate_records(datetime(2022, 2, 10)) == 50
+
+
+def test_windows_are_capped_at_max_window_days():
+    planner = IntervalPlanner(target_records_per_request=10 ** 9, max_window_days=30, default_records_per_day=1)
+    windows = planner.plan("2022-01-01", "2022-12-31")
+    assert_contiguous(windows, "2022-01-01", "2022-12-31")
+    assert all((datetime.strptime(to_date, "%Y-%m-%d") - datetime.strptime(from_date, "%Y-%m-%d")).days <= 30
+               for from_date, to_date in windows)
+
+
+def test_empty_range_has_no_windows():
+    assert IntervalPlanner().plan("2022-01-01", "2022-01-01") == []
+
+
+def test_split_window_halves_down_to_single_days():
+    assert IntervalPlanner.split_window("2022-01-01", "2022-01-05") == [("2022-01-01", "2022-01-03"),
+                                                                        ("2022-01-03", "2022-01-05")]
+    assert IntervalPlanner.split_window("2022-01-01", "2022-01-02") == []
@@ -0,0 +1,47 @@
+import json
+import pytest
+from finance_complaint.exception import FinanceException
+from finance_complaint.utils import iter_json_array
+
+
+def split_into_chunks(data: bytes, chunk_size: int) -> list:
+    return [data[index:index + chunk_size] for index in range(0, len(data), chunk_size)]
+
+
+RECORDS = [
+    {"_source": {"complaint_id": "1", "complaint_what_happened": "a [bracket], a \"quote\" and a } brace"}},
+    {"_source": {"complaint_id": "2", "company": "Café über €"}},
+    [1, 2, {"nested": [3, 4]}],
+    12345,
+    "text",
+    None,
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 20])
+def test_elements_are_the_same_whatever_the_chunk_size(chunk_size):
+    data = json.dumps(RECORDS, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_array(split_into_chunks(data, chunk_size))) == RECORDS
+
+
+def test_multi_byte_characters_split_across_chunks():
+    data = json.dumps([{"company": "€€€"}], ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_array(split_into_chunks(data, 1))) == [{"company": "€€€"}]
+
+
+def test_numbers_split_across_chunks_are_not_cut():
+    assert list(iter_json_array([b"[12", b"34, 5", b"6]"])) == [1234, 56]
+
+
+def test_empty_array():
+    assert list(iter_json_array([b" [ ", b" ] "])) == []
+
+
+def test_truncated_array_raises():
+    with pytest.raises(FinanceException):
+        list(iter_json_array([b'[{"a": 1}, {"b"']))
+
+
+def test_not_an_array_raises():
+    with pytest.raises(FinanceException):
+        list(iter_json_array([b'{"error": "synthetic failure"}']))
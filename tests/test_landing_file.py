@@ -0,0 +1,64 @@
+import pytest
+from finance_complaint.exception import FinanceException
+from finance_complaint.data_access.landing_file import LandingFileWriter, count_landing_rows, get_landing_columns, \
+    to_boolean, to_zip_code
+
+pa = pytest.importorskip("pyarrow")
+
+RECORDS = [
+    {"complaint_id": 1, "date_received": "2022-05-01T12:00:00-05:00", "zip_code": 2134,
+     "consumer_consent_provided": "Consent provided", "has_narrative": "yes", "unknown_field": "dropped"},
+    {"complaint_id": "2", "date_received": "not a date", "zip_code": "902XX", "has_narrative": False},
+    {"complaint_id": "3", "date_received": "2022-05-03"},
+]
+
+
+def test_projection_keeps_the_key_and_partition_columns_in_schema_order():
+    columns = get_landing_columns(["zip_code"])
+    assert columns == [column for column in get_landing_columns() if column in
+                       {"complaint_id", "date_received", "zip_code"}]
+    with pytest.raises(FinanceException):
+        get_landing_columns(["no_such_column"])
+
+
+@pytest.mark.parametrize("cast,value,expected", [
+    (to_zip_code, 2134, "02134"),
+    (to_zip_code, "902XX", "902XX"),
+    (to_zip_code, True, None),
+    (to_boolean, "Yes", True),
+    (to_boolean, "0", False),
+    (to_boolean, "maybe", None),
+])
+def test_values_are_cast_to_the_landing_types(cast, value, expected):
+    assert cast(value) == expected
+
+
+@pytest.mark.parametrize("landing_format,compression", [("parquet", "zstd"), ("arrow", "lz4")])
+def test_records_are_landed_projected_and_typed(tmp_path, landing_format, compression):
+    columns = get_landing_columns(["zip_code", "has_narrative"])
+    file_path = str(tmp_path / f"window.{landing_format}")
+
+    with LandingFileWriter(file_path, columns, landing_format, compression, batch_size=2) as writer:
+        for record in RECORDS:
+            writer.write(record)
+
+    if landing_format == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(file_path)
+    else:
+        with pa.memory_map(file_path) as source:
+            table = pa.ipc.open_file(source).read_all()
+    assert table.column_names == columns
+    assert table.schema.field("has_narrative").type == pa.bool_()
+    assert table.to_pylist() == [
+        {"complaint_id": "1", "date_received": "2022-05-01T12:00:00-05:00", "zip_code": "02134",
+         "has_narrative": True},
+        {"complaint_id": "2", "date_received": "not a date", "zip_code": "902XX", "has_narrative": False},
+        {"complaint_id": "3", "date_received": "2022-05-03", "zip_code": None, "has_narrative": None},
+    ]
+    assert count_landing_rows(file_path) == 3
+
+
+def test_unsupported_compression_is_refused(tmp_path):
+    with pytest.raises(FinanceException):
+        LandingFileWriter(str(tmp_path / "window.arrow"), get_landing_columns(), "arrow", "snappy")
@@ -0,0 +1,87 @@
+import os
+import json
+import logging
+import pytest
+from finance_complaint import logger as logger_module
+from finance_complaint.logger import LazyQueueHandler
+
+
+@pytest.fixture
+def get_logger(tmp_path, monkeypatch):
+    """
+    Factory of loggers writing through their own handler to a log dir of the test
+    """
+    log_dir = tmp_path / "logs"
+    monkeypatch.setattr(logger_module, "LOG_DIR", str(log_dir))
+    handlers = []
+
+    def create(log_json: bool = False, **constants):
+        monkeypatch.setattr(logger_module, "LOG_JSON", log_json)
+        monkeypatch.setattr(logger_module, "LOG_FILE_PATH", str(log_dir / logger_module.get_log_file_name()))
+        for name, value in constants.items():
+            monkeypatch.setattr(logger_module, name, value)
+        handler = LazyQueueHandler()
+        handlers.append(handler)
+        test_logger = logging.getLogger(f"FinanceComplaintTest{len(handlers)}")
+        test_logger.setLevel(logging.INFO)
+        test_logger.propagate = False
+        test_logger.handlers = [handler]
+        return test_logger, handler
+
+    yield create
+    for handler in handlers:
+        handler.stop_listener()
+
+
+def test_nothing_is_created_before_the_first_record(get_logger):
+    test_logger, handler = get_logger()
+    assert handler.listener is None
+    assert not os.path.exists(logger_module.LOG_DIR)
+
+    test_logger.info("first record")
+    handler.stop_listener()
+
+    with open(logger_module.LOG_FILE_PATH) as file_obj:
+        assert "first record" in file_obj.read()
+
+
+def test_json_records_keep_the_exception_apart(get_logger):
+    test_logger, handler = get_logger(log_json=True)
+    try:
+        raise ValueError("broken window")
+    except ValueError:
+        test_logger.exception("download %s failed", "2022-05-01")
+    handler.stop_listener()
+
+    assert logger_module.LOG_FILE_PATH.endswith(".jsonl")
+    with open(logger_module.LOG_FILE_PATH) as file_obj:
+        entry, = [json.loads(line) for line in file_obj]
+    assert entry["message"] == "download 2022-05-01 failed"
+    assert entry["level"] == "ERROR"
+    assert "ValueError: broken window" in entry["exception"]
+
+
+def test_log_files_are_rotated(get_logger):
+    test_logger, handler = get_logger(LOG_MAX_BYTES=1024, LOG_BACKUP_COUNT=2)
+    for index in range(100):
+        test_logger.info(f"record {index} " + "x" * 100)
+    handler.stop_listener()
+
+    log_file_names = sorted(os.listdir(logger_module.LOG_DIR))
+    file_name = os.path.basename(logger_module.LOG_FILE_PATH)
+    assert log_file_names == [file_name, f"{file_name}.1", f"{file_name}.2"]
+    assert all(os.path.getsize(os.path.join(logger_module.LOG_DIR, name)) <= 1024 for name in log_file_names)
+
+
+def test_records_logged_after_the_exit_hook_are_written_without_a_new_listener(get_logger):
+    test_logger, handler = get_logger()
+    test_logger.info("first record")
+    handler.stop_listener()
+
+    # e.g. the spark session stopped by an exit hook which runs after the logger's
+    test_logger.info("Stopping spark session")
+
+    assert handler.listener is None
+    with open(logger_module.LOG_FILE_PATH) as file_obj:
+        lines = file_obj.read().splitlines()
+    assert [line.split("\t")[-1] for line in lines] == ["first record", "Stopping spark session"]
@@ -0,0 +1,67 @@
+import threading
+import pytest
+from finance_complaint import utils
+from finance_complaint.entity.metadata_entity import DataIngestionMetaData, DataIngestionCheckpoint
+from finance_complaint.exception import FinanceException
+
+
+def test_metadata_is_written_and_read_back(tmp_path):
+    metadata = DataIngestionMetaData(metadata_file_path=str(tmp_path / "meta" / "metadata_info.yaml"))
+    metadata.write_metadata_info(from_date="2022-05-01", to_date="2022-06-01", data_file_path="feature_store",
+                                 daily_record_counts={"2022-05-01": 5})
+
+    metadata_info = metadata.read_metadata_info()
+
+    assert (metadata_info.from_date, metadata_info.to_date) == ("2022-05-01", "2022-06-01")
+    assert metadata_info.daily_record_counts == {"2022-05-01": 5}
+
+
+def test_a_failed_write_keeps_the_previous_metadata(tmp_path, monkeypatch):
+    metadata = DataIngestionMetaData(metadata_file_path=str(tmp_path / "metadata_info.yaml"))
+    metadata.write_metadata_info(from_date="2022-05-01", to_date="2022-06-01", data_file_path="feature_store")
+
+    def crash(data, file_obj):
+        file_obj.write("from_date: 2022-")
+        raise OSError("disk full")
+    monkeypatch.setattr(utils.yaml, "dump", crash)
+    with pytest.raises(FinanceException):
+        metadata.write_metadata_info(from_date="2022-05-01", to_date="2022-07-01", data_file_path="feature_store")
+
+    assert metadata.read_metadata_info().to_date == "2022-06-01"
+
+
+def test_only_downloaded_windows_whose_file_exists_are_completed(tmp_path):
+    checkpoint = DataIngestionCheckpoint(checkpoint_file_path=str(tmp_path / "checkpoint.db"))
+    file_path = tmp_path / "window.json"
+    file_path.write_text("{}\n")
+    checkpoint.record_window("2022-05-01", "2022-05-08", status=DataIngestionCheckpoint.STATUS_DOWNLOADED,
+                             n_records=1, n_bytes=3, file_path=str(file_path), daily_record_counts={"2022-05-01": 1})
+    checkpoint.record_window("2022-05-08", "2022-05-15", status=DataIngestionCheckpoint.STATUS_FAILED)
+    checkpoint.record_window("2022-05-15", "2022-05-22", status=DataIngestionCheckpoint.STATUS_DOWNLOADED,
+                             file_path=str(tmp_path / "deleted.json"))
+
+    # a new instance reads what the interrupted attempt recorded
+    checkpoint = DataIngestionCheckpoint(checkpoint_file_path=str(tmp_path / "checkpoint.db"))
+
+    completed_window = checkpoint.get_completed_window("2022-05-01", "2022-05-08")
+    assert completed_window.daily_record_counts == {"2022-05-01": 1}
+    assert checkpoint.get_completed_window("2022-05-08", "2022-05-15") is None
+    assert checkpoint.get_completed_window("2022-05-15", "2022-05-22") is None
+    checkpoint.clear()
+    assert checkpoint.get_window("2022-05-01", "2022-05-08") is None
+
+
+def test_windows_can_be_recorded_from_many_threads(tmp_path):
+    checkpoint = DataIngestionCheckpoint(checkpoint_file_path=str(tmp_path / "checkpoint.db"))
+
+    def record(day: int):
+        checkpoint.record_window(f"2022-05-{day:02d}", f"2022-05-{day + 1:02d}",
+                                 status=DataIngestionCheckpoint.STATUS_FAILED)
+    threads = [threading.Thread(target=record, args=(day,)) for day in range(1, 29)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(checkpoint.get_window(f"2022-05-{day:02d}", f"2022-05-{day + 1:02d}") is not None
+               for day in range(1, 29))
@@ -0,0 +1,53 @@
+import os
+import json
+import pytest
+from finance_complaint import metrics
+from finance_complaint.metrics import PipelineMetrics
+
+
+def read_events(pipeline_metrics: PipelineMetrics) -> list:
+    with open(pipeline_metrics.json_lines_file_path) as file_obj:
+        return [json.loads(line) for line in file_obj]
+
+
+def test_stage_records_duration_status_and_counter_deltas(tmp_path):
+    pipeline_metrics = PipelineMetrics(run_id="test", metrics_dir=str(tmp_path))
+    pipeline_metrics.increment("download_bytes", 10)
+    with pipeline_metrics.track_stage("convert_files_to_parquet", partition="2022-05"):
+        pipeline_metrics.increment("download_bytes", 5)
+        pipeline_metrics.increment("parquet_input_files", 2)
+
+    event, = read_events(pipeline_metrics)
+    assert event["stage"] == "convert_files_to_parquet"
+    assert event["labels"] == {"partition": "2022-05"}
+    assert event["status"] == "success"
+    assert event["counters"] == {"download_bytes": 5, "parquet_input_files": 2}
+    assert event["seconds"] >= 0 and event["peak_rss_bytes"] > 0
+
+
+def test_failed_stage_is_recorded_and_raised(tmp_path):
+    pipeline_metrics = PipelineMetrics(run_id="test", metrics_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        with pipeline_metrics.track_stage("update_meta_data"):
+            raise ValueError("broken")
+    assert read_events(pipeline_metrics)[0]["status"] == "failed"
+    assert pipeline_metrics.stage_totals["update_meta_data"]["failures"] == 1
+
+
+def test_prometheus_text_is_written_next_to_the_json_lines(tmp_path):
+    pipeline_metrics = PipelineMetrics(run_id="test", metrics_dir=str(tmp_path), prometheus_enabled=True)
+    with pipeline_metrics.track_stage("download_files"):
+        pipeline_metrics.increment("http_requests", 3)
+    with open(pipeline_metrics.prometheus_file_path) as file_obj:
+        text = file_obj.read()
+    assert 'finance_stage_runs_total{run_id="test",stage="download_files"} 1' in text
+    assert 'finance_counter_total{run_id="test",name="http_requests"} 3' in text
+
+
+def test_metrics_follow_the_artifact_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics.pipeline_metrics, "metrics_dir", metrics.pipeline_metrics.metrics_dir)
+    metrics.set_artifact_dir(str(tmp_path))
+    with metrics.track_stage("model_trainer"):
+        pass
+    assert os.path.dirname(metrics.pipeline_metrics.json_lines_file_path) == str(tmp_path / "metrics")
+    assert os.path.exists(metrics.pipeline_metrics.json_lines_file_path)
@@ -0,0 +1,68 @@
+import os
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+pytest.importorskip("pymongo")
+pytest.importorskip("pyarrow")
+
+from benchmarks.data_access_benchmark import write_feature_store
+from finance_complaint.data_access.mongo_feature_store import MongoFeatureStore
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact
+
+
+@pytest.fixture
+def data_ingestion_artifact(tmp_path):
+    feature_store_file_path = str(tmp_path / "feature_store")
+    # 2022-05-30 to 2022-06-02, two days in each of two partitions
+    write_feature_store(feature_store_file_path, "2022-05-30", days=4, records_per_day=10)
+    return DataIngestionArtifact(feature_store_file_path=feature_store_file_path, metadata_file_path=None,
+                                 download_dir=None)
+
+
+@pytest.fixture
+def mongo_feature_store():
+    return MongoFeatureStore(client=mongomock.MongoClient(), batch_size=7, n_workers=2)
+
+
+def rewrite_partition(feature_store_file_path: str, partition: str, company: str):
+    import pyarrow.parquet as pq
+    partition_path = os.path.join(feature_store_file_path, partition)
+    for file_name in os.listdir(partition_path):
+        file_path = os.path.join(partition_path, file_name)
+        table = pq.read_table(file_path)
+        table = table.set_column(table.schema.get_field_index("company"), "company",
+                                 [[company] * table.num_rows])
+        os.remove(file_path)
+        pq.write_table(table, os.path.join(partition_path, f"rewritten_{file_name}"))
+
+
+def test_unchanged_partitions_are_not_exported_again(mongo_feature_store, data_ingestion_artifact):
+    first_report = mongo_feature_store.export_feature_store(data_ingestion_artifact)
+    second_report = mongo_feature_store.export_feature_store(data_ingestion_artifact)
+
+    assert (first_report.n_records, first_report.n_skipped) == (40, 0)
+    assert (second_report.n_records, second_report.n_skipped, second_report.n_bytes) == (0, 40, 0)
+    assert mongo_feature_store.collection.count_documents({}) == 40
+
+
+def test_changed_partitions_replace_their_documents(mongo_feature_store, data_ingestion_artifact):
+    mongo_feature_store.export_feature_store(data_ingestion_artifact)
+    rewrite_partition(data_ingestion_artifact.feature_store_file_path, "year=2022/month=6", company="Renamed bank")
+
+    report = mongo_feature_store.export_feature_store(data_ingestion_artifact)
+
+    # only the june partition is read, all its complaints changed
+    assert (report.n_records, report.n_skipped) == (20, 20)
+    collection = mongo_feature_store.collection
+    assert collection.count_documents({}) == 40
+    assert collection.count_documents({"company": "Renamed bank"}) == collection.count_documents({"month": 6}) == 20
+
+
+def test_an_emptied_collection_is_exported_in_full(mongo_feature_store, data_ingestion_artifact):
+    mongo_feature_store.export_feature_store(data_ingestion_artifact)
+    mongo_feature_store.collection.drop()
+
+    report = mongo_feature_store.export_feature_store(data_ingestion_artifact)
+
+    assert report.n_records == 40
+    assert mongo_feature_store.collection.count_documents({}) == 40
@@ -0,0 +1,104 @@
+import json
+import asyncio
+from finance_complaint.pipeline.online_prediction import OnlinePredictionServer
+
+
+class ProductScorer:
+    """
+    Scores the length of the product, fails the whole batch on a record without a product
+    """
+    model_path = "model"
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def score_batch(self, records: list) -> list:
+        self.batch_sizes.append(len(records))
+        return [{"prediction": float(len(record["product"]))} for record in records]
+
+
+async def post(port: int, body: bytes) -> tuple:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"POST /predict HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    headers = dict()
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, value = line.decode().split(":", 1)
+        headers[name.strip().lower()] = value.strip()
+    payload = json.loads(await reader.readexactly(int(headers["content-length"])))
+    writer.close()
+    return int(status_line.split()[1]), headers, payload
+
+
+def run_with_server(test, **server_kwargs):
+    async def main():
+        server = OnlinePredictionServer(scorer=ProductScorer(), host="127.0.0.1", port=0, **server_kwargs)
+        batcher_task = asyncio.create_task(server.batcher.run())
+        tcp_server = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        try:
+            return await test(server, port)
+        finally:
+            tcp_server.close()
+            batcher_task.cancel()
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_are_scored_in_one_batch():
+    async def test(server, port):
+        return await asyncio.gather(*[post(port, json.dumps({"product": "x" * n}).encode()) for n in range(1, 9)])
+
+    responses = run_with_server(test, max_wait_ms=50)
+
+    assert [payload for _, _, payload in responses] == [{"prediction": float(n)} for n in range(1, 9)]
+
+
+def test_a_bad_record_only_fails_its_own_request():
+    async def test(server, port):
+        responses = await asyncio.gather(post(port, b'{"product": "abc"}'), post(port, b'{"issue": "no product"}'),
+                                         post(port, b'{"instances": [{"product": "ab"}, {"product": "a"}]}'))
+        return responses, server.scorer.batch_sizes
+
+    responses, batch_sizes = run_with_server(test, max_wait_ms=50)
+
+    assert [(status, payload) for status, _, payload in responses] == [
+        (200, {"prediction": 3.0}),
+        (422, {"error": "'product'"}),
+        (200, {"predictions": [{"prediction": 2.0}, {"prediction": 1.0}]})]
+    # the failed batch of four is retried record by record
+    assert batch_sizes == [4, 1, 1, 1, 1]
+
+
+def test_instances_which_are_not_objects_are_refused():
+    async def test(server, port):
+        return await post(port, b'{"instances": [{"product": "a"}, 1, "text"]}'), server.scorer.batch_sizes
+
+    (status, _, payload), batch_sizes = run_with_server(test)
+
+    assert status == 400
+    assert payload["invalid_instances"] == [1, 2]
+    assert batch_sizes == []
+
+
+def test_non_string_values_are_scored_as_their_json_text():
+    async def test(server, port):
+        return await post(port, b'{"instances": [{"product": 12345}, {"product": true}]}')
+
+    status, _, payload = run_with_server(test)
+
+    assert (status, payload) == (200, {"predictions": [{"prediction": 5.0}, {"prediction": 4.0}]})
+
+
+def test_large_bodies_are_refused_without_reading_them():
+    async def test(server, port):
+        return await post(port, json.dumps({"product": "x" * 200}).encode()), server.n_requests
+
+    (status, headers, payload), n_requests = run_with_server(test, max_body_bytes=100)
+
+    assert status == 413
+    assert headers["connection"] == "close"
+    assert n_requests == 0
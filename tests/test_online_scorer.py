@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("pyspark")
+
+from finance_complaint.component.prediction.model_export import ModelExporter
+from finance_complaint.component.prediction.online_scorer import OnlineScorer, murmur3_32
+from finance_complaint.constant.prediction_pipeline_config import PREDICTION_COLUMN_NAME, \
+    PREDICTION_PROBABILITY_COLUMN_NAME
+from finance_complaint.entity.schema import FinanceDataSchema
+
+RECORDS = [
+    {"complaint_id": "100", "complaint_what_happened": "I was charged a late fee"},
+    {"complaint_id": "101", "complaint_what_happened": "My account was closed"},
+    # java's \s doesn't match the no-break and em spaces, these stay single tokens in spark
+    {"complaint_id": "102", "complaint_what_happened": "charged a late fee"},
+    {"complaint_id": "103", "complaint_what_happened": "Café fees, «late» fee\tcharged\ntwice"},
+    {"complaint_id": "104", "product": "Payday loan", "complaint_what_happened": None},
+    {"complaint_id": "105", "product": None, "state": None, "complaint_what_happened": ""},
+]
+
+
+@pytest.fixture
+def online_scorer(fitted_model, tmp_path, monkeypatch):
+    from pyspark.ml import PipelineModel
+    # the fitted model is handed over in memory, saving and loading it isn't what this test is about
+    monkeypatch.setattr(PipelineModel, "load", classmethod(lambda cls, path: fitted_model))
+    export_dir = ModelExporter(model_path=str(tmp_path / "model"), export_dir=str(tmp_path / "online_model")).export()
+    return OnlineScorer(export_dir=export_dir)
+
+
+def test_murmur3_matches_the_reference_values():
+    assert murmur3_32(b"", seed=0) == 0
+    assert murmur3_32(b"", seed=1) == 0x514e28b7
+    assert murmur3_32(b"hello", seed=0) == 0x248bfa47
+    # spark uses the signed value
+    assert murmur3_32(b"Hello, world!", seed=1234) == 0xfaf6cdb3 - (1 << 32)
+
+
+def test_online_scores_match_spark(fitted_model, online_scorer, complaints_dataframe):
+    dataframe = FinanceDataSchema().fill_missing_feature_inputs(complaints_dataframe(RECORDS))
+    spark_rows = {row["complaint_id"]: row for row in fitted_model.transform(dataframe).collect()}
+
+    online_results = online_scorer.score_batch(RECORDS)
+
+    for record, online_result in zip(RECORDS, online_results):
+        spark_row = spark_rows[record["complaint_id"]]
+        assert online_result[PREDICTION_COLUMN_NAME] == spark_row["prediction"]
+        assert online_result[PREDICTION_PROBABILITY_COLUMN_NAME] == pytest.approx(spark_row["probability"][1],
+                                                                                   abs=1e-9)
+
+
+def test_batch_and_single_scores_are_the_same(online_scorer):
+    assert online_scorer.score_batch(RECORDS) == [online_scorer.score_batch([record])[0] for record in RECORDS]
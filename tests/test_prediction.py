@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("pyspark")
+
+from finance_complaint.config.pipeline.prediction import PredictionConfig
+from finance_complaint.constant.prediction_pipeline_config import PREDICTION_COLUMN_NAME
+from finance_complaint.pipeline.prediction import PredictionPipeline
+
+
+def test_missing_feature_inputs_are_filled_like_in_training(fitted_model, complaints_dataframe, tmp_path,
+                                                           monkeypatch):
+    from pyspark.ml import PipelineModel
+    # the fitted model is handed over in memory, saving and loading it isn't what this test is about
+    monkeypatch.setattr(PipelineModel, "load", classmethod(lambda cls, path: fitted_model))
+    prediction_pipeline = PredictionPipeline(PredictionConfig(artifact_dir=str(tmp_path / "artifact"))
+                                             .get_prediction_pipeline_config())
+    dataframe = complaints_dataframe([{"complaint_id": "100", "product": None, "complaint_what_happened": None},
+                                      {"complaint_id": "101", "complaint_what_happened": "charged a late fee"}])
+
+    rows = prediction_pipeline.predict(dataframe, str(tmp_path / "model")).orderBy("complaint_id").collect()
+
+    assert [row["complaint_id"] for row in rows] == ["100", "101"]
+    assert (rows[0]["product"], rows[0]["complaint_what_happened"]) == ("", "")
+    assert all(row[PREDICTION_COLUMN_NAME] in (0.0, 1.0) for row in rows)
@@ -0,0 +1,74 @@
+import os
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("moto")
+pytest.importorskip("pyarrow")
+
+from benchmarks.data_access_benchmark import s3_stand_in, write_feature_store
+from finance_complaint.data_access.s3_artifact_sync import S3ArtifactSync, get_s3_client
+from finance_complaint.entity.artifact_entity import DataIngestionArtifact
+from finance_complaint.exception import FinanceException
+
+
+@pytest.fixture
+def s3_artifact_sync():
+    with s3_stand_in(endpoint_url=None):
+        client = get_s3_client(endpoint_url=None)
+        client.create_bucket(Bucket="finance-test")
+        yield S3ArtifactSync(bucket_name="finance-test", prefix="artifacts", client=client, n_workers=2)
+
+
+@pytest.fixture
+def feature_store_file_path(tmp_path):
+    feature_store_file_path = str(tmp_path / "feature_store")
+    write_feature_store(feature_store_file_path, "2022-05-30", days=4, records_per_day=10)
+    # spark staging dirs and checksums stay local
+    os.makedirs(os.path.join(feature_store_file_path, "_temporary"))
+    open(os.path.join(feature_store_file_path, "_temporary", "part-1.parquet"), "w").close()
+    open(os.path.join(feature_store_file_path, ".part-0.parquet.crc"), "w").close()
+    return feature_store_file_path
+
+
+def test_feature_store_roundtrip(s3_artifact_sync, feature_store_file_path, tmp_path):
+    upload_report = s3_artifact_sync.upload(feature_store_file_path, "feature_store")
+    download_path = str(tmp_path / "downloaded")
+    download_report = s3_artifact_sync.download("feature_store", download_path)
+
+    assert upload_report.n_records == download_report.n_records == 40
+    assert upload_report.n_bytes == download_report.n_bytes
+    assert S3ArtifactSync.list_files(download_path).keys() == \
+           S3ArtifactSync.list_files(feature_store_file_path).keys()
+    assert not os.path.exists(os.path.join(download_path, "_temporary"))
+    assert all(key.startswith("artifacts/feature_store/") for key in
+               s3_artifact_sync.list_objects("artifacts/feature_store"))
+
+
+def test_unchanged_files_are_skipped(s3_artifact_sync, feature_store_file_path, tmp_path):
+    s3_artifact_sync.upload(feature_store_file_path, "feature_store")
+    assert s3_artifact_sync.upload(feature_store_file_path, "feature_store").n_skipped == \
+           len(S3ArtifactSync.list_files(feature_store_file_path))
+
+    download_path = str(tmp_path / "downloaded")
+    s3_artifact_sync.download("feature_store", download_path)
+    download_report = s3_artifact_sync.download("feature_store", download_path)
+    assert download_report.n_bytes == 0
+    assert download_report.n_skipped == len(S3ArtifactSync.list_files(download_path))
+
+
+def test_data_ingestion_artifact_is_synced(s3_artifact_sync, feature_store_file_path, tmp_path):
+    metadata_file_path = tmp_path / "metadata.yaml"
+    metadata_file_path.write_text("from_date: '2022-05-30'\n")
+    data_ingestion_artifact = DataIngestionArtifact(feature_store_file_path=feature_store_file_path,
+                                                    metadata_file_path=str(metadata_file_path), download_dir=None)
+
+    reports = s3_artifact_sync.sync_data_ingestion_artifact(data_ingestion_artifact)
+
+    assert [report.destination for report in reports] == ["s3://finance-test/artifacts/feature_store",
+                                                          "s3://finance-test/artifacts/metadata.yaml"]
+    assert "artifacts/metadata.yaml" in s3_artifact_sync.list_objects("artifacts/metadata.yaml")
+
+
+def test_missing_bucket_is_refused():
+    with pytest.raises(FinanceException, match="FINANCE_S3_BUCKET"):
+        S3ArtifactSync(bucket_name=None, client=object())
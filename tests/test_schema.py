@@ -0,0 +1,21 @@
+import pytest
+from finance_complaint.entity.schema import FinanceDataSchema
+
+
+def test_column_names_match_the_dataframe_schema():
+    pytest.importorskip("pyspark")
+    schema = FinanceDataSchema()
+    assert [field.name for field in schema.dataframe_schema.fields] == schema.column_names
+
+
+def test_only_has_narrative_is_not_a_string():
+    pytest.importorskip("pyspark")
+    types = {field.name: field.dataType.typeName() for field in FinanceDataSchema().dataframe_schema.fields}
+    assert types.pop("has_narrative") == "boolean"
+    assert set(types.values()) == {"string"}
+
+
+def test_column_names_do_not_need_pyspark():
+    schema = FinanceDataSchema()
+    assert schema.col_complaint_id in schema.column_names
+    assert set(schema.categorical_columns) <= set(schema.string_columns)
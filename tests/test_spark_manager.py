@@ -0,0 +1,25 @@
+import pytest
+from benchmarks.startup_time import measure_import
+from finance_complaint.config import spark_manager
+from finance_complaint.exception import FinanceException
+
+
+def test_importing_the_manager_does_not_start_spark():
+    assert measure_import("finance_complaint.config.spark_manager")["lazy_packages_imported"] == []
+
+
+def test_unknown_profiles_are_refused(monkeypatch):
+    pytest.importorskip("pyspark")
+    monkeypatch.setattr(spark_manager, "_spark_session", None)
+    with pytest.raises(FinanceException):
+        spark_manager.get_spark_session(profile="huge")
+    assert spark_manager._spark_session is None
+
+
+def test_the_session_is_shared_and_built_from_the_profile(spark):
+    assert spark_manager.get_spark_session() is spark
+    # the profile of a later call is ignored, the session already exists
+    assert spark_manager.get_spark_session(profile="large") is spark
+    assert spark_manager.spark_session is spark
+    assert spark.conf.get("spark.sql.shuffle.partitions") == "8"
+    assert spark.conf.get("spark.sql.sources.partitionOverwriteMode") == "dynamic"
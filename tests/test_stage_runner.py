@@ -0,0 +1,129 @@
+import json
+import threading
+import pytest
+from dataclasses import dataclass
+from finance_complaint.exception import FinanceException
+from finance_complaint.metrics import pipeline_metrics, track_stage
+from finance_complaint.pipeline.stage_runner import Stage, StageRunner
+
+
+@dataclass
+class NumberArtifact:
+    value: int
+    is_complete: bool = True
+
+
+class Stages:
+    """
+    source -> left, right -> total; left and right wait for each other, so they only finish when run concurrently
+    """
+
+    def __init__(self, source_value: int = 1, is_source_complete: bool = True):
+        self.source_value = source_value
+        self.is_source_complete = is_source_complete
+        self.runs = []
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    def stage(self, name: str, upstream: list, run) -> Stage:
+        def run_stage(config, **upstream_artifacts):
+            self.runs.append(name)
+            return run(**upstream_artifacts)
+        return Stage(name=name, artifact_type=NumberArtifact, upstream=upstream, get_config=lambda: None,
+                     fingerprint_inputs=lambda config: {"source_value": self.source_value} if name == "source" else {},
+                     run=run_stage, artifact_fields=["value"])
+
+    def concurrent(self, value: int) -> NumberArtifact:
+        self.barrier.wait()
+        return NumberArtifact(value=value)
+
+    def get_stages(self) -> list:
+        return [
+            self.stage("total", ["left", "right"],
+                       lambda left, right: NumberArtifact(value=left.value + right.value)),
+            self.stage("left", ["source"], lambda source: self.concurrent(source.value * 10)),
+            self.stage("right", ["source"], lambda source: self.concurrent(source.value * 100)),
+            self.stage("source", [], lambda: NumberArtifact(value=self.source_value,
+                                                            is_complete=self.is_source_complete)),
+        ]
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    stages = Stages()
+
+    artifacts = StageRunner(stages.get_stages(), state_dir=str(tmp_path), max_parallel_stages=2).run()
+
+    assert artifacts["total"].value == 110
+    assert stages.runs[0] == "source" and stages.runs[-1] == "total"
+
+
+def test_unchanged_stages_are_reused(tmp_path):
+    StageRunner(Stages().get_stages(), state_dir=str(tmp_path)).run()
+    stages = Stages()
+
+    artifacts = StageRunner(stages.get_stages(), state_dir=str(tmp_path)).run()
+
+    assert artifacts["total"].value == 110
+    assert stages.runs == []
+
+
+def test_changed_inputs_run_the_stage_and_its_downstream_stages_again(tmp_path):
+    StageRunner(Stages().get_stages(), state_dir=str(tmp_path)).run()
+    stages = Stages(source_value=2)
+
+    artifacts = StageRunner(stages.get_stages(), state_dir=str(tmp_path)).run()
+
+    assert artifacts["total"].value == 220
+    assert sorted(stages.runs) == ["left", "right", "source", "total"]
+
+
+def test_incomplete_stages_are_not_cached_and_stop_the_run(tmp_path):
+    stages = Stages(is_source_complete=False)
+    with pytest.raises(FinanceException):
+        StageRunner(stages.get_stages(), state_dir=str(tmp_path)).run()
+    assert stages.runs == ["source"]
+
+    # the next run does the stage again instead of reusing the partial artifact
+    stages = Stages()
+    StageRunner(stages.get_stages(), state_dir=str(tmp_path)).run()
+    assert stages.runs[0] == "source"
+
+
+def test_cycles_are_refused(tmp_path):
+    stages = Stages()
+    cycle = [stages.stage("a", ["b"], lambda b: b), stages.stage("b", ["a"], lambda a: a)]
+    with pytest.raises(FinanceException):
+        StageRunner(cycle, state_dir=str(tmp_path)).run()
+
+
+def test_unknown_upstream_stages_are_refused(tmp_path):
+    stages = Stages()
+    with pytest.raises(FinanceException, match="unknown stages"):
+        StageRunner([stages.stage("a", ["missing"], lambda missing: missing)], state_dir=str(tmp_path))
+
+
+def test_data_export_runs_next_to_data_validation_when_a_destination_is_set(finance_config, monkeypatch):
+    from finance_complaint.config.pipeline import training as training_config_module
+    from finance_complaint.pipeline.training import TrainingPipeline
+    monkeypatch.setattr(training_config_module, "MONGO_DB_URL", None)
+    monkeypatch.setattr(training_config_module, "S3_BUCKET_NAME", None)
+    assert "data_export" not in [stage.name for stage in TrainingPipeline(finance_config).get_stages()]
+
+    monkeypatch.setattr(training_config_module, "S3_BUCKET_NAME", "finance-bucket")
+    stages = {stage.name: stage for stage in TrainingPipeline(finance_config).get_stages()}
+
+    assert stages["data_export"].upstream == stages["data_validation"].upstream == ["data_ingestion"]
+
+
+def test_stages_are_timed_once_by_their_own_track_stage(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_metrics, "metrics_dir", str(tmp_path / "metrics"))
+
+    @track_stage("source")
+    def run_source(config):
+        return NumberArtifact(value=1)
+
+    stage = Stage(name="source", artifact_type=NumberArtifact, upstream=[], get_config=lambda: None,
+                  fingerprint_inputs=lambda config: {}, run=run_source, artifact_fields=["value"])
+    StageRunner([stage], state_dir=str(tmp_path / "state")).run()
+
+    with open(pipeline_metrics.json_lines_file_path) as file_obj:
+        assert [json.loads(line)["stage"] for line in file_obj] == ["source"]
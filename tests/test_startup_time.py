@@ -0,0 +1,7 @@
+import pytest
+from benchmarks.startup_time import ENTRY_POINTS, measure_import
+
+
+@pytest.mark.parametrize("module", sorted(ENTRY_POINTS))
+def test_entry_points_keep_the_heavy_packages_lazy(module):
+    assert measure_import(module)["lazy_packages_imported"] == []